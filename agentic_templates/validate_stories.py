@@ -81,6 +81,23 @@ def parse_frontmatter(content):
     return fm
 
 
+def read_frontmatter_block(filepath, max_lines=200):
+    """Le so o cabecalho do arquivo (linha a linha ate o segundo '---'), sem carregar o corpo."""
+    with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
+        first = f.readline()
+        if first.strip() != "---":
+            return None
+        lines = [first]
+        for _ in range(max_lines):
+            line = f.readline()
+            if not line:
+                return None
+            lines.append(line)
+            if line.strip() == "---":
+                return "".join(lines)
+    return None
+
+
 def validate_story(filepath):
     """Valida uma story."""
     content = filepath.read_text(encoding="utf-8")
@@ -119,19 +136,21 @@ def validate_story(filepath):
                 errors.append(f"Story '{ticket}' nao pode depender de si mesma")
                 continue
 
-            # Busca story com esse ticket
-            found = False
+            # Busca story com esse ticket (so o cabecalho de cada arquivo e lido)
             dep_file = None
+            dep_fm = None
             for f in stories_dir.glob("*.md"):
-                if f.resolve() != filepath.resolve() and dep in f.read_text(encoding="utf-8"):
-                    found = True
+                if f.resolve() == filepath.resolve():
+                    continue
+                header = read_frontmatter_block(f)
+                candidate_fm = parse_frontmatter(header) if header else None
+                if (candidate_fm and candidate_fm.get("ticket") == dep) or dep in f.stem:
                     dep_file = f
+                    dep_fm = candidate_fm
                     break
-            if not found:
+            if dep_file is None:
                 errors.append(f"Dependencia referenciada nao encontrada: {dep}")
             else:
-                dep_content = dep_file.read_text(encoding="utf-8")
-                dep_fm = parse_frontmatter(dep_content)
                 if dep_fm:
                     dep_status = dep_fm.get("status")
                     if dep_status not in ["CONCLUÍDO", "Done"]:
@@ -1,11 +1,26 @@
+import asyncio
+import functools
+import itertools
 import logging
 import os
-import subprocess
+import re
+import threading
+import time
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
-from .llm_client import call_llm
-from .utils import find_project_root, detect_test_framework, console, cleanup_old_harnesses
+from .context_packer import PackResult, get_context_budget, pack_context
+from .delegation_graph import CLAIM_SKIP, CLAIM_WAIT, DelegationGraph, get_delegation_graph
+from .failure_digest import digest_feedback
+from .llm_client import acall_llm, call_llm
+from .sandbox import apply_file_blocks, create_sandbox, extract_file_blocks, remove_sandbox
+from .test_detection import detect_test_command, resolve_llm_test_command
+from .test_impact import impact_test_command
+from .token_accounting import count_segments, count_tokens, format_segment_counts, model_for_agent
+from .validation_runner import ValidationRun, extract_failure_tail, run_validation
+from .utils import find_project_root, console, cleanup_old_harnesses, live_print
 
 logger = logging.getLogger(__name__)
 
@@ -14,26 +29,31 @@ CONTEXT_WARNING_THRESHOLD = 80000  # tokens estimados - warning
 CONTEXT_DUMB_ZONE_THRESHOLD = 100000  # tokens estimados - dumb zone (LLM fica "burra")
 CHARS_PER_TOKEN_ESTIMATE = 4  # Aproximação: 1 token ≈ 4 caracteres
 
+# Máximo de agentes consultando a LLM ao mesmo tempo em uma mesma story
+DEFAULT_MAX_AGENTS_PER_STORY = 4
+
 
 def estimate_token_count(text: str) -> int:
     """Estima contagem de tokens usando tiktoken se disponível, ou fallback baseado no tamanho do texto."""
-    try:
-        import tiktoken
+    return count_tokens(text)
 
-        encoding = tiktoken.get_encoding("cl100k_base")
-        return len(encoding.encode(text, disallowed_special=()))
-    except Exception:
-        return len(text) // CHARS_PER_TOKEN_ESTIMATE
 
-
-def log_context_density(agent_type: str, total_chars: int) -> int:
+def log_context_density(agent_type: str, total_chars: int, token_counts: Optional[Dict[str, int]] = None) -> int:
     """
     Loga a densidade de contexto do agente e avisa se approaching a dumb zone.
 
+    Args:
+        token_counts: Contagem real por segmento (token_accounting.count_segments).
+            Sem ela, estima pelo número de caracteres.
+
     Returns:
         int: Estimativa de tokens
     """
-    estimated_tokens = estimate_token_count(" " * total_chars)  # aproximação
+    if token_counts:
+        estimated_tokens = token_counts["total"]
+        logger.debug(f"Tokens por segmento ({agent_type}): {format_segment_counts(token_counts)}")
+    else:
+        estimated_tokens = total_chars // CHARS_PER_TOKEN_ESTIMATE
 
     if estimated_tokens >= CONTEXT_DUMB_ZONE_THRESHOLD:
         logger.error(
@@ -52,26 +72,72 @@ def log_context_density(agent_type: str, total_chars: int) -> int:
     return estimated_tokens
 
 
+# Ordem dos segmentos do prompt: do mais estável (reaproveitável no cache de
+# prompt do provedor) ao mais volátil (tarefa e feedback de erro dos retries).
+PROMPT_SEGMENT_ORDER = ("persona", "protocol", "project_context", "files", "task")
+SEGMENT_SEPARATOR = "\n\n"
+PROJECT_CONTEXT_FILE = "PROJECT_CONTEXT.md"
+
+STATIC_PROTOCOL = """## 🧠 J-SPACE COGNITION PROTOCOL (MANDATÓRIO ANTES DA AÇÃO)
+Antes de gerar ou alterar qualquer código, processe internamente a seguinte deliberação enxuta:
+1. [Judgment]: Qual a menor e mais cirúrgica modificação suficiente para atender o requisito?
+2. [Constraints]: Validar limites de linhas (máx 300), princípios YAGNI/KISS e regras do PROJECT_CONTEXT.md.
+3. [Impact]: Prever quais contratos ou testes existentes podem quebrar.
+
+## 🛠️ FERRAMENTAS DISPONÍVEIS
+Você pode delegar subtarefas para outros especialistas se necessário.
+Para delegar, use o formato: [DELEGATE: tipo_do_agente | descrição_da_subtarefa]
+Tipos disponíveis: code, test, architecture, requirements, review, bug_hunter.
+
+## 📋 DIRETRIZES DE SAÍDA
+- Retorne APENAS o resultado solicitado (código, testes ou análise).
+- Use blocos de código Markdown claros.
+- Mantenha a simplicidade (KISS/YAGNI).
+- Não adicione explicações desnecessárias a menos que solicitado."""
+
+
+# Numeração das pastas de harness sem run_key explícito
+_harness_runs = itertools.count(1)
+
+
 class AgentHarness:
     """
     O 'Harness' é o ambiente operacional do agente.
     Ele empacota instruções, contexto do repositório e ferramentas de validação.
     """
 
-    def __init__(self, agent_type: str, story_id: str, project_root: Path):
+    def __init__(self, agent_type: str, story_id: str, project_root: Path, run_key: Optional[str] = None):
+        """
+        Args:
+            run_key: Sufixo da pasta do harness (ex: chave do nó no grafo de delegação).
+                Padrão: contador por processo, para que agentes do mesmo tipo rodando ao
+                mesmo tempo na story (delegações, etapas paralelas) não dividam os arquivos.
+        """
         self.agent_type = agent_type
         self.story_id = story_id
         self.project_root = project_root
-        self.harness_dir = project_root / ".asdlc" / "harness" / f"{story_id}_{agent_type}"
+        run_key = run_key or f"{os.getpid()}-{next(_harness_runs)}"
+        self.harness_dir = project_root / ".asdlc" / "harness" / f"{story_id}_{agent_type}_{run_key}"
         self.harness_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_prefix = 0
+        self.token_counts: Dict[str, int] = {}
+        self.pack_result = PackResult()
+        self.packed_token_counts: Dict[str, int] = {}
 
         # Realiza limpeza automática de logs antigos (mantém os últimos 30)
         cleanup_old_harnesses(project_root / ".asdlc" / "harness", max_folders=30)
 
-    def prepare_context(self, task_description: str, relevant_files: List[str]) -> str:
+    def prepare_segments(
+        self, task_description: str, relevant_files: List[str], query: Optional[str] = None
+    ) -> List[Tuple[str, str]]:
         """
-        Prepara um contexto enxuto (lean context) para o agente.
-        Evita o inchaço de abstração (Abstraction Bloat) e economiza tokens.
+        Monta o prompt como uma pilha ordenada de segmentos (nome, texto), do mais
+        estável ao mais volátil (ver PROMPT_SEGMENT_ORDER). Retries e agentes irmãos
+        compartilham o maior prefixo possível no cache de prompt do provedor.
+
+        PROJECT_CONTEXT.md e os arquivos relevantes são empacotados no orçamento de
+        tokens do agente (context_packer), priorizando os trechos relevantes para
+        query (padrão: a própria tarefa). O relatório fica em self.pack_result.
         """
         # 1. Carregar Persona
         persona_path = self.project_root / ".asdlc" / "agents" / f"{self.agent_type}_agent.md"
@@ -81,132 +147,403 @@ class AgentHarness:
             else f"Você é um agente do tipo {self.agent_type}."
         )
 
-        # 2. Carregar PROJECT_CONTEXT.md (apenas os primeiros 3000 caracteres para evitar 429)
-        project_context_path = self.project_root / "PROJECT_CONTEXT.md"
-        lean_context = ""
+        # 2. Reunir PROJECT_CONTEXT.md e arquivos relevantes como candidatos
+        sources: Dict[str, str] = {}
+        project_context_path = self.project_root / PROJECT_CONTEXT_FILE
         if project_context_path.exists():
-            full_context = project_context_path.read_text(encoding="utf-8")
-            lean_context = (
-                full_context[:3000] + "\n[Conteúdo truncado para economizar tokens...]"
-                if len(full_context) > 3000
-                else full_context
-            )
-
-        # 3. Carregar conteúdo dos arquivos relevantes (com limite de tamanho por arquivo)
-        files_content = ""
+            sources[PROJECT_CONTEXT_FILE] = project_context_path.read_text(encoding="utf-8")
         for file_rel_path in relevant_files:
             file_path = self.project_root / file_rel_path
-            if file_path.exists() and file_path.is_file():
-                # Limite de 5000 chars por arquivo para proteção
-                content = file_path.read_text(encoding="utf-8")
-                if len(content) > 5000:
-                    content = content[:5000] + "\n[... Arquivo muito grande, truncado ...]"
-                files_content += f"\n--- ARQUIVO: {file_rel_path} ---\n{content}\n"
+            if file_rel_path not in sources and file_path.exists() and file_path.is_file():
+                sources[file_rel_path] = file_path.read_text(encoding="utf-8")
+
+        # 3. Empacotar no orçamento de tokens, priorizando os trechos relevantes
+        model = model_for_agent(self.agent_type)
+        self.pack_result = pack_context(sources, query or task_description, get_context_budget(self.agent_type), model)
+        project_header = "## 🌐 CONTEXTO DO PROJETO (LEAN)\n"
+        files_header = "## 📂 ARQUIVOS RELEVANTES\n"
+        lean_context = self.pack_result.render(PROJECT_CONTEXT_FILE)
+        files_content = ""
+        # Os trechos já foram tokenizados no empacotamento: só os cabeçalhos são contados aqui
+        files_tokens = count_tokens(files_header, model)
+        for file_rel_path in sources:
+            if file_rel_path != PROJECT_CONTEXT_FILE:
+                file_header = f"\n--- ARQUIVO: {file_rel_path} ---\n"
+                files_content += f"{file_header}{self.pack_result.render(file_rel_path)}\n"
+                files_tokens += count_tokens(file_header + "\n", model) + self.pack_result.rendered_tokens(
+                    file_rel_path, model
+                )
+        self.packed_token_counts = {
+            "project_context": count_tokens(project_header, model)
+            + self.pack_result.rendered_tokens(PROJECT_CONTEXT_FILE, model),
+            "files": files_tokens,
+        }
+
+        # 4. Empilhar segmentos: estático -> projeto -> arquivos -> tarefa (volátil)
+        return [
+            ("persona", persona),
+            ("protocol", STATIC_PROTOCOL),
+            ("project_context", f"{project_header}{lean_context}"),
+            ("files", f"{files_header}{files_content}"),
+            ("task", f"## 🎯 SUA TAREFA ATUAL\n{task_description}"),
+        ]
+
+    def prepare_context(self, task_description: str, relevant_files: List[str], query: Optional[str] = None) -> str:
+        """
+        Prepara um contexto enxuto (lean context) para o agente.
+        Evita o inchaço de abstração (Abstraction Bloat) e economiza tokens.
 
-        # 4. Montar o prompt final
-        prompt = f"""
-{persona}
+        Após a chamada, self.cache_prefix guarda o tamanho do prefixo estável
+        (tudo antes da tarefa), repassado ao call_llm como dica de prompt caching,
+        e self.token_counts a contagem de tokens por segmento.
 
-## 🌐 CONTEXTO DO PROJETO (LEAN)
-{lean_context}
+        Args:
+            query: Texto usado para ranquear os trechos de contexto. Retries passam a
+                tarefa original para que o feedback de erro não mude o prefixo.
+        """
+        segments = self.prepare_segments(task_description, relevant_files, query)
+        stable = SEGMENT_SEPARATOR.join(text for name, text in segments if name != "task")
+        prompt = stable + SEGMENT_SEPARATOR + segments[-1][1] + "\n"
+        self.cache_prefix = len(stable) + len(SEGMENT_SEPARATOR)
+        self.token_counts = count_segments(segments, model_for_agent(self.agent_type), known=self.packed_token_counts)
 
-## 📂 ARQUIVOS RELEVANTES
-{files_content}
+        # Monitorar densidade de contexto (Smart Zone vs Dumb Zone)
+        log_context_density(self.agent_type, len(prompt), self.token_counts)
 
-## 🧠 J-SPACE COGNITION PROTOCOL (MANDATÓRIO ANTES DA AÇÃO)
-Antes de gerar ou alterar qualquer código, processe internamente a seguinte deliberação enxuta:
-1. [Judgment]: Qual a menor e mais cirúrgica modificação suficiente para atender o requisito?
-2. [Constraints]: Validar limites de linhas (máx 300), princípios YAGNI/KISS e regras do PROJECT_CONTEXT.md.
-3. [Impact]: Prever quais contratos ou testes existentes podem quebrar.
+        return prompt
 
-## 🛠️ FERRAMENTAS DISPONÍVEIS
-Você pode delegar subtarefas para outros especialistas se necessário.
-Para delegar, use o formato: [DELEGATE: tipo_do_agente | descrição_da_subtarefa]
-Tipos disponíveis: code, test, architecture, requirements, review, bug_hunter.
 
-## 🎯 SUA TAREFA ATUAL
-{task_description}
+DELEGATE_PATTERN = re.compile(r"\[DELEGATE:\s*(\w+)\s*\|\s*([^\]]+)\]")
 
-## 📋 DIRETRIZES DE SAÍDA
-- Retorne APENAS o resultado solicitado (código, testes ou análise).
-- Use blocos de código Markdown claros.
-- Mantenha a simplicidade (KISS/YAGNI).
-- Não adicione explicações desnecessárias a menos que solicitado.
-"""
-        # Monitorar densidade de contexto (Smart Zone vs Dumb Zone)
-        log_context_density(self.agent_type, len(prompt))
 
-        return prompt
+def _splice_delegation(result: str, sub_type: str, sub_task: str, sub_result: str) -> str:
+    """Insere o resultado do sub-agente no lugar do marcador de delegação."""
+    return result.replace(f"[DELEGATE: {sub_type} | {sub_task}]", f"\n### RESULTADO DA DELEGAÇÃO ({sub_type}):\n{sub_result}")
+
+
+def _save_harness_input(harness: AgentHarness, prompt: str) -> None:
+    """Salva o prompt no harness para auditoria (antes da chamada à LLM)."""
+    (harness.harness_dir / "input_prompt.md").write_text(prompt, encoding="utf-8")
+    (harness.harness_dir / "context_report.md").write_text(harness.pack_result.report(), encoding="utf-8")
+
+
+def _save_harness_output(harness: AgentHarness, result: str) -> None:
+    """Salva o resultado final (com delegações resolvidas) no harness."""
+    (harness.harness_dir / "output.md").write_text(result, encoding="utf-8")
+
 
+_story_slots: Dict[str, threading.BoundedSemaphore] = {}
+_story_slots_lock = threading.Lock()
+_async_story_slots: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+_status_lock = threading.Lock()
 
-def spawn_agent(agent_type: str, story_id: str, task_description: str, relevant_files: List[str]) -> str:
+
+def _max_agents_per_story() -> int:
+    return max(1, int(os.getenv("ASDLC_MAX_AGENTS_PER_STORY", str(DEFAULT_MAX_AGENTS_PER_STORY))))
+
+
+def _story_slot(story_id: str) -> threading.BoundedSemaphore:
+    """Semáforo global da story: limita os agentes ativos (chamando a LLM) ao mesmo tempo."""
+    with _story_slots_lock:
+        slot = _story_slots.get(story_id)
+        if slot is None:
+            slot = threading.BoundedSemaphore(_max_agents_per_story())
+            _story_slots[story_id] = slot
+        return slot
+
+
+def _async_story_slot(story_id: str) -> asyncio.Semaphore:
+    """
+    Versão assíncrona de _story_slot (um semáforo por event loop). Entradas de loops
+    encerrados são descartadas; o id() de um loop fechado pode ser reaproveitado.
+    """
+    loop = asyncio.get_running_loop()
+    key = (id(loop), story_id)
+    with _story_slots_lock:
+        for stale_key in [k for k, v in _async_story_slots.items() if v[0].is_closed()]:
+            del _async_story_slots[stale_key]
+
+        entry = _async_story_slots.get(key)
+        if entry and entry[0] is loop:
+            return entry[1]
+        slot = asyncio.Semaphore(_max_agents_per_story())
+        _async_story_slots[key] = (loop, slot)
+        return slot
+
+
+@contextmanager
+def _agent_status(message: str):
+    """
+    Spinner do rich para o agente. O rich só admite um display ao vivo por vez:
+    com delegações em paralelo, apenas o primeiro agente exibe o spinner.
+    """
+    if not _status_lock.acquire(blocking=False):
+        yield None
+        return
+    try:
+        with console.status(message, spinner="dots12") as status:
+            yield status
+    finally:
+        _status_lock.release()
+
+
+def _streaming_enabled(stream: Optional[bool]) -> bool:
+    if stream is not None:
+        return stream
+    return os.getenv("ASDLC_LLM_STREAM", "false").lower() == "true"
+
+
+class HarnessStreamWriter:
+    """
+    Escreve a resposta em streaming direto no output.md do harness e atualiza
+    o spinner com a vazão (cada trecho do stream ≈ 1 token).
+    """
+
+    def __init__(self, output_path: Path, agent_type: str, status=None):
+        self.agent_type = agent_type
+        self.status = status
+        self.chunks = 0
+        self.started = time.monotonic()
+        self._file = open(output_path, "w", encoding="utf-8")
+
+    def write(self, chunk: str) -> None:
+        self._file.write(chunk)
+        self._file.flush()
+        self.chunks += 1
+        if self.status is not None:
+            elapsed = max(time.monotonic() - self.started, 1e-6)
+            self.status.update(
+                f"[bold cyan]Agente {self.agent_type}[/bold cyan] gerando resposta... "
+                f"[dim]{self.chunks} tokens, {self.chunks / elapsed:.1f} tokens/s[/dim]"
+            )
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def spawn_agent(
+    agent_type: str, story_id: str, task_description: str, relevant_files: List[str], stream: Optional[bool] = None
+) -> str:
     """
     Spawna um agente especializado com contexto isolado.
+
+    As delegações ([DELEGATE: ...]) passam pelo grafo de delegação da story:
+    profundidade e fan-out limitados, subtarefas idênticas computadas uma vez.
+
+    Args:
+        stream: Escreve a resposta no output.md do harness à medida que chega.
+            None usa ASDLC_LLM_STREAM do .env.
     """
     project_root = find_project_root()
     if not project_root:
         return "ERRO: Projeto não encontrado."
 
+    graph = get_delegation_graph(story_id, project_root)
+    with graph.session():
+        return _spawn_node(graph, None, agent_type, story_id, task_description, relevant_files, stream)
+
+
+def _spawn_node(
+    graph: DelegationGraph,
+    parent: Optional[str],
+    agent_type: str,
+    story_id: str,
+    task_description: str,
+    relevant_files: List[str],
+    stream: Optional[bool],
+) -> str:
+    """Executa um nó do grafo de delegação, ou reaproveita o resultado de um nó idêntico."""
+    key, action, payload = graph.claim(agent_type, task_description, relevant_files, parent)
+    if action == CLAIM_SKIP:
+        return payload
+    if action == CLAIM_WAIT:
+        logger.info(f"Subtarefa de {agent_type} já solicitada nesta story: reaproveitando o resultado.")
+        return payload.result()
+
+    try:
+        result = _run_agent(graph, key, agent_type, story_id, task_description, relevant_files, stream)
+    except Exception as e:
+        graph.fail(key, e)
+        raise
+    graph.complete(key, result)
+    return result
+
+
+def _limit_fanout(graph: DelegationGraph, result: str, handoffs: List[Tuple[str, str]]) -> Tuple[str, List[Tuple[str, str]]]:
+    """Mantém os primeiros max_fanout handoffs; os excedentes recebem uma nota no lugar do resultado."""
+    if len(handoffs) <= graph.max_fanout:
+        return result, handoffs
+    logger.warning(f"Fan-out de {len(handoffs)} delegações excede o limite ({graph.max_fanout}).")
+    for sub_type, sub_task in handoffs[graph.max_fanout :]:
+        result = _splice_delegation(
+            result, sub_type, sub_task, f"[DELEGAÇÃO NÃO EXECUTADA: limite de fan-out ({graph.max_fanout}) atingido]"
+        )
+    return result, handoffs[: graph.max_fanout]
+
+
+def _run_delegations(
+    graph: DelegationGraph,
+    parent: str,
+    handoffs: List[Tuple[str, str]],
+    story_id: str,
+    relevant_files: List[str],
+    stream: Optional[bool],
+) -> List[str]:
+    """Executa os handoffs em paralelo (executor limitado) e devolve os resultados na ordem original."""
+    if len(handoffs) == 1:
+        sub_type, sub_task = handoffs[0]
+        return [_spawn_node(graph, parent, sub_type, story_id, sub_task, relevant_files, stream)]
+
+    with ThreadPoolExecutor(max_workers=min(len(handoffs), _max_agents_per_story())) as executor:
+        futures = [
+            executor.submit(_spawn_node, graph, parent, sub_type, story_id, sub_task, relevant_files, stream)
+            for sub_type, sub_task in handoffs
+        ]
+        return [future.result() for future in futures]
+
+
+def _run_agent(
+    graph: DelegationGraph,
+    key: str,
+    agent_type: str,
+    story_id: str,
+    task_description: str,
+    relevant_files: List[str],
+    stream: Optional[bool],
+) -> str:
     logger.info(f"Spawnando agente {agent_type} para a story {story_id}...")
 
-    harness = AgentHarness(agent_type, story_id, project_root)
+    harness = AgentHarness(agent_type, story_id, graph.project_root, run_key=key)
     lean_prompt = harness.prepare_context(task_description, relevant_files)
-
-    # Chamada isolada à LLM com roteamento de modelo
-    with console.status(f"[bold cyan]Agente {agent_type}[/bold cyan] consultando inteligência...", spinner="dots12"):
-        result = call_llm(lean_prompt, agent_type=agent_type)
+    _save_harness_input(harness, lean_prompt)
+    graph.annotate(key, llm_calls=1, prompt_tokens=harness.token_counts.get("total", 0))
+
+    # Chamada isolada à LLM com roteamento de modelo (o slot da story é liberado antes
+    # das delegações, para que os sub-agentes não esperem pelo agente pai)
+    with _story_slot(story_id), _agent_status(
+        f"[bold cyan]Agente {agent_type}[/bold cyan] consultando inteligência..."
+    ) as status:
+        if _streaming_enabled(stream):
+            with HarnessStreamWriter(harness.harness_dir / "output.md", agent_type, status) as writer:
+                result = call_llm(
+                    lean_prompt,
+                    agent_type=agent_type,
+                    stream=True,
+                    on_chunk=writer.write,
+                    cache_prefix=harness.cache_prefix,
+                )
+        else:
+            result = call_llm(lean_prompt, agent_type=agent_type, cache_prefix=harness.cache_prefix)
 
     # 2. Lógica de Recursive Handoff (Delegação)
     if "[DELEGATE:" in result:
-        import re
-
-        handoffs = re.findall(r"\[DELEGATE:\s*(\w+)\s*\|\s*([^\]]+)\]", result)
-        for sub_type, sub_task in handoffs:
+        handoffs = DELEGATE_PATTERN.findall(result)
+        for sub_type, _ in handoffs:
             logger.info(f"Handoff detectado: {agent_type} -> {sub_type}")
-            sub_result = spawn_agent(sub_type, story_id, sub_task, relevant_files)
+        result, handoffs = _limit_fanout(graph, result, handoffs)
+        # Sub-agentes rodam em paralelo; os resultados voltam na ordem dos marcadores
+        sub_results = _run_delegations(graph, key, handoffs, story_id, relevant_files, stream)
+        for (sub_type, sub_task), sub_result in zip(handoffs, sub_results):
             # Inserir o resultado do sub-agente de volta no resultado original ou processar
-            result = result.replace(
-                f"[DELEGATE: {sub_type} | {sub_task}]", f"\n### RESULTADO DA DELEGAÇÃO ({sub_type}):\n{sub_result}"
-            )
-            # Recursão: O resultado com o sub-resultado pode precisar de nova análise
-            # Por simplicidade aqui, apenas concatenamos, mas em MAS complexos teríamos novo loop.
+            result = _splice_delegation(result, sub_type, sub_task, sub_result)
+        # Recursão: O resultado com o sub-resultado pode precisar de nova análise
+        # Por simplicidade aqui, apenas concatenamos, mas em MAS complexos teríamos novo loop.
 
     # Salvar resultado no harness para auditoria
-    (harness.harness_dir / "output.md").write_text(result, encoding="utf-8")
-    (harness.harness_dir / "input_prompt.md").write_text(lean_prompt, encoding="utf-8")
+    _save_harness_output(harness, result)
 
     return result
 
 
-def validate_and_fix(
+async def aspawn_agent(agent_type: str, story_id: str, task_description: str, relevant_files: List[str]) -> str:
+    """
+    Versão assíncrona de spawn_agent (usa acall_llm).
+
+    Não exibe spinner: vários agentes podem estar ativos ao mesmo tempo.
+    """
+    project_root = find_project_root()
+    if not project_root:
+        return "ERRO: Projeto não encontrado."
+
+    graph = get_delegation_graph(story_id, project_root)
+    with graph.session():
+        return await _aspawn_node(graph, None, agent_type, story_id, task_description, relevant_files)
+
+
+async def _aspawn_node(
+    graph: DelegationGraph,
+    parent: Optional[str],
     agent_type: str,
     story_id: str,
     task_description: str,
     relevant_files: List[str],
-    validation_cmd: Optional[str] = None,
-    max_retries: int = 3,
 ) -> str:
-    """
-    Executa um agente, valida o resultado com um comando e tenta corrigir se falhar.
-    Detecta automaticamente o framework de testes se nenhum comando for fornecido.
-    """
-    project_root = find_project_root()
+    """Versão assíncrona de _spawn_node."""
+    key, action, payload = graph.claim(agent_type, task_description, relevant_files, parent)
+    if action == CLAIM_SKIP:
+        return payload
+    if action == CLAIM_WAIT:
+        logger.info(f"Subtarefa de {agent_type} já solicitada nesta story: reaproveitando o resultado.")
+        return await asyncio.wrap_future(payload)
 
-    # 1. Detecção inteligente de sensor via Agente (Harness Sensor Detection)
-    if not validation_cmd:
-        logger.info("Solicitando ao Architecture Agent para detectar o framework de testes...")
+    try:
+        result = await _arun_agent(graph, key, agent_type, story_id, task_description, relevant_files)
+    except Exception as e:
+        graph.fail(key, e)
+        raise
+    graph.complete(key, result)
+    return result
 
-        # Obter lista de arquivos ignorando diretórios pesados (node_modules, etc)
-        ignore_dirs = {".git", ".asdlc", "node_modules", "venv", "build", "dist", "__pycache__", "target"}
-        files = []
-        for p in project_root.rglob("*"):
-            if p.is_file() and not any(d in p.parts for d in ignore_dirs):
-                files.append(str(p.relative_to(project_root)))
-                if len(files) >= 50:
-                    break
-        file_list_str = "\n".join(files)
 
-        detection_prompt = f"""
+async def _arun_agent(
+    graph: DelegationGraph, key: str, agent_type: str, story_id: str, task_description: str, relevant_files: List[str]
+) -> str:
+    logger.info(f"Spawnando agente {agent_type} (async) para a story {story_id}...")
+
+    harness = AgentHarness(agent_type, story_id, graph.project_root, run_key=key)
+    lean_prompt = harness.prepare_context(task_description, relevant_files)
+    _save_harness_input(harness, lean_prompt)
+    graph.annotate(key, llm_calls=1, prompt_tokens=harness.token_counts.get("total", 0))
+
+    async with _async_story_slot(story_id):
+        result = await acall_llm(lean_prompt, agent_type=agent_type, cache_prefix=harness.cache_prefix)
+
+    if "[DELEGATE:" in result:
+        handoffs = DELEGATE_PATTERN.findall(result)
+        for sub_type, _ in handoffs:
+            logger.info(f"Handoff detectado: {agent_type} -> {sub_type}")
+        result, handoffs = _limit_fanout(graph, result, handoffs)
+        sub_results = await asyncio.gather(
+            *(_aspawn_node(graph, key, sub_type, story_id, sub_task, relevant_files) for sub_type, sub_task in handoffs)
+        )
+        for (sub_type, sub_task), sub_result in zip(handoffs, sub_results):
+            result = _splice_delegation(result, sub_type, sub_task, sub_result)
+
+    _save_harness_output(harness, result)
+
+    return result
+
+
+def _build_detection_prompt(story_id: str, project_root: Path) -> str:
+    """Monta o prompt para o Architecture Agent detectar o comando de testes."""
+    # Obter lista de arquivos ignorando diretórios pesados (node_modules, etc)
+    ignore_dirs = {".git", ".asdlc", "node_modules", "venv", "build", "dist", "__pycache__", "target"}
+    files = []
+    for p in project_root.rglob("*"):
+        if p.is_file() and not any(d in p.parts for d in ignore_dirs):
+            files.append(str(p.relative_to(project_root)))
+            if len(files) >= 50:
+                break
+    file_list_str = "\n".join(files)
+
+    return f"""
 Analise o PROJECT_CONTEXT.md e a estrutura de arquivos abaixo para determinar qual comando de teste deve ser usado para validar a story {story_id}.
 IMPORTANTE: Ignore o PROJECT_CONTEXT.md se ele contradisser a estrutura real de arquivos. 
 Se você ver arquivos .ino, pode ser um projeto Arduino (use 'arduino-cli' se disponível ou sugira um).
@@ -218,53 +555,365 @@ ESTRUTURA DE ARQUIVOS REAL:
 Responda APENAS com o comando de execução (ex: 'pytest', 'npm test', 'go test').
 Se não houver framework configurado ou se for um tipo de projeto que você não conhece o comando de cabeça, responda 'CREATE_SUGGESTION'.
 """
-        detected_cmd = spawn_agent("architecture", story_id, detection_prompt, ["PROJECT_CONTEXT.md"])
 
-        if "CREATE_SUGGESTION" in detected_cmd:
-            logger.warning("Nenhum framework detectado. Solicitando plano de configuração...")
-            suggestion_prompt = (
-                f"O projeto não possui testes. Sugira um framework e comandos de configuração para a story {story_id}."
-            )
-            return spawn_agent("architecture", story_id, suggestion_prompt, [])
 
-        validation_cmd = detected_cmd.strip().strip("'").strip('"')
-        from .utils import live_print
+def _suggestion_prompt(story_id: str) -> str:
+    return f"O projeto não possui testes. Sugira um framework e comandos de configuração para a story {story_id}."
+
+
+def _build_error_feedback(task_description: str, run: ValidationRun, command: str = "") -> str:
+    """
+    Monta a tarefa de retry com o feedback de erro da validação: o digest das
+    falhas quando a saída é reconhecida, senão só o trecho final relevante.
+    """
+    details = digest_feedback(run.stdout, run.stderr, command)
+    if details is None or run.timed_out:
+        details = f"{extract_failure_tail(run.stderr)}\n{extract_failure_tail(run.stdout)}"
+    error_feedback = (
+        f"A validação falhou com o seguinte erro:\n{details}\n\n"
+        "### 🧠 J-SPACE RECOVERY WORKSPACE (RCA & PATCH CIRÚRGICO)\n"
+        "1. Analise o traceback e formule a causa-raiz exata.\n"
+        "2. Delibere sobre efeitos colaterais da correção.\n"
+        "3. Emita APENAS o patch cirúrgico necessário para resolver a falha sem adicionar complexidade."
+    )
+    return f"{task_description}\n\n### FEEDBACK DE ERRO:\n{error_feedback}"
+
+
+def _stream_validation_line(line: str) -> None:
+    logger.debug(f"[validação] {line}")
 
+
+def _retry_test_command(project_root: Path, validation_cmd: str, relevant_files: List[str]) -> Optional[str]:
+    """
+    Comando dos retries com seleção incremental (ASDLC_TEST_IMPACT): só os testes
+    afetados pelos relevant_files. None mantém a suíte completa.
+    """
+    if os.getenv("ASDLC_TEST_IMPACT", "true").lower() != "true":
+        return None
+    return impact_test_command(project_root, validation_cmd, relevant_files)
+
+
+def _heuristic_validation_cmd(project_root: Path) -> Optional[str]:
+    """Comando de testes detectado pelas heurísticas locais (None se inconclusivas)."""
+    validation_cmd = detect_test_command(project_root)
+    if validation_cmd:
         live_print(f"[bold cyan]Framework detectado:[/bold cyan] {validation_cmd}")
+    return validation_cmd
 
-    harness = AgentHarness(agent_type, story_id, project_root)
 
+def _agent_validation_cmd(project_root: Path, detected_cmd: str) -> Optional[str]:
+    """
+    Interpreta a resposta do Architecture Agent à detecção. None quando o agente
+    pede CREATE_SUGGESTION (o chamador solicita então o plano de configuração).
+    """
+    if "CREATE_SUGGESTION" in detected_cmd:
+        logger.warning("Nenhum framework detectado. Solicitando plano de configuração...")
+        return None
+    # Só um comando válido vai para o cache
+    validation_cmd = resolve_llm_test_command(project_root, detected_cmd)
+    live_print(f"[bold cyan]Framework detectado:[/bold cyan] {validation_cmd}")
+    return validation_cmd
+
+
+class _FixLoop:
+    """
+    Estado das tentativas de validate_and_fix (tarefa com feedback, contador e
+    comando dos retries). Só decide; as chamadas à LLM e a validação ficam com
+    quem a usa, de forma síncrona ou assíncrona.
+    """
+
+    def __init__(self, agent_type: str, task_description: str, validation_cmd: str, max_retries: int):
+        self.agent_type = agent_type
+        self.task_description = task_description
+        self.validation_cmd = validation_cmd
+        self.max_retries = max_retries
+        self.current_task = task_description
+        self.attempt = 0
+        self.retry_cmd: Optional[str] = None
+
+    def next_attempt(self) -> bool:
+        if self.attempt >= self.max_retries:
+            return False
+        logger.info(f"Tentativa {self.attempt + 1} para o agente {self.agent_type}...")
+        return True
+
+    def command(self) -> str:
+        cmd = self.retry_cmd or self.validation_cmd
+        logger.info(f"Rodando validação: {cmd}")
+        return cmd
+
+    def full_suite_command(self, run: ValidationRun, cmd: str) -> Optional[str]:
+        """Comando da suíte completa quando só os testes afetados rodaram e passaram."""
+        if not run.passed or cmd == self.validation_cmd:
+            return None
+        logger.info("Testes afetados passaram; rodando a suíte completa...")
+        self.retry_cmd = None
+        return self.validation_cmd
+
+    def record_failure(self, run: ValidationRun, cmd: str) -> bool:
+        """Registra a falha e monta o feedback. True quando o comando dos retries deve ser calculado."""
+        logger.warning(f"ERRO: Validação falhou (Tentativa {self.attempt + 1})")
+        self.current_task = _build_error_feedback(self.task_description, run, cmd)
+        self.attempt += 1
+        return self.attempt == 1
+
+
+def _apply_files_enabled(apply_files: Optional[bool]) -> bool:
+    """Aplica os arquivos gerados pela LLM ao projeto (parâmetro ou ASDLC_APPLY_FILES)."""
+    if apply_files is not None:
+        return apply_files
+    return os.getenv("ASDLC_APPLY_FILES", "false").lower() == "true"
+
+
+def _speculative_candidates(candidates: Optional[int]) -> int:
+    """Candidatos por rodada (parâmetro ou ASDLC_SPECULATIVE_CANDIDATES; 1 = modo sequencial)."""
+    if candidates is None:
+        candidates = int(os.getenv("ASDLC_SPECULATIVE_CANDIDATES", "1"))
+    return max(1, candidates)
+
+
+def _run_candidate(
+    index: int,
+    prompt: str,
+    harness: "AgentHarness",
+    validation_cmd: str,
+    stop: threading.Event,
+) -> Dict[str, Any]:
+    """Gera um candidato, aplica seus arquivos numa sandbox e roda a validação nela."""
+    with _story_slot(harness.story_id):
+        result = call_llm(prompt, agent_type=harness.agent_type, use_cache=False, cache_prefix=harness.cache_prefix)
+    files = extract_file_blocks(result)
+    outcome = {"index": index, "result": result, "files": files, "passed": False, "run": None}
+    if stop.is_set():
+        return outcome
+
+    sandbox = create_sandbox(harness.project_root)
+    try:
+        apply_file_blocks(files, sandbox)
+        outcome["run"] = run_validation(validation_cmd, sandbox, stop=stop, on_line=_stream_validation_line)
+        outcome["passed"] = outcome["run"].passed
+    except Exception as e:
+        outcome["run"] = ValidationRun(None, "", f"Erro ao executar validação: {e}", 0.0)
+    finally:
+        remove_sandbox(sandbox)
+    return outcome
+
+
+def _speculative_validate(
+    harness: "AgentHarness",
+    task_description: str,
+    relevant_files: List[str],
+    validation_cmd: str,
+    max_retries: int,
+    candidates: int,
+    apply_files: bool = False,
+) -> str:
+    """
+    Modo especulativo de validate_and_fix: cada rodada pede N candidatos em
+    paralelo e valida cada um numa cópia isolada do projeto. O primeiro que
+    passa vence sem esperar os demais (que são cancelados); com apply_files, seus
+    arquivos são aplicados ao projeto. Se nenhum passar, a próxima rodada recebe o feedback do primeiro
+    candidato que falhou. max_retries limita o total de candidatos gerados.
+    """
     current_task = task_description
-    attempt = 0
+    attempts = 0
+
+    while attempts < max_retries:
+        round_size = min(candidates, max_retries - attempts)
+        logger.info(f"Rodada especulativa com {round_size} candidatos para o agente {harness.agent_type}...")
+
+        prompt = harness.prepare_context(current_task, relevant_files, query=task_description)
+        stop = threading.Event()
+        winner = None
+        failures = []
+        executor = ThreadPoolExecutor(max_workers=round_size)
+        futures = [
+            executor.submit(
+                _run_candidate,
+                i,
+                # Sufixo depois do prompt: o prefixo cacheável é o mesmo para todos os candidatos
+                f"{prompt}\n\n[Candidato {i + 1}/{round_size}: proponha uma implementação independente.]",
+                harness,
+                validation_cmd,
+                stop,
+            )
+            for i in range(round_size)
+        ]
+        try:
+            for future in as_completed(futures):
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    logger.error(f"Erro no candidato especulativo: {e}")
+                    continue
+                if outcome["passed"]:
+                    winner = outcome
+                    break
+                failures.append(outcome)
+        finally:
+            # O vencedor não espera as chamadas à LLM dos perdedores: elas terminam em
+            # segundo plano e, com o stop, são descartadas sem validação
+            stop.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+        attempts += round_size
+
+        if winner:
+            logger.info(f"OK: Candidato {winner['index'] + 1} passou na validação!")
+            if apply_files:
+                apply_file_blocks(winner["files"], harness.project_root)
+            return winner["result"]
+
+        logger.warning(f"ERRO: Nenhum dos {round_size} candidatos passou na validação")
+        first = min((o for o in failures if o["run"] is not None), key=lambda o: o["index"], default=None)
+        if first is None:
+            break
+        current_task = _build_error_feedback(task_description, first["run"], validation_cmd)
 
-    while attempt < max_retries:
-        logger.info(f"Tentativa {attempt + 1} para o agente {agent_type}...")
+    return "Falha ao atingir conformidade após retries."
 
-        prompt = harness.prepare_context(current_task, relevant_files)
-        result = call_llm(prompt, agent_type=agent_type)
 
-        # Simular a aplicação do resultado (em um sistema real, salvaríamos os arquivos)
-        # Por enquanto, apenas rodamos a validação se o comando for fornecido
+def validate_and_fix(
+    agent_type: str,
+    story_id: str,
+    task_description: str,
+    relevant_files: List[str],
+    validation_cmd: Optional[str] = None,
+    max_retries: int = 3,
+    candidates: Optional[int] = None,
+    apply_files: Optional[bool] = None,
+) -> str:
+    """
+    Executa um agente, valida o resultado com um comando e tenta corrigir se falhar.
+    Detecta automaticamente o framework de testes se nenhum comando for fornecido.
+    Com candidates > 1 (ou ASDLC_SPECULATIVE_CANDIDATES), roda o modo especulativo:
+    vários candidatos em paralelo, cada um validado numa sandbox isolada.
+    Com apply_files (ou ASDLC_APPLY_FILES), os arquivos do resultado são gravados no
+    projeto nos dois modos; sem ele, a árvore de trabalho não é alterada.
+    """
+    project_root = find_project_root()
+
+    # 1. Detecção inteligente de sensor via Agente (Harness Sensor Detection)
+    if not validation_cmd:
+        validation_cmd = _heuristic_validation_cmd(project_root)
+
+    if not validation_cmd:
+        # Heurísticas inconclusivas: consulta o Architecture Agent
+        logger.info("Solicitando ao Architecture Agent para detectar o framework de testes...")
+        detection_prompt = _build_detection_prompt(story_id, project_root)
+        detected_cmd = spawn_agent("architecture", story_id, detection_prompt, ["PROJECT_CONTEXT.md"])
+        validation_cmd = _agent_validation_cmd(project_root, detected_cmd)
+        if not validation_cmd:
+            return spawn_agent("architecture", story_id, _suggestion_prompt(story_id), [])
+
+    harness = AgentHarness(agent_type, story_id, project_root)
+
+    apply_files = _apply_files_enabled(apply_files)
+    candidates = _speculative_candidates(candidates)
+    if candidates > 1:
+        return _speculative_validate(
+            harness, task_description, relevant_files, validation_cmd, max_retries, candidates, apply_files
+        )
+
+    loop = _FixLoop(agent_type, task_description, validation_cmd, max_retries)
+    while loop.next_attempt():
+        prompt = harness.prepare_context(loop.current_task, relevant_files, query=task_description)
+        # Retries dependem do feedback de erro: nunca servir do cache
+        result = call_llm(prompt, agent_type=agent_type, use_cache=False, cache_prefix=harness.cache_prefix)
 
         try:
-            logger.info(f"Rodando validação: {validation_cmd}")
-            # Em um cenário real, o comando rodaria sobre os arquivos modificados
-            process = subprocess.run(validation_cmd, shell=True, capture_output=True, text=True, cwd=project_root)
+            if apply_files:
+                apply_file_blocks(extract_file_blocks(result), project_root)
+            cmd = loop.command()
+            run = run_validation(cmd, project_root, on_line=_stream_validation_line)
+            full_cmd = loop.full_suite_command(run, cmd)
+            if full_cmd:
+                cmd = full_cmd
+                run = run_validation(cmd, project_root, on_line=_stream_validation_line)
+
+            if run.passed:
+                logger.info("OK: Validação passou!")
+                return result
+            if loop.record_failure(run, cmd):
+                loop.retry_cmd = _retry_test_command(project_root, validation_cmd, relevant_files)
+        except Exception as e:
+            logger.error(f"Erro ao executar validação: {e}")
+            break
+
+    return "Falha ao atingir conformidade após retries."
+
+
+async def _run_in_thread(func, *args, **kwargs):
+    """Executa func no executor padrão do loop (asyncio.to_thread só existe a partir do Python 3.9)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+async def avalidate_and_fix(
+    agent_type: str,
+    story_id: str,
+    task_description: str,
+    relevant_files: List[str],
+    validation_cmd: Optional[str] = None,
+    max_retries: int = 3,
+    candidates: Optional[int] = None,
+    apply_files: Optional[bool] = None,
+) -> str:
+    """
+    Versão assíncrona de validate_and_fix: chamadas à LLM via acall_llm e
+    validação (run_validation) e modo especulativo em threads
+    (_run_in_thread), sem bloquear o event loop.
+    """
+    project_root = find_project_root()
+
+    if not validation_cmd:
+        validation_cmd = _heuristic_validation_cmd(project_root)
+
+    if not validation_cmd:
+        logger.info("Solicitando ao Architecture Agent para detectar o framework de testes...")
+        detection_prompt = _build_detection_prompt(story_id, project_root)
+        detected_cmd = await aspawn_agent("architecture", story_id, detection_prompt, ["PROJECT_CONTEXT.md"])
+        validation_cmd = _agent_validation_cmd(project_root, detected_cmd)
+        if not validation_cmd:
+            return await aspawn_agent("architecture", story_id, _suggestion_prompt(story_id), [])
 
-            if process.returncode == 0:
+    harness = AgentHarness(agent_type, story_id, project_root)
+
+    apply_files = _apply_files_enabled(apply_files)
+    candidates = _speculative_candidates(candidates)
+    if candidates > 1:
+        return await _run_in_thread(
+            _speculative_validate,
+            harness,
+            task_description,
+            relevant_files,
+            validation_cmd,
+            max_retries,
+            candidates,
+            apply_files,
+        )
+
+    loop = _FixLoop(agent_type, task_description, validation_cmd, max_retries)
+    while loop.next_attempt():
+        prompt = harness.prepare_context(loop.current_task, relevant_files, query=task_description)
+        result = await acall_llm(prompt, agent_type=agent_type, use_cache=False, cache_prefix=harness.cache_prefix)
+
+        try:
+            if apply_files:
+                await _run_in_thread(apply_file_blocks, extract_file_blocks(result), project_root)
+            cmd = loop.command()
+            run = await _run_in_thread(run_validation, cmd, project_root, on_line=_stream_validation_line)
+            full_cmd = loop.full_suite_command(run, cmd)
+            if full_cmd:
+                cmd = full_cmd
+                run = await _run_in_thread(run_validation, cmd, project_root, on_line=_stream_validation_line)
+
+            if run.passed:
                 logger.info("OK: Validação passou!")
                 return result
-            else:
-                logger.warning(f"ERRO: Validação falhou (Tentativa {attempt + 1})")
-                error_feedback = (
-                    f"A validação falhou com o seguinte erro:\n{process.stderr}\n{process.stdout}\n\n"
-                    "### 🧠 J-SPACE RECOVERY WORKSPACE (RCA & PATCH CIRÚRGICO)\n"
-                    "1. Analise o traceback e formule a causa-raiz exata.\n"
-                    "2. Delibere sobre efeitos colaterais da correção.\n"
-                    "3. Emita APENAS o patch cirúrgico necessário para resolver a falha sem adicionar complexidade."
-                )
-                current_task = f"{task_description}\n\n### FEEDBACK DE ERRO:\n{error_feedback}"
-                attempt += 1
+            if loop.record_failure(run, cmd):
+                loop.retry_cmd = await _run_in_thread(_retry_test_command, project_root, validation_cmd, relevant_files)
         except Exception as e:
             logger.error(f"Erro ao executar validação: {e}")
             break
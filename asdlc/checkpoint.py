@@ -0,0 +1,139 @@
+"""
+A-SDLC Framework - Checkpoint do Pipeline
+Persiste a saída e o digest das entradas de cada etapa em
+.asdlc/checkpoints/<story_key>/checkpoint.json. Ao reexecutar o implement, etapas
+cujas entradas (story, arquivos relevantes, template do prompt e persona do
+agente, digests e saídas das etapas anteriores) não mudaram são reaproveitadas sem chamar a LLM.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "checkpoint.json"
+# Fora de .asdlc/harness/, cujas pastas são rotacionadas por cleanup_old_harnesses
+CHECKPOINTS_DIR = "checkpoints"
+
+# Saídas que indicam falha (call_llm / validate_and_fix) e não devem ser reaproveitadas
+FAILURE_PREFIXES = ("ERRO", "MODO ANTIGRAVITY")
+FAILURE_MARKER = "Falha ao atingir conformidade"
+
+# O status da story muda durante a execução (In Progress/Done/Failed) e não é entrada das etapas
+_STATUS_LINE = re.compile(r'^status:\s*"[^"]*"\s*$', re.MULTILINE)
+
+
+def is_failure_output(output: str) -> bool:
+    """Se a saída de uma etapa é uma mensagem de falha (erro da LLM, modo antigravity, validação sem conformidade)."""
+    return output.startswith(FAILURE_PREFIXES) or FAILURE_MARKER in output
+
+
+def checkpoint_key(story_path: Path, ticket: str = "") -> str:
+    """Chave do checkpoint: ticket da story ou nome completo do arquivo (o prefixo de data se repete entre stories)."""
+    return re.sub(r"[^\w.-]", "_", ticket or story_path.stem)
+
+
+def story_state_dir(project_root: Path, story_key: str) -> Path:
+    """Pasta persistente da story (checkpoint e grafo de delegação), fora da rotação do harness."""
+    return project_root / ".asdlc" / CHECKPOINTS_DIR / re.sub(r"[^\w.-]", "_", story_key)
+
+
+def _file_digest(path: Path) -> str:
+    if not path.is_file():
+        return "missing"
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def story_digest(story_path: Path) -> str:
+    """Digest do arquivo da story, ignorando a linha de status do frontmatter."""
+    if not story_path.is_file():
+        return "missing"
+    content = _STATUS_LINE.sub("", story_path.read_text(encoding="utf-8"))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class CheckpointManifest:
+    """Manifesto de checkpoint de uma story (thread-safe: etapas podem terminar em paralelo)."""
+
+    def __init__(self, project_root: Path, story_key: str, story_path: Path, relevant_files: List[str]):
+        self.project_root = project_root
+        self.story_key = story_key
+        self.path = story_state_dir(project_root, story_key) / CHECKPOINT_FILE
+        self._story_digest = story_digest(story_path)
+        self._files_digest = hashlib.sha256(
+            "\n".join(f"{rel}:{_file_digest(project_root / rel)}" for rel in sorted(set(relevant_files))).encode("utf-8")
+        ).hexdigest()
+        self._lock = threading.Lock()
+        self.data: Dict[str, Any] = {"story_key": story_key, "stages": {}}
+        if self.path.exists():
+            try:
+                self.data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Checkpoint ilegível em {self.path}, ignorando: {e}")
+
+    def digest(self, stage, upstream_digests: Dict[str, str], upstream_outputs: Optional[Dict[str, str]] = None) -> str:
+        """
+        Digest das entradas da etapa, encadeado com os digests e as saídas das etapas
+        de entrada: se uma entrada foi refeita e mudou de saída, a etapa também é refeita.
+        """
+        upstream_outputs = upstream_outputs or {}
+        persona = self.project_root / ".asdlc" / "agents" / f"{stage.agent}_agent.md"
+        parts = [
+            self._story_digest,
+            self._files_digest if stage.use_relevant_files else "",
+            stage.agent,
+            stage.runner,
+            stage.task,
+            _file_digest(persona),
+            *(
+                f"{name}={upstream_digests[name]}:{_text_digest(upstream_outputs.get(name, ''))}"
+                for name in sorted(upstream_digests)
+            ),
+        ]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def lookup(self, stage_name: str, digest: str) -> Optional[str]:
+        """Saída salva da etapa, se o digest das entradas for o mesmo da execução anterior."""
+        with self._lock:
+            entry = self.data["stages"].get(stage_name)
+        if entry and entry.get("digest") == digest:
+            return entry.get("output", "")
+        return None
+
+    def record(self, stage_name: str, digest: str, output: str, elapsed_s: float) -> None:
+        """Salva a saída da etapa. Saídas de erro não viram checkpoint (a etapa é refeita)."""
+        if is_failure_output(output):
+            return
+        with self._lock:
+            self.data["stages"][stage_name] = {
+                "digest": digest,
+                "output": output,
+                "elapsed_s": elapsed_s,
+                "completed_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.data["stages"] = {}
+            self._save()
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self.data, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Erro ao salvar checkpoint: {e}")
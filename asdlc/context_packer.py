@@ -0,0 +1,189 @@
+"""
+A-SDLC Framework - Context Packer
+Empacota PROJECT_CONTEXT.md e arquivos relevantes dentro de um orçamento de
+tokens por tipo de agente, priorizando os trechos mais relevantes para a tarefa.
+
+Os arquivos são quebrados em trechos nas fronteiras de funções/classes (ou
+títulos Markdown), ranqueados por BM25 contra a tarefa e selecionados de forma
+gulosa até o orçamento. O que ficou de fora é reportado.
+"""
+
+import logging
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .token_accounting import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+# Orçamento de tokens (PROJECT_CONTEXT + arquivos) por tipo de agente.
+# Bem abaixo de CONTEXT_WARNING_THRESHOLD para sobrar espaço para persona, tarefa e resposta.
+CONTEXT_BUDGETS = {
+    "code": 24000,
+    "test": 16000,
+    "architecture": 16000,
+    "review": 12000,
+    "requirements": 8000,
+    "general": 12000,
+}
+
+# Trechos maiores que isso são quebrados em janelas de linhas
+MAX_CHUNK_LINES = 120
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Fronteiras de trechos por extensão (início de linha sem indentação)
+BOUNDARY_PATTERNS = {
+    ".py": re.compile(r"^(?:@|def |async def |class )"),
+    ".js": re.compile(r"^(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function|class|const|let)\b"),
+    ".ts": re.compile(r"^(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function|class|const|let|interface|type)\b"),
+    ".go": re.compile(r"^(?:func|type) "),
+    ".rs": re.compile(r"^(?:pub(?:\(crate\))?\s+)?(?:fn|struct|enum|impl|trait|mod)\b"),
+    ".md": re.compile(r"^#{1,3} "),
+}
+BOUNDARY_PATTERNS[".jsx"] = BOUNDARY_PATTERNS[".js"]
+BOUNDARY_PATTERNS[".tsx"] = BOUNDARY_PATTERNS[".ts"]
+for _ext in (".c", ".cpp", ".h", ".hpp", ".ino"):
+    BOUNDARY_PATTERNS[_ext] = re.compile(r"^[A-Za-z_][\w\s\*&:<>,]*\([^;]*$")
+
+_TERM_PATTERN = re.compile(r"[A-Za-z][a-z0-9]+|[A-Z]+(?![a-z])|\d+")
+
+
+@dataclass
+class Chunk:
+    path: str
+    start_line: int
+    text: str
+    tokens: int = 0
+    score: float = 0.0
+
+
+@dataclass
+class PackResult:
+    selected: List[Chunk] = field(default_factory=list)
+    dropped: List[Chunk] = field(default_factory=list)
+    budget: int = 0
+    used_tokens: int = 0
+
+    def _render_parts(self, path: str) -> List[Union[Chunk, str]]:
+        """Trechos selecionados do arquivo na ordem original, intercalados com os marcadores de lacuna."""
+        chunks = sorted((c for c in self.selected if c.path == path), key=lambda c: c.start_line)
+        parts: List[Union[Chunk, str]] = []
+        next_line = 1
+        for chunk in chunks:
+            if chunk.start_line > next_line:
+                parts.append(f"[... linhas {next_line}-{chunk.start_line - 1} omitidas ...]\n")
+            parts.append(chunk)
+            next_line = chunk.start_line + chunk.text.count("\n") + (0 if chunk.text.endswith("\n") else 1)
+        if any(c.path == path and c.start_line >= next_line for c in self.dropped):
+            parts.append(f"[... linhas a partir de {next_line} omitidas ...]\n")
+        return parts
+
+    def render(self, path: str) -> str:
+        """Remonta os trechos selecionados de um arquivo na ordem original, marcando lacunas."""
+        return "".join(part.text if isinstance(part, Chunk) else part for part in self._render_parts(path))
+
+    def rendered_tokens(self, path: str, model: Optional[str] = None) -> int:
+        """
+        Tokens de render(path) reaproveitando a contagem de cada trecho feita no
+        empacotamento: só os marcadores de lacuna são tokenizados.
+        """
+        return sum(part.tokens if isinstance(part, Chunk) else count_tokens(part, model) for part in self._render_parts(path))
+
+    def report(self) -> str:
+        """Resumo legível dos trechos descartados."""
+        if not self.dropped:
+            return f"Contexto completo: {self.used_tokens}/{self.budget} tokens."
+        lines = [f"Contexto empacotado: {self.used_tokens}/{self.budget} tokens, {len(self.dropped)} trechos descartados:"]
+        for chunk in sorted(self.dropped, key=lambda c: (c.path, c.start_line)):
+            lines.append(f"  - {chunk.path}:{chunk.start_line} ({chunk.tokens} tokens, score {chunk.score:.2f})")
+        return "\n".join(lines)
+
+
+def get_context_budget(agent_type: str) -> int:
+    """Orçamento do agente (ASDLC_CONTEXT_BUDGET_<AGENTE> ou ASDLC_CONTEXT_BUDGET sobrescrevem)."""
+    override = os.getenv(f"ASDLC_CONTEXT_BUDGET_{agent_type.upper()}") or os.getenv("ASDLC_CONTEXT_BUDGET")
+    if override:
+        return int(override)
+    return CONTEXT_BUDGETS.get(agent_type, CONTEXT_BUDGETS["general"])
+
+
+def tokenize_terms(text: str) -> List[str]:
+    """Termos para BM25: quebra snake_case/camelCase e normaliza para minúsculas."""
+    return [t.lower() for t in _TERM_PATTERN.findall(text) if len(t) > 1]
+
+
+def split_into_chunks(path: str, content: str) -> List[Chunk]:
+    """Quebra o conteúdo em trechos nas fronteiras de funções/classes (ou títulos Markdown)."""
+    lines = content.splitlines(keepends=True)
+    boundary = BOUNDARY_PATTERNS.get(Path(path).suffix.lower())
+
+    starts = [0]
+    if boundary:
+        for i in range(1, len(lines)):
+            # Uma definição logo após um decorator fica no trecho do decorator
+            if boundary.match(lines[i]) and not lines[i - 1].startswith("@"):
+                starts.append(i)
+    starts.append(len(lines))
+
+    chunks = []
+    for begin, end in zip(starts, starts[1:]):
+        for window in range(begin, end, MAX_CHUNK_LINES):
+            text = "".join(lines[window : min(window + MAX_CHUNK_LINES, end)])
+            if text.strip():
+                chunks.append(Chunk(path=path, start_line=window + 1, text=text))
+    return chunks
+
+
+def rank_chunks(chunks: List[Chunk], query: str) -> None:
+    """Atribui a cada trecho o score BM25 contra a consulta (tarefa)."""
+    query_terms = set(tokenize_terms(query))
+    if not chunks or not query_terms:
+        return
+
+    docs = [Counter(tokenize_terms(chunk.path + "\n" + chunk.text)) for chunk in chunks]
+    avg_len = sum(sum(d.values()) for d in docs) / len(docs) or 1.0
+    doc_freq = Counter(term for d in docs for term in query_terms if term in d)
+
+    for chunk, doc in zip(chunks, docs):
+        length = sum(doc.values())
+        score = 0.0
+        for term in query_terms:
+            tf = doc.get(term, 0)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+        chunk.score = score
+
+
+def pack_context(sources: Dict[str, str], query: str, budget: int, model: Optional[str] = None) -> PackResult:
+    """
+    Seleciona os trechos mais relevantes de sources ({caminho: conteúdo}) dentro do orçamento.
+
+    Os trechos são ranqueados por BM25 (empate: ordem original) e adicionados de
+    forma gulosa; um trecho que não cabe é descartado e o próximo é tentado.
+    """
+    chunks = [chunk for path, content in sources.items() for chunk in split_into_chunks(path, content)]
+    for chunk in chunks:
+        chunk.tokens = count_tokens(chunk.text, model)
+    rank_chunks(chunks, query)
+
+    result = PackResult(budget=budget)
+    for chunk in sorted(chunks, key=lambda c: -c.score):
+        if result.used_tokens + chunk.tokens <= budget:
+            result.selected.append(chunk)
+            result.used_tokens += chunk.tokens
+        else:
+            result.dropped.append(chunk)
+
+    if result.dropped:
+        logger.info(result.report())
+    return result
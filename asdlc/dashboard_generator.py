@@ -12,6 +12,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from .story_index import get_story_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -58,81 +60,29 @@ class DashboardParser:
         if not self.stories_dir.exists():
             return []
 
-        files = sorted(
-            f
-            for f in self.stories_dir.rglob("*.md")
-            if f.name != "MEMORY.md" and "templates" not in f.parts and not f.name.endswith("template.md")
-        )
-
         stories = []
-        for f in files:
-            story = self._parse_file(f)
-            if story:
-                stories.append(story)
-        return stories
-
-    def _parse_file(self, filepath: Path) -> Optional[StoryData]:
-        try:
-            content = filepath.read_text(encoding="utf-8")
-            fm = self._parse_frontmatter(content)
-            if not fm:
-                return None
-
-            ticket = fm.get("ticket", "")
-            tasks_done = len(re.findall(r"- \[x\]", content, re.IGNORECASE))
-            tasks_open = len(re.findall(r"- \[ \]", content))
-            has_tests = bool(re.search(r"(critérios de aceitação|criteria|aceitação)", content, re.IGNORECASE))
-            labels = re.findall(r'"([^"]+)"', fm.get("labels", "[]"))
-            depends_on = re.findall(r'"([^"]+)"', fm.get("depends_on", "[]"))
-
-            return StoryData(
-                ticket=ticket,
-                title=fm.get("title", filepath.stem),
-                status=fm.get("status", "PENDENTE"),
-                priority=fm.get("priority", "Medium"),
-                labels=labels,
-                depends_on=depends_on,
-                date=self._extract_date(ticket),
-                tasks_total=tasks_done + tasks_open,
-                tasks_done=tasks_done,
-                has_tests=has_tests,
-                file_size=filepath.stat().st_size,
-                file_path=str(filepath.relative_to(self.project_root)),
+        for entry in get_story_index(self.project_root).entries(folder=None):
+            if entry.name == "MEMORY.md" or "templates" in entry.path.split("/") or entry.name.endswith("template.md"):
+                continue
+            if not entry.has_frontmatter:
+                continue
+            stories.append(
+                StoryData(
+                    ticket=entry.ticket,
+                    title=entry.title or entry.stem,
+                    status=entry.status or "PENDENTE",
+                    priority=entry.priority or "Medium",
+                    labels=entry.labels,
+                    depends_on=entry.depends_on,
+                    date=self._extract_date(entry.ticket),
+                    tasks_total=entry.tasks_total,
+                    tasks_done=entry.tasks_done,
+                    has_tests=entry.has_criteria,
+                    file_size=entry.size,
+                    file_path=entry.path,
+                )
             )
-        except Exception as e:
-            logger.warning(f"Erro ao processar story {filepath}: {e}")
-            return None
-
-    @staticmethod
-    def _parse_frontmatter(content: str) -> Optional[Dict[str, str]]:
-        if not content.startswith("---"):
-            return None
-        parts = content.split("---", 2)
-        if len(parts) < 3:
-            return None
-
-        try:
-            import yaml
-
-            data = yaml.safe_load(parts[1])
-            if isinstance(data, dict):
-                normalized = {}
-                for k, v in data.items():
-                    if isinstance(v, list):
-                        normalized[k] = str(v).replace("'", '"')
-                    else:
-                        normalized[k] = str(v)
-                return normalized
-        except Exception as e:
-            logger.warning(f"Falha ao usar PyYAML no frontmatter: {e}. Usando fallback manual.")
-
-        # Fallback manual
-        fm: Dict[str, str] = {}
-        for line in parts[1].strip().split("\n"):
-            if ":" in line:
-                key, val = line.split(":", 1)
-                fm[key.strip()] = val.strip().strip('"').strip("'")
-        return fm
+        return stories
 
     @staticmethod
     def _extract_date(ticket: str) -> Optional[str]:
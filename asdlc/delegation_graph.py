@@ -0,0 +1,227 @@
+"""
+A-SDLC Framework - Delegation Graph
+Grafo de delegações ([DELEGATE: ...]) por story: limita profundidade e fan-out,
+deduplica subtarefas idênticas (cada uma é computada uma única vez) e persiste
+o grafo em .asdlc/checkpoints/<ticket>/ para auditoria e atribuição de custo.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .checkpoint import story_state_dir
+
+logger = logging.getLogger(__name__)
+
+DELEGATION_GRAPH_FILE = "delegation_graph.json"
+DEFAULT_MAX_DEPTH = 3
+DEFAULT_MAX_FANOUT = 4
+
+# Resultado de claim(): computar o nó, aguardar o resultado de outro agente ou pular
+CLAIM_COMPUTE = "compute"
+CLAIM_WAIT = "wait"
+CLAIM_SKIP = "skip"
+
+
+def normalize_task(task: str) -> str:
+    """Normaliza a descrição da subtarefa para deduplicação (caixa, espaços e pontuação final)."""
+    return re.sub(r"\s+", " ", task).strip().rstrip(".!;:").lower()
+
+
+def files_digest(project_root: Path, relevant_files: List[str]) -> str:
+    """Digest dos arquivos relevantes (caminho, tamanho e mtime): muda quando algum arquivo muda."""
+    digest = hashlib.sha256()
+    for rel_path in sorted(set(relevant_files)):
+        path = project_root / rel_path
+        stat = path.stat() if path.is_file() else None
+        digest.update(f"{rel_path}:{stat.st_size if stat else -1}:{stat.st_mtime_ns if stat else -1}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class DelegationGraph:
+    """
+    Grafo de delegações de uma story.
+
+    Cada nó é identificado por (agent_type, tarefa normalizada, digest dos
+    arquivos). Uma aresta pai → filho só é criada se não fechar um ciclo, então
+    aguardar o resultado de um nó em execução nunca gera deadlock.
+    """
+
+    def __init__(self, story_id: str, project_root: Path, max_depth: int, max_fanout: int):
+        self.story_id = story_id
+        self.project_root = project_root
+        self.max_depth = max_depth
+        self.max_fanout = max_fanout
+        # Fora de .asdlc/harness/, cujas pastas são rotacionadas por cleanup_old_harnesses
+        self.path = story_state_dir(project_root, story_id) / DELEGATION_GRAPH_FILE
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.edges: List[Dict[str, str]] = []
+        self._children: Dict[str, List[str]] = {}
+        self._futures: Dict[str, Future] = {}
+        self._active_sessions = 0
+        self._lock = threading.RLock()
+
+    def node_key(self, agent_type: str, task: str, relevant_files: List[str]) -> str:
+        raw = f"{agent_type}\n{normalize_task(task)}\n{files_digest(self.project_root, relevant_files)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    @contextmanager
+    def session(self):
+        """
+        Delimita uma execução de topo. O memo só vale enquanto houver execuções
+        ativas: um processo longo (ex: servidor MCP) não serve resultados antigos.
+        """
+        with self._lock:
+            if self._active_sessions == 0:
+                self.nodes.clear()
+                self.edges.clear()
+                self._children.clear()
+                self._futures.clear()
+            self._active_sessions += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._active_sessions -= 1
+            self.save()
+
+    def _reaches(self, source: str, target: str) -> bool:
+        stack, seen = [source], set()
+        while stack:
+            key = stack.pop()
+            if key == target:
+                return True
+            if key not in seen:
+                seen.add(key)
+                stack.extend(self._children.get(key, []))
+        return False
+
+    def claim(
+        self, agent_type: str, task: str, relevant_files: List[str], parent: Optional[str] = None
+    ) -> Tuple[str, str, Any]:
+        """
+        Registra a (sub)tarefa no grafo e decide o que fazer com ela.
+
+        Returns:
+            Tuple[str, str, Any]: (chave do nó, ação, dado), onde a ação é
+            CLAIM_COMPUTE (dado None), CLAIM_WAIT (dado é o Future do resultado)
+            ou CLAIM_SKIP (dado é a nota a inserir no lugar do resultado)
+        """
+        key = self.node_key(agent_type, task, relevant_files)
+        with self._lock:
+            depth = self.nodes[parent]["depth"] + 1 if parent in self.nodes else 0
+            if depth > self.max_depth:
+                self._add_edge(parent, key, "depth_limit")
+                return key, CLAIM_SKIP, f"[DELEGAÇÃO NÃO EXECUTADA: profundidade máxima ({self.max_depth}) atingida]"
+
+            if key in self.nodes and parent and self._reaches(key, parent):
+                self._add_edge(parent, key, "cycle")
+                logger.warning(f"Ciclo de delegação detectado: {agent_type} -> '{task[:60]}' já está na cadeia.")
+                return key, CLAIM_SKIP, f"[DELEGAÇÃO NÃO EXECUTADA: ciclo detectado ({agent_type} já está na cadeia)]"
+
+            if key in self.nodes:
+                self.nodes[key]["memo_hits"] += 1
+                self._add_edge(parent, key, "memo")
+                return key, CLAIM_WAIT, self._futures[key]
+
+            self.nodes[key] = {
+                "id": key,
+                "agent_type": agent_type,
+                "task": task,
+                "relevant_files": list(relevant_files),
+                "depth": depth,
+                "parent": parent,
+                "status": "running",
+                "memo_hits": 0,
+                "llm_calls": 0,
+                "prompt_tokens": 0,
+                "result_chars": 0,
+                "elapsed_s": 0.0,
+                "started_at": time.time(),
+            }
+            self._futures[key] = Future()
+            self._add_edge(parent, key, "delegate")
+            return key, CLAIM_COMPUTE, None
+
+    def _add_edge(self, parent: Optional[str], child: str, kind: str) -> None:
+        if parent is None:
+            return
+        self.edges.append({"from": parent, "to": child, "kind": kind})
+        if kind in ("delegate", "memo"):
+            self._children.setdefault(parent, []).append(child)
+
+    def annotate(self, key: str, **fields: Any) -> None:
+        """Acrescenta dados de custo ao nó (ex: llm_calls, prompt_tokens)."""
+        with self._lock:
+            if key in self.nodes:
+                self.nodes[key].update(fields)
+
+    def complete(self, key: str, result: str) -> None:
+        with self._lock:
+            node = self.nodes[key]
+            node["status"] = "error" if result.startswith("ERRO") else "done"
+            node["result_chars"] = len(result)
+            node["elapsed_s"] = round(time.time() - node["started_at"], 3)
+            future = self._futures[key]
+        future.set_result(result)
+        self.save()
+
+    def fail(self, key: str, error: BaseException) -> None:
+        with self._lock:
+            self.nodes[key]["status"] = "error"
+            future = self._futures[key]
+        future.set_exception(error)
+        self.save()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "story_id": self.story_id,
+                "max_depth": self.max_depth,
+                "max_fanout": self.max_fanout,
+                "nodes": [dict(node) for node in self.nodes.values()],
+                "edges": list(self.edges),
+            }
+
+    def save(self) -> None:
+        """Persiste o grafo em .asdlc/checkpoints/<story_id>/delegation_graph.json."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Erro ao salvar grafo de delegação: {e}")
+
+
+_graphs: Dict[Tuple[str, str], DelegationGraph] = {}
+_graphs_lock = threading.Lock()
+
+
+def get_delegation_graph(story_id: str, project_root: Path) -> DelegationGraph:
+    """Grafo de delegações da story (limites via ASDLC_DELEGATION_MAX_DEPTH / _MAX_FANOUT)."""
+    key = (str(project_root), story_id)
+    with _graphs_lock:
+        graph = _graphs.get(key)
+        if graph is None:
+            graph = DelegationGraph(
+                story_id,
+                project_root,
+                max_depth=int(os.getenv("ASDLC_DELEGATION_MAX_DEPTH", str(DEFAULT_MAX_DEPTH))),
+                max_fanout=int(os.getenv("ASDLC_DELEGATION_MAX_FANOUT", str(DEFAULT_MAX_FANOUT))),
+            )
+            _graphs[key] = graph
+        return graph
+
+
+def reset_delegation_graphs() -> None:
+    with _graphs_lock:
+        _graphs.clear()
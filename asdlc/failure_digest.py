@@ -0,0 +1,309 @@
+"""
+A-SDLC Framework - Digest de Falhas
+Extrai da saída de pytest, unittest, jest, go test e cargo test um resumo
+compacto das falhas (ids dos testes, mensagens de asserção e os frames mais
+internos do próprio projeto) para usar como feedback dos retries no lugar da
+saída bruta.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from .token_accounting import count_tokens
+
+logger = logging.getLogger(__name__)
+
+MAX_FAILURES = 10
+MAX_MESSAGE_LINES = 6
+MAX_FRAMES = 3
+
+# Frames fora do projeto (bibliotecas, runtime)
+_EXTERNAL_FRAME = re.compile(
+    r"site-packages|dist-packages|node_modules|/lib/python|\.cargo/registry|/rustc/|/usr/(?:local/)?go/"
+)
+
+
+@dataclass
+class FailedTest:
+    test_id: str
+    message: List[str] = field(default_factory=list)
+    frames: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FailureDigest:
+    framework: str
+    failures: List[FailedTest]
+    summary: str = ""
+
+    def render(self) -> str:
+        lines = [f"{len(self.failures)} teste(s) falhando ({self.framework})" + (f" — {self.summary}" if self.summary else "")]
+        for failure in self.failures[:MAX_FAILURES]:
+            lines.append(f"- {failure.test_id}")
+            for message in failure.message[:MAX_MESSAGE_LINES]:
+                lines.append(f"    {message}")
+            for frame in failure.frames[-MAX_FRAMES:]:
+                lines.append(f"    @ {frame}")
+        if len(self.failures) > MAX_FAILURES:
+            lines.append(f"- ... e mais {len(self.failures) - MAX_FAILURES} falhas")
+        return "\n".join(lines)
+
+
+def _local(frame: str) -> bool:
+    return not _EXTERNAL_FRAME.search(frame)
+
+
+def _add_message(failure: FailedTest, line: str) -> None:
+    line = line.strip()
+    if line and line not in failure.message:
+        failure.message.append(line)
+
+
+# --- pytest -----------------------------------------------------------------
+
+_PYTEST_SECTION = re.compile(r"^_{3,} (.+?) _{3,}$")
+_PYTEST_FRAME = re.compile(r"^([^\s:][^:]*\.py):(\d+):\s*(.*)$")
+_PYTEST_SUMMARY_LINE = re.compile(r"^(FAILED|ERROR) (\S+::\S+|\S+\.py)(?: - (.*))?$")
+_PYTEST_TOTALS = re.compile(r"^=*\s*(\d.*(?:failed|error).*) in [\d.]+s")
+
+
+def parse_pytest(output: str) -> Optional[FailureDigest]:
+    failures: List[FailedTest] = []
+    by_name = {}
+    current: Optional[FailedTest] = None
+    in_failures = False
+    summary = ""
+    for line in output.splitlines():
+        if re.match(r"^=+ (FAILURES|ERRORS) =+$", line):
+            in_failures = True
+            continue
+        if line.startswith("=") and in_failures and not _PYTEST_SECTION.match(line):
+            in_failures = False
+        totals = _PYTEST_TOTALS.match(line)
+        if totals:
+            summary = totals.group(1)
+        if in_failures:
+            section = _PYTEST_SECTION.match(line)
+            if section:
+                current = FailedTest(section.group(1))
+                failures.append(current)
+                by_name[current.test_id] = current
+            elif current is not None:
+                if line.startswith("E "):
+                    _add_message(current, line[1:])
+                else:
+                    frame = _PYTEST_FRAME.match(line)
+                    if frame and _local(frame.group(1)):
+                        location = f"{frame.group(1)}:{frame.group(2)}"
+                        current.frames.append(f"{location} ({frame.group(3)})" if frame.group(3) else location)
+            continue
+        summary_line = _PYTEST_SUMMARY_LINE.match(line)
+        if summary_line:
+            node_id, message = summary_line.group(2), summary_line.group(3)
+            # A seção usa o nome curto (Classe.teste); o resumo traz o node id completo
+            short = node_id.split("::", 1)[-1].replace("::", ".")
+            failure = by_name.get(short)
+            if failure is None:
+                failure = FailedTest(node_id)
+                failures.append(failure)
+            else:
+                failure.test_id = node_id
+            if message and not failure.message:
+                _add_message(failure, message)
+    if not failures:
+        return None
+    return FailureDigest("pytest", failures, summary)
+
+
+# --- unittest / traceback Python ---------------------------------------------
+
+_UNITTEST_HEADER = re.compile(r"^(FAIL|ERROR): (\S+) \((.+)\)")
+_PY_FRAME = re.compile(r'^\s*File "([^"]+)", line (\d+), in (.+)$')
+
+
+def parse_unittest(output: str) -> Optional[FailureDigest]:
+    failures: List[FailedTest] = []
+    current: Optional[FailedTest] = None
+    summary = ""
+    for line in output.splitlines():
+        header = _UNITTEST_HEADER.match(line)
+        if header:
+            # Python >= 3.11 já inclui o método no parêntese: "test_a (pkg.mod.Classe.test_a)"
+            qualified = header.group(3).split()[0]
+            test_id = qualified if qualified.endswith(f".{header.group(2)}") else f"{qualified}.{header.group(2)}"
+            current = FailedTest(test_id)
+            failures.append(current)
+            continue
+        if line.startswith("FAILED (") or line.startswith("Ran "):
+            summary = (summary + " " + line.strip()).strip()
+            current = None
+            continue
+        if current is None or line.startswith(("-----", "=====")):
+            continue
+        frame = _PY_FRAME.match(line)
+        if frame:
+            if _local(frame.group(1)):
+                current.frames.append(f"{frame.group(1)}:{frame.group(2)} ({frame.group(3)})")
+        elif re.match(r"^\w*(Error|Exception|Exit)\b", line):
+            _add_message(current, line)
+    if not failures:
+        return None
+    return FailureDigest("unittest", failures, summary)
+
+
+# --- jest -------------------------------------------------------------------
+
+_JEST_HEADER = re.compile(r"^\s*● (.+)$")
+_JEST_FRAME = re.compile(r"^\s*at .*?\(?([^\s()]+:\d+:\d+)\)?$")
+_JEST_TOTALS = re.compile(r"^Tests:\s+(.*failed.*)$")
+
+
+def parse_jest(output: str) -> Optional[FailureDigest]:
+    failures: List[FailedTest] = []
+    current: Optional[FailedTest] = None
+    summary = ""
+    for line in output.splitlines():
+        totals = _JEST_TOTALS.match(line)
+        if totals:
+            summary = totals.group(1)
+            current = None
+            continue
+        header = _JEST_HEADER.match(line)
+        if header and "Console" not in header.group(1):
+            current = FailedTest(header.group(1).strip())
+            failures.append(current)
+            continue
+        if current is None:
+            continue
+        frame = _JEST_FRAME.match(line)
+        if frame:
+            if _local(frame.group(1)):
+                current.frames.append(frame.group(1))
+        elif line.strip() and not re.match(r"^\s*(>?\s*\d+ \||\|)", line) and not current.frames:
+            # Linhas de mensagem (antes da pilha), ignorando o trecho de código anotado
+            _add_message(current, line)
+    if not failures:
+        return None
+    # A pilha do jest vem do mais interno para o mais externo
+    for failure in failures:
+        failure.frames.reverse()
+    return FailureDigest("jest", failures, summary)
+
+
+# --- go test ----------------------------------------------------------------
+
+_GO_FAIL = re.compile(r"^\s*--- FAIL: (\S+)")
+_GO_MESSAGE = re.compile(r"^\s+([\w./-]+_test\.go:\d+): (.*)$")
+
+
+def parse_go(output: str) -> Optional[FailureDigest]:
+    failures: List[FailedTest] = []
+    current: Optional[FailedTest] = None
+    pending: List[tuple] = []
+    summary = ""
+    for line in output.splitlines():
+        fail = _GO_FAIL.match(line)
+        if fail:
+            current = FailedTest(fail.group(1))
+            failures.append(current)
+            # go test imprime as mensagens (t.Errorf) antes ou depois do "--- FAIL" conforme -v
+            for frame, message in pending:
+                current.frames.append(frame)
+                _add_message(current, message)
+            pending = []
+            continue
+        message = _GO_MESSAGE.match(line)
+        if message:
+            if current is not None:
+                current.frames.append(message.group(1))
+                _add_message(current, message.group(2))
+            else:
+                pending.append((message.group(1), message.group(2)))
+        elif line.startswith(("FAIL\t", "ok  \t")):
+            summary = (summary + "; " + line.replace("\t", " ")).strip("; ")
+            current = None
+        elif line.lstrip().startswith(("=== RUN", "--- PASS", "--- SKIP")):
+            # Logs de testes que passaram não pertencem à próxima falha
+            current = None
+            pending = []
+    if not failures:
+        return None
+    return FailureDigest("go", failures, summary)
+
+
+# --- cargo test -------------------------------------------------------------
+
+_CARGO_SECTION = re.compile(r"^---- (\S+) stdout ----$")
+_CARGO_PANIC = re.compile(r"panicked at (?:'(.*)', )?([^\s:]+:\d+:\d+):?$")
+_CARGO_TOTALS = re.compile(r"^test result: FAILED\. (.*)$")
+
+
+def parse_cargo(output: str) -> Optional[FailureDigest]:
+    failures: List[FailedTest] = []
+    current: Optional[FailedTest] = None
+    summary = ""
+    for line in output.splitlines():
+        section = _CARGO_SECTION.match(line)
+        if section:
+            current = FailedTest(section.group(1))
+            failures.append(current)
+            continue
+        totals = _CARGO_TOTALS.match(line)
+        if totals:
+            summary = totals.group(1)
+            continue
+        if current is None:
+            continue
+        if line.startswith(("failures:", "note: run with")):
+            current = None
+            continue
+        panic = _CARGO_PANIC.search(line)
+        if panic:
+            current.frames.append(panic.group(2))
+            if panic.group(1):
+                _add_message(current, panic.group(1))
+        elif line.strip():
+            _add_message(current, line)
+    if not failures:
+        return None
+    return FailureDigest("cargo", failures, summary)
+
+
+PARSERS: List[Callable[[str], Optional[FailureDigest]]] = [parse_pytest, parse_jest, parse_go, parse_cargo, parse_unittest]
+
+
+def build_failure_digest(stdout: str, stderr: str, command: str = "") -> Optional[FailureDigest]:
+    """
+    Digest das falhas da validação. O parser do comando é tentado primeiro;
+    depois os demais, na ordem de PARSERS.
+
+    Returns:
+        Optional[FailureDigest]: None se nenhum parser reconhecer a saída
+    """
+    output = f"{stdout}\n{stderr}"
+    preferred = {"pytest": parse_pytest, "jest": parse_jest, "vitest": parse_jest, "go test": parse_go, "cargo": parse_cargo}
+    parsers = [parser for key, parser in preferred.items() if key in command] + PARSERS
+    for parser in parsers:
+        try:
+            digest = parser(output)
+        except Exception as e:
+            logger.debug(f"Parser {parser.__name__} falhou: {e}")
+            continue
+        if digest:
+            return digest
+    return None
+
+
+def digest_feedback(stdout: str, stderr: str, command: str = "") -> Optional[str]:
+    """Feedback compacto das falhas, com o custo em tokens comparado à saída bruta (registrado no log)."""
+    digest = build_failure_digest(stdout, stderr, command)
+    if digest is None:
+        return None
+    rendered = digest.render()
+    logger.info(
+        f"Digest de falhas ({digest.framework}): {len(digest.failures)} falhas, "
+        f"{count_tokens(rendered)} tokens (saída bruta: {count_tokens(stdout + stderr)} tokens)."
+    )
+    return rendered
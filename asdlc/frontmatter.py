@@ -0,0 +1,213 @@
+"""
+A-SDLC Framework - Frontmatter
+Parser único do cabeçalho '---' de stories e épicos, usado por todos os
+subsistemas (story_manager, índice de stories, dashboard, validador).
+
+Os cabeçalhos que o framework gera são planos ('chave: "valor"' e listas em
+linha) e são lidos por um caminho rápido com padrões pré-compilados; qualquer
+outra construção (listas em bloco, aspas simples, multilinha) cai no
+yaml.CSafeLoader (libyaml) quando disponível. labels e depends_on sempre
+voltam como listas.
+
+O cabeçalho é lido linha a linha até o delimitador de fechamento, sem carregar
+o corpo do arquivo (planos gerados costumam ter dezenas de KB). O offset em
+bytes do início do corpo permite lê-lo depois, só quando necessário.
+
+Microbenchmark (custo por arquivo): python -m asdlc.frontmatter [arquivos...]
+"""
+
+import io
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+
+FRONTMATTER_DELIMITER = "---"
+# Cabeçalho sem fechamento dentro deste limite é tratado como ausente
+MAX_FRONTMATTER_LINES = 200
+# Campos sempre devolvidos como List[str]
+LIST_FIELDS = ("labels", "depends_on")
+
+_SAFE_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Linha plana: chave: "valor" | chave: [lista, em, linha] | chave: valor simples | chave:
+_FLAT_LINE = re.compile(r"""^([\w-]+):[ \t]*(?:"([^"\\]*)"|(\[[^\]]*\])|([^\s"'\[{|>&*!%@`#][^#]*?)|)[ \t]*$""")
+_QUOTED_ITEM = re.compile(r'"([^"]+)"')
+
+
+@dataclass
+class Frontmatter:
+    fields: Dict[str, Any] = field(default_factory=dict)
+    raw: str = ""  # texto entre os delimitadores
+    body_offset: int = 0  # byte onde começa o corpo (após o '---' de fechamento)
+
+
+def parse_list_value(value: str) -> List[str]:
+    """Lista do frontmatter em linha: ["A", "B"], [A, B] ou vazio."""
+    if not value:
+        return []
+    quoted = _QUOTED_ITEM.findall(value)
+    if quoted:
+        return quoted
+    return [item.strip().strip("'") for item in value.strip("[]").split(",") if item.strip()]
+
+
+def _parse_flat(text: str) -> Optional[Dict[str, Any]]:
+    """Caminho rápido: None se alguma linha não for 'chave: valor' plano."""
+    fields: Dict[str, Any] = {}
+    for line in text.split("\n"):
+        if not line or line.isspace() or line.startswith("#"):
+            continue
+        match = _FLAT_LINE.match(line)
+        if not match:
+            return None
+        key, quoted, flow_list, plain = match.groups()
+        if flow_list is not None:
+            fields[key] = parse_list_value(flow_list) if key in LIST_FIELDS else flow_list
+        else:
+            fields[key] = quoted if quoted is not None else (plain or "")
+    return fields
+
+
+def _scalar(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+
+def _parse_yaml(text: str) -> Optional[Dict[str, Any]]:
+    try:
+        data = yaml.load(text, Loader=_SAFE_LOADER)
+    except yaml.YAMLError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    fields: Dict[str, Any] = {}
+    for key, value in data.items():
+        if str(key) in LIST_FIELDS and isinstance(value, list):
+            fields[str(key)] = [_scalar(item) for item in value if item is not None]
+        else:
+            fields[str(key)] = _scalar(value)
+    return fields
+
+
+def _parse_lenient(text: str) -> Dict[str, Any]:
+    """Último recurso (YAML inválido, ex: 'title: Fix: bug'): 'chave: valor' e listas em bloco simples."""
+    fields: Dict[str, Any] = {}
+    current_key = None
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith("- ") and current_key:
+            items = fields.get(current_key)
+            if not isinstance(items, list):
+                items = fields[current_key] = []
+            items.append(stripped[2:].strip().strip('"').strip("'"))
+        elif ":" in line:
+            key, value = line.split(":", 1)
+            current_key = key.strip()
+            fields[current_key] = value.strip().strip('"')
+    return fields
+
+
+def parse_frontmatter_fields(text: str) -> Dict[str, Any]:
+    """
+    Campos do frontmatter (texto entre os delimitadores). Valores são strings,
+    exceto labels e depends_on (List[str]).
+    """
+    fields = _parse_flat(text)
+    if fields is None:
+        fields = _parse_yaml(text)
+    if fields is None:
+        fields = _parse_lenient(text)
+    for key in LIST_FIELDS:
+        value = fields.get(key)
+        if isinstance(value, str):
+            fields[key] = parse_list_value(value)
+    return fields
+
+
+def _read_header(readline: Callable[[], bytes], max_lines: int) -> Optional[Frontmatter]:
+    first = readline()
+    if first.decode("utf-8", errors="ignore").strip() != FRONTMATTER_DELIMITER:
+        return None
+    offset = len(first)
+    lines = []
+    for _ in range(max_lines):
+        line = readline()
+        if not line:
+            return None
+        offset += len(line)
+        text = line.decode("utf-8", errors="ignore").rstrip("\r\n")
+        if text.strip() == FRONTMATTER_DELIMITER:
+            raw = "\n".join(lines)
+            return Frontmatter(fields=parse_frontmatter_fields(raw), raw=raw, body_offset=offset)
+        lines.append(text)
+    return None
+
+
+def read_frontmatter(path: Path, max_lines: int = MAX_FRONTMATTER_LINES) -> Optional[Frontmatter]:
+    """
+    Lê o frontmatter do arquivo até o segundo '---'.
+
+    Returns:
+        Optional[Frontmatter]: None se o arquivo não começa com '---' ou o
+        cabeçalho não fecha em max_lines linhas
+    """
+    with open(path, "rb") as f:
+        return _read_header(f.readline, max_lines)
+
+
+def split_frontmatter(data: bytes, max_lines: int = MAX_FRONTMATTER_LINES) -> Optional[Frontmatter]:
+    """Como read_frontmatter, para o conteúdo já lido (quem também precisa do corpo lê o arquivo uma vez só)."""
+    return _read_header(io.BytesIO(data).readline, max_lines)
+
+
+def read_body(path: Path, offset: int = 0) -> str:
+    """Corpo do arquivo a partir do offset (ex: Frontmatter.body_offset)."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read().decode("utf-8", errors="ignore")
+
+
+def benchmark(paths: List[Path], repeat: int = 200) -> Dict[str, float]:
+    """
+    Custo médio por arquivo, em microssegundos: leitura do cabeçalho
+    (read_frontmatter), parse pelo caminho rápido e parse só com o loader YAML.
+    """
+    headers = [header.raw for header in (read_frontmatter(path) for path in paths) if header]
+    if not headers:
+        return {}
+
+    def per_file(func, items) -> float:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for item in items:
+                func(item)
+        return round((time.perf_counter() - started) / (repeat * len(items)) * 1e6, 2)
+
+    return {
+        "files": len(headers),
+        "read_frontmatter_us": per_file(read_frontmatter, paths),
+        "parse_us": per_file(parse_frontmatter_fields, headers),
+        "yaml_us": per_file(_parse_yaml, headers),
+        "fast_path_hits": sum(1 for raw in headers if _parse_flat(raw) is not None),
+    }
+
+
+if __name__ == "__main__":
+    targets = [Path(arg) for arg in sys.argv[1:]] or sorted(Path("stories").rglob("*.md"))
+    print(f"Loader YAML: {_SAFE_LOADER.__name__}")
+    for name, value in benchmark(targets).items():
+        print(f"{name}: {value}")
@@ -2,19 +2,185 @@
 """
 Módulo cliente para interação com APIs de LLM (OpenAI e OpenRouter).
 Suporta roteamento de modelos por tipo de agente.
+
+Os clientes são mantidos em um registro por processo (provedor + base URL),
+reaproveitando o pool de conexões HTTP keep-alive entre chamadas. O .env só é
+recarregado quando seu mtime muda.
+
+Há também uma variante assíncrona (acall_llm) com concorrência limitada por
+provedor.
+
+Cada modelo tem um rate limiter local (requisições/min e tokens/min) que
+enfileira chamadores em vez de falhar; erros 429/5xx são refeitos com backoff
+exponencial com jitter, respeitando o Retry-After do provedor.
+
+No modo hedge (ASDLC_LLM_HEDGE=true), se o modelo primário não emitir o
+primeiro token dentro de um percentil da sua latência histórica, um modelo de
+reserva (MODEL_<AGENTE>_FALLBACK) é disparado e a primeira resposta vence.
+
+Um circuit breaker por provedor/modelo abre quando a taxa de falhas recentes
+passa do limite: enquanto aberto, as chamadas falham rápido ou fazem failover
+para a chave OpenAI. Estado visível em get_llm_metrics().
+
+Respostas podem ser cacheadas em disco (.asdlc/cache/llm/) com chave derivada
+do conteúdo da requisição (ASDLC_CACHE_ENABLED=true).
 """
 
 import os
+import json
+import asyncio
+import time
+import random
+import re
+import hashlib
 import logging
-from openai import OpenAI
-from dotenv import load_dotenv
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from openai import APIConnectionError, AsyncOpenAI, OpenAI
+from dotenv import find_dotenv, load_dotenv
+from .utils import find_project_root
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx acompanha o SDK da OpenAI
+    httpx = None
 
 logger = logging.getLogger(__name__)
 
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+OPENAI_BASE_URL = "https://api.openai.com/v1"
 
-def get_llm_client():
-    """Carrega as chaves e retorna o cliente adequado (OpenRouter ou OpenAI)."""
-    load_dotenv(override=True)
+# Padrões de pool/timeout (sobrescrevíveis via .env)
+DEFAULT_POOL_SIZE = 10
+DEFAULT_KEEPALIVE = 5
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Padrões do cache de respostas
+DEFAULT_CACHE_MAX_MB = 50
+DEFAULT_CACHE_TTL_HOURS = 24 * 7
+
+# Padrões de rate limit e backoff (0 = sem limite local)
+DEFAULT_RPM = 0
+DEFAULT_TPM = 0
+DEFAULT_MAX_RETRIES = 4
+
+# Padrões de hedging (requisição de reserva quando o primário demora)
+DEFAULT_HEDGE_DELAY = 10.0
+DEFAULT_HEDGE_PERCENTILE = 95.0
+HEDGE_MIN_SAMPLES = 5
+
+# Padrões do circuit breaker por provedor/modelo
+DEFAULT_CB_WINDOW = 20
+DEFAULT_CB_MIN_CALLS = 5
+DEFAULT_CB_FAILURE_RATE = 0.5
+DEFAULT_CB_RESET_SECONDS = 30.0
+DEFAULT_FAILOVER_MODEL = "gpt-4.1-mini"
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_CAP = 60.0
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+CHARS_PER_TOKEN_ESTIMATE = 4
+
+# Variável de ambiente que define o modelo de cada tipo de agente
+AGENT_MODEL_ENV = {
+    "code": "MODEL_CODE",
+    "architecture": "MODEL_ARCH",
+    "test": "MODEL_TEST",
+    "requirements": "MODEL_REQ",
+    "review": "MODEL_REVIEW",
+    "general": "OPENAI_MODEL",
+}
+
+# Registro de clientes: (provedor, base_url) -> (fingerprint da configuração, cliente)
+_client_registry: Dict[Tuple[str, str], Tuple[Tuple[Any, ...], OpenAI]] = {}
+_registry_lock = threading.Lock()
+# Clientes substituídos por mudança de configuração: outras threads podem estar usando-os,
+# então não são fechados na troca, só em reset_llm_clients
+_retired_clients: List[OpenAI] = []
+
+# Clientes assíncronos e semáforos são vinculados ao event loop em que foram criados
+_async_client_registry: Dict[Tuple[str, str, int], Tuple[asyncio.AbstractEventLoop, Tuple[Any, ...], AsyncOpenAI]] = {}
+_provider_semaphores: Dict[Tuple[str, int], Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+
+# Limitadores por (modelo, rpm, tpm): agentes com limites próprios (MODEL_<AGENTE>_RPM/TPM)
+# têm baldes separados; os demais agentes do mesmo modelo compartilham o limitador
+_rate_limiters: Dict[Tuple[str, float, float], "ModelRateLimiter"] = {}
+
+# Circuit breakers por "provedor:modelo"
+_circuit_breakers: Dict[str, "CircuitBreaker"] = {}
+
+# Histogramas de latência por modelo: {"ttft": ..., "total": ...}
+_latency_histograms: Dict[str, Dict[str, "LatencyHistogram"]] = {}
+
+# Event loop em thread dedicada para executar corrotinas a partir de código síncrono
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Estado do .env carregado (caminho e mtime) para recarga apenas quando mudar
+_env_state: Dict[str, Any] = {"path": None, "mtime": None}
+_env_lock = threading.Lock()
+
+
+def _reload_env_if_changed() -> bool:
+    """
+    Recarrega o .env apenas se o arquivo mudou desde a última leitura.
+
+    Returns:
+        bool: True se o .env foi (re)carregado nesta chamada
+    """
+    with _env_lock:
+        path = _env_state["path"] or find_dotenv()
+        if not path or not os.path.exists(path):
+            _env_state["path"], _env_state["mtime"] = None, None
+            return False
+
+        mtime = os.path.getmtime(path)
+        if path == _env_state["path"] and mtime == _env_state["mtime"]:
+            return False
+
+        load_dotenv(path, override=True)
+        _env_state["path"], _env_state["mtime"] = path, mtime
+        logger.debug(f".env recarregado: {path}")
+        return True
+
+
+def get_client_settings() -> Dict[str, Any]:
+    """Retorna as configurações de pool e timeout do cliente HTTP (via .env)."""
+    _reload_env_if_changed()
+    return {
+        "pool_size": int(os.getenv("ASDLC_HTTP_POOL_SIZE", str(DEFAULT_POOL_SIZE))),
+        "keepalive": int(os.getenv("ASDLC_HTTP_KEEPALIVE", str(DEFAULT_KEEPALIVE))),
+        "timeout": float(os.getenv("ASDLC_LLM_TIMEOUT", str(DEFAULT_TIMEOUT))),
+        "connect_timeout": float(os.getenv("ASDLC_LLM_CONNECT_TIMEOUT", str(DEFAULT_CONNECT_TIMEOUT))),
+    }
+
+
+def _build_http_client(settings: Dict[str, Any], asynchronous: bool = False):
+    """Cria o cliente httpx com limites de pool; None usa o padrão do SDK."""
+    if httpx is None:
+        return None
+    client_cls = httpx.AsyncClient if asynchronous else httpx.Client
+    return client_cls(
+        limits=httpx.Limits(
+            max_connections=settings["pool_size"],
+            max_keepalive_connections=min(settings["keepalive"], settings["pool_size"]),
+        ),
+        timeout=httpx.Timeout(settings["timeout"], connect=settings["connect_timeout"]),
+    )
+
+
+def _resolve_provider() -> Dict[str, Any]:
+    """
+    Resolve o provedor ativo a partir do .env (OpenRouter tem preferência).
+
+    Raises:
+        RuntimeError: Se o motor externo estiver desativado (modo antigravity)
+        ValueError: Se nenhuma chave de API estiver configurada
+    """
+    _reload_env_if_changed()
     engine_mode = os.getenv("ASDLC_ENGINE", "antigravity").lower()
 
     if engine_mode != "external":
@@ -26,68 +192,1291 @@ def get_llm_client():
     oa_key = os.getenv("OPENAI_API_KEY")
 
     if or_key:
-        logger.info("Usando OpenRouter como provedor de LLM.")
-        return OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=or_key,
-            timeout=60.0,
-            default_headers={
-                "HTTP-Referer": "https://github.com/jota-f/A-SDLC",
-                "X-Title": "A-SDLC Framework",
+        logger.debug("Usando OpenRouter como provedor de LLM.")
+        return {
+            "name": "openrouter",
+            "base_url": OPENROUTER_BASE_URL,
+            "api_key": or_key,
+            "kwargs": {
+                "default_headers": {
+                    "HTTP-Referer": "https://github.com/jota-f/A-SDLC",
+                    "X-Title": "A-SDLC Framework",
+                }
             },
-        )
+        }
     elif oa_key:
-        logger.info("Usando OpenAI nativo como provedor de LLM.")
-        return OpenAI(api_key=oa_key, timeout=60.0)
+        logger.debug("Usando OpenAI nativo como provedor de LLM.")
+        return {
+            "name": "openai",
+            "base_url": os.getenv("OPENAI_BASE_URL", OPENAI_BASE_URL),
+            "api_key": oa_key,
+            "kwargs": {},
+        }
     else:
         raise ValueError("Nenhuma chave de API (OPENROUTER ou OPENAI) encontrada no .env.")
 
 
-def call_llm(prompt: str, agent_type: str = "general", max_tokens: int = None) -> str:
+def _get_or_create_client(provider: str, base_url: str, api_key: str, **kwargs) -> OpenAI:
+    """Retorna o cliente registrado para (provedor, base_url), recriando-o se chave ou config mudarem."""
+    settings = get_client_settings()
+    fingerprint = (api_key, tuple(sorted(settings.items())))
+    key = (provider, base_url)
+
+    with _registry_lock:
+        entry = _client_registry.get(key)
+        if entry and entry[0] == fingerprint:
+            return entry[1]
+
+        if entry:
+            logger.info(f"Configuração do provedor {provider} mudou. Recriando cliente LLM.")
+            _retired_clients.append(entry[1])
+
+        client_kwargs = dict(kwargs)
+        http_client = _build_http_client(settings)
+        if http_client is not None:
+            client_kwargs["http_client"] = http_client
+
+        # max_retries=0: retries e backoff são feitos por _create_with_backoff
+        client = OpenAI(base_url=base_url, api_key=api_key, timeout=settings["timeout"], max_retries=0, **client_kwargs)
+        _client_registry[key] = (fingerprint, client)
+        return client
+
+
+def reset_llm_clients() -> None:
+    """Fecha e descarta todos os clientes registrados (ex: ao final do processo ou em testes)."""
+    with _registry_lock:
+        for client in [client for _, client in _client_registry.values()] + _retired_clients:
+            try:
+                client.close()
+            except Exception as e:
+                logger.debug(f"Erro ao fechar cliente LLM: {e}")
+        _client_registry.clear()
+        _retired_clients.clear()
+        _async_client_registry.clear()
+        _provider_semaphores.clear()
+        _rate_limiters.clear()
+        _latency_histograms.clear()
+        _circuit_breakers.clear()
+    with _env_lock:
+        _env_state["path"], _env_state["mtime"] = None, None
+
+
+class LLMResponseCache:
     """
-    Envia um prompt para a LLM roteando o modelo pelo tipo de agente.
+    Cache de respostas endereçado por conteúdo, persistido em disco.
+
+    Cada entrada é um JSON nomeado pelo hash da requisição. O campo "created"
+    define a expiração (TTL) tanto na leitura quanto no despejo; o mtime do
+    arquivo só marca o último acesso (LRU), usado quando o cache passa do
+    limite de tamanho.
+    """
+
+    # "created" vem logo no início do JSON gravado por put(): o despejo não precisa ler a resposta
+    _CREATED_FIELD = re.compile(r'"created":\s*([0-9.eE+-]+)')
+
+    def __init__(self, cache_dir: Path, max_bytes: int, ttl_seconds: float):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, system: str, prompt: str, max_tokens: int, temperature: float) -> str:
+        """Gera a chave do cache a partir dos parâmetros que determinam a resposta."""
+        payload = json.dumps([model, system, prompt, max_tokens, temperature], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Retorna a resposta cacheada ou None (miss ou entrada expirada)."""
+        path = self._entry_path(key)
+        with self._lock:
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self.stats["misses"] += 1
+                return None
+
+            if "content" not in entry or self._expired(entry.get("created", 0)):
+                path.unlink(missing_ok=True)
+                self.stats["evictions"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            os.utime(path)  # Marca acesso recente (LRU)
+            self.stats["hits"] += 1
+            return entry["content"]
+
+    def put(self, key: str, model: str, content: str) -> None:
+        """Grava uma resposta no cache e aplica a política de despejo."""
+        with self._lock:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                entry = {"model": model, "created": time.time(), "content": content}
+                tmp_path = self._entry_path(key).with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp_path, self._entry_path(key))
+                self.stats["writes"] += 1
+                self._evict()
+            except OSError as e:
+                logger.warning(f"Não foi possível gravar no cache de LLM: {e}")
+
+    def _expired(self, created: float) -> bool:
+        return time.time() - created > self.ttl_seconds
+
+    def _created_at(self, path: Path) -> float:
+        """Campo "created" da entrada (0 se ilegível, o que a torna expirada como em get())."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                match = self._CREATED_FIELD.search(f.read(512))
+            if match:
+                return float(match.group(1))
+            return float(json.loads(path.read_text(encoding="utf-8")).get("created", 0))
+        except (OSError, ValueError, AttributeError):
+            return 0.0
+
+    def _evict(self) -> None:
+        """Remove entradas expiradas e, se necessário, as menos usadas até caber no limite."""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if self._expired(self._created_at(path)):
+                path.unlink(missing_ok=True)
+                self.stats["evictions"] += 1
+            else:
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()  # Menos recentes primeiro
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.stats["evictions"] += 1
+
+
+_response_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """Retorna o cache de respostas do projeto atual, ou None se desativado."""
+    global _response_cache
+    _reload_env_if_changed()
+    if os.getenv("ASDLC_CACHE_ENABLED", "false").lower() != "true":
+        return None
+
+    project_root = find_project_root()
+    if not project_root:
+        return None
+
+    cache_dir = project_root / ".asdlc" / "cache" / "llm"
+    with _cache_lock:
+        if _response_cache is None or _response_cache.cache_dir != cache_dir:
+            _response_cache = LLMResponseCache(
+                cache_dir,
+                max_bytes=int(float(os.getenv("ASDLC_LLM_CACHE_MAX_MB", str(DEFAULT_CACHE_MAX_MB))) * 1024 * 1024),
+                ttl_seconds=float(os.getenv("ASDLC_LLM_CACHE_TTL_HOURS", str(DEFAULT_CACHE_TTL_HOURS))) * 3600,
+            )
+        return _response_cache
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """Retorna os contadores de hit/miss do cache de respostas."""
+    if _response_cache is None:
+        return {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+    return dict(_response_cache.stats)
+
+
+class TokenBucket:
+    """
+    Balde de tokens com reabastecimento contínuo (capacidade por minuto).
+
+    reserve() debita imediatamente e devolve quanto o chamador deve esperar;
+    o saldo pode ficar negativo, o que enfileira os chamadores seguintes
+    em ordem de chegada em vez de falhar.
     """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Reserva `amount` tokens. Retorna os segundos de espera (0 se disponível)."""
+        if self.capacity <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            # Requisições maiores que a capacidade passam quando o balde estiver cheio
+            amount = min(amount, self.capacity)
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """Devolve (delta > 0) ou debita (delta < 0) tokens após conhecer o custo real."""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+    def drain(self, seconds: float) -> None:
+        """Esvazia o balde para que novos chamadores aguardem `seconds` (ex: Retry-After)."""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class ModelRateLimiter:
+    """Limites de requisições/min e tokens/min de um modelo."""
+
+    def __init__(self, model: str, rpm: float, tpm: float):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.stats = {"throttled": 0, "waited_seconds": 0.0, "retries": 0}
+
+    def reserve(self, estimated_tokens: int) -> float:
+        """Reserva uma requisição e os tokens estimados. Retorna a espera necessária."""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            self.stats["throttled"] += 1
+            self.stats["waited_seconds"] += wait
+        return wait
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Ajusta o balde de tokens com o uso real reportado pela API."""
+        if actual_tokens is not None:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
+
+    def penalize(self, seconds: float) -> None:
+        """Aplica o Retry-After do provedor a todos os chamadores deste modelo."""
+        self.requests.drain(seconds)
+
+
+def _agent_limit(agent_type: str, suffix: str, default: float) -> float:
+    """Lê o limite do agente (ex: MODEL_CODE_RPM) com fallback para ASDLC_LLM_<suffix>."""
+    env_name = AGENT_MODEL_ENV.get(agent_type, "OPENAI_MODEL")
+    value = os.getenv(f"{env_name}_{suffix}") or os.getenv(f"ASDLC_LLM_{suffix}")
+    return float(value) if value else default
+
+
+def get_rate_limiter(model: str, agent_type: str = "general") -> ModelRateLimiter:
+    """Retorna o limitador do modelo (compartilhado entre agentes do mesmo modelo com os mesmos limites)."""
+    key = (model, _agent_limit(agent_type, "RPM", DEFAULT_RPM), _agent_limit(agent_type, "TPM", DEFAULT_TPM))
+    with _registry_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = _rate_limiters[key] = ModelRateLimiter(*key)
+        return limiter
+
+
+def get_rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    """Retorna contadores de throttling e retries por modelo."""
+    stats: Dict[str, Dict[str, Any]] = {}
+    with _registry_lock:
+        for limiter in _rate_limiters.values():
+            totals = stats.setdefault(limiter.model, {"throttled": 0, "waited_seconds": 0.0, "retries": 0})
+            for name, value in limiter.stats.items():
+                totals[name] += value
+    return stats
+
+
+def _estimate_request_tokens(system: str, prompt: str, max_tokens: int) -> int:
+    """Estimativa conservadora de tokens (entrada + saída máxima) para o balde de TPM."""
+    return (len(system) + len(prompt)) // CHARS_PER_TOKEN_ESTIMATE + max_tokens
+
+
+def _parse_retry_after(error: Exception) -> Optional[float]:
+    """Extrai o Retry-After (segundos ou data HTTP) dos headers da resposta de erro."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
     try:
-        load_dotenv(override=True)
-        client = get_llm_client()
+        return max(0.0, float(retry_after))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Calcula a espera antes da próxima tentativa, ou None se o erro não for retentável.
+
+    Usa o Retry-After do provedor quando presente; caso contrário, backoff
+    exponencial com jitter completo.
+    """
+    status = getattr(error, "status_code", None)
+    if status not in RETRYABLE_STATUS_CODES and not isinstance(error, APIConnectionError):
+        return None
+
+    retry_after = _parse_retry_after(error)
+    if retry_after is not None:
+        return retry_after
+
+    base = float(os.getenv("ASDLC_LLM_BACKOFF_BASE", str(DEFAULT_BACKOFF_BASE)))
+    cap = float(os.getenv("ASDLC_LLM_BACKOFF_CAP", str(DEFAULT_BACKOFF_CAP)))
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+def _usage_tokens(response) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    return total if isinstance(total, int) else None
+
+
+class CircuitOpenError(Exception):
+    """Circuito aberto: o provedor/modelo está degradado e a chamada falha rápido."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por provedor/modelo baseado na taxa de falhas recentes.
+
+    CLOSED: chamadas normais. OPEN: falha rápido até o timer expirar.
+    HALF_OPEN: libera uma única chamada de prova; sucesso fecha, falha reabre.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, window: int, min_calls: int, failure_rate: float, reset_seconds: float):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.outcomes = deque(maxlen=window)
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Indica se uma chamada pode prosseguir (transiciona OPEN → HALF_OPEN pelo timer).
+        Uma prova sem resultado há mais de reset_seconds é considerada perdida e outra é liberada.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+                logger.info(f"Circuit breaker [{self.name}] em half-open: liberando chamada de prova.")
+
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and self._probe_in_flight and now - self._probe_started >= self.reset_seconds:
+                logger.warning(f"Circuit breaker [{self.name}]: chamada de prova expirou sem resultado.")
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probe_started = now
+                return True
+
+            self.stats["rejected"] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.stats["successes"] += 1
+            self.outcomes.append(True)
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit breaker [{self.name}] fechado: provedor recuperado.")
+                self.state = self.CLOSED
+                self.outcomes.clear()
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Libera a prova interrompida sem resultado (cancelamento): a próxima chamada vira a prova."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.stats["failures"] += 1
+            self.outcomes.append(False)
+            self._probe_in_flight = False
+            failures = self.outcomes.count(False)
+            if self.state == self.HALF_OPEN or (
+                len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.failure_rate
+            ):
+                if self.state != self.OPEN:
+                    logger.error(f"Circuit breaker [{self.name}] ABERTO ({failures}/{len(self.outcomes)} falhas recentes).")
+                    self.stats["opened"] += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = len(self.outcomes)
+            return {
+                "state": self.state,
+                "failure_rate": round(self.outcomes.count(False) / recent, 3) if recent else 0.0,
+                "recent_calls": recent,
+                **self.stats,
+            }
+
+
+def get_circuit_breaker(provider_name: str, model: str) -> CircuitBreaker:
+    """Retorna o circuit breaker de provedor/modelo (configurável via ASDLC_CB_*)."""
+    name = f"{provider_name}:{model}"
+    with _registry_lock:
+        breaker = _circuit_breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                window=int(os.getenv("ASDLC_CB_WINDOW", str(DEFAULT_CB_WINDOW))),
+                min_calls=int(os.getenv("ASDLC_CB_MIN_CALLS", str(DEFAULT_CB_MIN_CALLS))),
+                failure_rate=float(os.getenv("ASDLC_CB_FAILURE_RATE", str(DEFAULT_CB_FAILURE_RATE))),
+                reset_seconds=float(os.getenv("ASDLC_CB_RESET_SECONDS", str(DEFAULT_CB_RESET_SECONDS))),
+            )
+            _circuit_breakers[name] = breaker
+        return breaker
+
+
+def get_circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Retorna o estado de cada circuit breaker."""
+    with _registry_lock:
+        breakers = list(_circuit_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
+
+
+def _provider_label(client) -> str:
+    """Nome do provedor a partir da base URL do cliente (para chaves de métricas)."""
+    return "openrouter" if "openrouter" in str(getattr(client, "base_url", "")) else "openai"
+
+
+def _check_breaker(breaker: Optional[CircuitBreaker]) -> None:
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError(f"Circuito aberto para {breaker.name}; falhando rápido.")
+
+
+def _record_outcome(breaker: Optional[CircuitBreaker], error: Optional[Exception]) -> None:
+    """Só falhas transitórias (429/5xx/rede) contam contra o provedor; erros 4xx indicam que ele respondeu."""
+    if breaker is None:
+        return
+    if error is not None and _retry_delay(error, 0) is not None:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+
+def _release_probe(breaker: Optional[CircuitBreaker]) -> None:
+    if breaker is not None:
+        breaker.release_probe()
+
+
+def _create_with_backoff(
+    create: Callable[..., Any],
+    request: Dict[str, Any],
+    limiter: ModelRateLimiter,
+    estimated_tokens: int,
+    breaker: Optional[CircuitBreaker] = None,
+):
+    """
+    Executa a requisição respeitando o rate limit local e refazendo em 429/5xx/falhas de rede.
+
+    Raises:
+        CircuitOpenError: Se o circuito do modelo estiver (ou abrir durante os retries) aberto
+    """
+    max_retries = int(os.getenv("ASDLC_LLM_MAX_RETRIES", str(DEFAULT_MAX_RETRIES)))
+    attempt = 0
+    while True:
+        _check_breaker(breaker)
+        try:
+            wait = limiter.reserve(estimated_tokens)
+            if wait > 0:
+                logger.info(f"Rate limit local para [{limiter.model}]: aguardando {wait:.1f}s na fila...")
+                time.sleep(wait)
+            response = create(**request)
+            _record_outcome(breaker, None)
+            limiter.reconcile(estimated_tokens, _usage_tokens(response))
+            return response
+        except Exception as e:
+            _record_outcome(breaker, e)
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt >= max_retries:
+                raise
+            if getattr(e, "status_code", None) == 429:
+                limiter.penalize(delay)
+            limiter.stats["retries"] += 1
+            attempt += 1
+            logger.warning(f"Falha transitória em [{limiter.model}] ({e}). Tentativa {attempt}/{max_retries} em {delay:.1f}s.")
+            time.sleep(delay)
+        except BaseException:
+            # KeyboardInterrupt etc.: sem resultado, a prova do half-open não pode ficar presa
+            _release_probe(breaker)
+            raise
+
+
+async def _acreate_with_backoff(
+    create: Callable[..., Any],
+    request: Dict[str, Any],
+    limiter: ModelRateLimiter,
+    estimated_tokens: int,
+    semaphore: asyncio.Semaphore,
+    breaker: Optional[CircuitBreaker] = None,
+    hold_semaphore: bool = False,
+):
+    """
+    Versão assíncrona de _create_with_backoff (o semáforo só é ocupado durante a requisição).
+
+    Args:
+        hold_semaphore: Em streaming o corpo chega depois da resposta inicial; com True o
+            semáforo continua ocupado no retorno e quem chamou deve liberá-lo ao consumir
+            (ou cancelar) o stream.
+    """
+    max_retries = int(os.getenv("ASDLC_LLM_MAX_RETRIES", str(DEFAULT_MAX_RETRIES)))
+    attempt = 0
+    while True:
+        _check_breaker(breaker)
+        try:
+            wait = limiter.reserve(estimated_tokens)
+            if wait > 0:
+                logger.info(f"Rate limit local para [{limiter.model}]: aguardando {wait:.1f}s na fila...")
+                await asyncio.sleep(wait)
+            await semaphore.acquire()
+            try:
+                response = await create(**request)
+            except BaseException:
+                semaphore.release()
+                raise
+        except Exception as e:
+            _record_outcome(breaker, e)
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt >= max_retries:
+                raise
+            if getattr(e, "status_code", None) == 429:
+                limiter.penalize(delay)
+            limiter.stats["retries"] += 1
+            attempt += 1
+            logger.warning(f"Falha transitória em [{limiter.model}] ({e}). Tentativa {attempt}/{max_retries} em {delay:.1f}s.")
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelamento (ex: hedge perdedor) ou KeyboardInterrupt: libera a prova do half-open
+            _release_probe(breaker)
+            raise
+        if not hold_semaphore:
+            semaphore.release()
+        _record_outcome(breaker, None)
+        limiter.reconcile(estimated_tokens, _usage_tokens(response))
+        return response
+
 
-        # Mapeamento de Modelos por Agente (Estritamente via .env)
-        model_map = {
-            "code": os.getenv("MODEL_CODE"),
-            "architecture": os.getenv("MODEL_ARCH"),
-            "test": os.getenv("MODEL_TEST"),
-            "requirements": os.getenv("MODEL_REQ"),
-            "review": os.getenv("MODEL_REVIEW"),
-            "general": os.getenv("OPENAI_MODEL", "gpt-4.1-mini"),
+class LatencyHistogram:
+    """Histograma de latências com buckets fixos (segundos) para estimar percentis."""
+
+    BOUNDS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 21.0, 34.0, 55.0, 89.0, 144.0, 300.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            index = next((i for i, bound in enumerate(self.BOUNDS) if seconds <= bound), len(self.BOUNDS))
+            self.counts[index] += 1
+            self.total += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Limite superior do bucket que contém o percentil p (None sem amostras)."""
+        with self._lock:
+            if self.total == 0:
+                return None
+            target = max(1, int(round(p / 100.0 * self.total)))
+            cumulative = 0
+            for index, count in enumerate(self.counts):
+                cumulative += count
+                if cumulative >= target:
+                    return self.BOUNDS[index] if index < len(self.BOUNDS) else self.max
+            return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.total,
+            "mean": round(self.sum / self.total, 3) if self.total else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": round(self.max, 3),
         }
 
-        model = model_map.get(agent_type) or model_map["general"]
 
-        # Limite de tokens específico para Review (Kimi) conforme solicitado
-        if agent_type == "review" and max_tokens is None:
-            max_tokens = 1024  # Limite de saída para o Reviewer caro
-        elif max_tokens is None:
-            max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", "4096"))
+def record_latency(model: str, kind: str, seconds: float) -> None:
+    """Registra uma latência ('ttft' = até o primeiro token, 'total' = resposta completa)."""
+    with _registry_lock:
+        histograms = _latency_histograms.setdefault(model, {"ttft": LatencyHistogram(), "total": LatencyHistogram()})
+    histograms[kind].record(seconds)
+
+
+def record_response_latency(model: str, seconds: float) -> None:
+    """
+    Latência de uma resposta sem streaming: o primeiro token chega junto com a
+    resposta inteira, então entra como ttft e total. Assim o atraso de hedge
+    (get_hedge_delay) não é estimado só a partir das chamadas em stream.
+    """
+    record_latency(model, "ttft", seconds)
+    record_latency(model, "total", seconds)
+
+
+def get_latency_stats() -> Dict[str, Dict[str, Any]]:
+    """Retorna os percentis de latência por modelo."""
+    with _registry_lock:
+        items = list(_latency_histograms.items())
+    return {model: {kind: h.summary() for kind, h in hists.items()} for model, hists in items}
+
+
+def get_hedge_delay(model: str) -> float:
+    """
+    Atraso antes de disparar a requisição de reserva: o percentil configurado
+    do tempo até o primeiro token do modelo, ou ASDLC_LLM_HEDGE_DELAY enquanto
+    não houver amostras suficientes.
+    """
+    default = float(os.getenv("ASDLC_LLM_HEDGE_DELAY", str(DEFAULT_HEDGE_DELAY)))
+    with _registry_lock:
+        histograms = _latency_histograms.get(model)
+    if not histograms or histograms["ttft"].total < HEDGE_MIN_SAMPLES:
+        return default
+    percentile = float(os.getenv("ASDLC_LLM_HEDGE_PERCENTILE", str(DEFAULT_HEDGE_PERCENTILE)))
+    return histograms["ttft"].percentile(percentile) or default
+
+
+def get_llm_client():
+    """Carrega as chaves e retorna o cliente adequado (OpenRouter ou OpenAI), reaproveitando o pool."""
+    provider = _resolve_provider()
+    return _get_or_create_client(provider["name"], provider["base_url"], provider["api_key"], **provider["kwargs"])
+
+
+def _get_async_client(provider: Dict[str, Any]) -> AsyncOpenAI:
+    """
+    Retorna o cliente assíncrono do provedor para o event loop corrente.
+
+    Clientes assíncronos ficam presos ao loop em que foram criados, por isso o
+    registro é separado por loop; entradas de loops já encerrados são descartadas.
+    """
+    loop = asyncio.get_running_loop()
+    settings = get_client_settings()
+    fingerprint = (provider["api_key"], tuple(sorted(settings.items())))
+    key = (provider["name"], provider["base_url"], id(loop))
+
+    with _registry_lock:
+        for stale_key in [k for k, v in _async_client_registry.items() if v[0].is_closed()]:
+            del _async_client_registry[stale_key]
+
+        entry = _async_client_registry.get(key)
+        if entry and entry[0] is loop and entry[1] == fingerprint:
+            return entry[2]
+
+        client_kwargs = dict(provider["kwargs"])
+        http_client = _build_http_client(settings, asynchronous=True)
+        if http_client is not None:
+            client_kwargs["http_client"] = http_client
+
+        client = AsyncOpenAI(
+            base_url=provider["base_url"],
+            api_key=provider["api_key"],
+            timeout=settings["timeout"],
+            max_retries=0,
+            **client_kwargs,
+        )
+        _async_client_registry[key] = (loop, fingerprint, client)
+        return client
+
+
+def _get_provider_semaphore(provider_name: str) -> asyncio.Semaphore:
+    """Semáforo por provedor (e por event loop) que limita chamadas assíncronas simultâneas."""
+    loop = asyncio.get_running_loop()
+    key = (provider_name, id(loop))
+    with _registry_lock:
+        for stale_key in [k for k, v in _provider_semaphores.items() if v[0].is_closed()]:
+            del _provider_semaphores[stale_key]
+
+        entry = _provider_semaphores.get(key)
+        if entry and entry[0] is loop:
+            return entry[1]
+        limit = int(os.getenv("ASDLC_LLM_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY)))
+        semaphore = asyncio.Semaphore(max(1, limit))
+        _provider_semaphores[key] = (loop, semaphore)
+        return semaphore
+
+
+def _resolve_request(agent_type: str, max_tokens: Optional[int]) -> Tuple[str, int, float]:
+    """Resolve modelo, limite de tokens e temperatura para o tipo de agente."""
+    # Mapeamento de Modelos por Agente (Estritamente via .env)
+    model_map = {agent: os.getenv(env_name) for agent, env_name in AGENT_MODEL_ENV.items()}
+    model_map["general"] = model_map["general"] or "gpt-4.1-mini"
+
+    model = model_map.get(agent_type) or model_map["general"]
+
+    # Limite de tokens específico para Review (Kimi) conforme solicitado
+    if agent_type == "review" and max_tokens is None:
+        max_tokens = 1024  # Limite de saída para o Reviewer caro
+    elif max_tokens is None:
+        max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", "4096"))
+
+    temperature = float(os.getenv("OPENAI_TEMPERATURE", "0.3"))
+    return model, max_tokens, temperature
+
 
-        temperature = float(os.getenv("OPENAI_TEMPERATURE", "0.3"))
+# Mensagem de sistema estática: não varia por agente para não quebrar o prefixo
+# compartilhado no cache de prompt do provedor (a persona vem no prompt).
+SYSTEM_MESSAGE = "Você é um agente especialista no framework A-SDLC."
+
+
+def _prompt_cache_hints_enabled() -> bool:
+    return os.getenv("ASDLC_PROMPT_CACHE_HINTS", "true").lower() == "true"
+
+
+def _is_anthropic_model(model: str) -> bool:
+    return model.startswith("anthropic/") or "claude" in model.lower()
+
+
+def _build_request(
+    model: str, system: str, prompt: str, max_tokens: int, temperature: float, cache_prefix: int = 0
+) -> Dict[str, Any]:
+    """
+    Monta a requisição de chat.
+
+    Args:
+        cache_prefix: Quantidade de caracteres iniciais do prompt que são estáveis
+            entre chamadas (persona, protocolo, contexto, arquivos). Quando > 0, o
+            prompt é enviado em duas partes e recebe dicas de prompt caching.
+    """
+    user_content: Any = prompt
+    if 0 < cache_prefix < len(prompt) and _prompt_cache_hints_enabled():
+        user_content = [
+            {"type": "text", "text": prompt[:cache_prefix]},
+            {"type": "text", "text": prompt[cache_prefix:]},
+        ]
+    request = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user_content},
+        ],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+    return _with_model(request, model)
+
+
+def _with_extra_body(request: Dict[str, Any], **fields: Any) -> Dict[str, Any]:
+    """
+    Parâmetros recentes da API (prompt_cache_key, stream_options) vão em extra_body:
+    SDKs openai 1.x antigos rejeitam kwargs desconhecidos com TypeError.
+    """
+    return dict(request, extra_body={**(request.get("extra_body") or {}), **fields})
+
+
+def _with_model(request: Dict[str, Any], model: str) -> Dict[str, Any]:
+    """
+    Direciona a requisição para um modelo, recalculando as dicas de prompt caching:
+    cache_control no prefixo para modelos Anthropic (via OpenRouter) e
+    prompt_cache_key para os demais (roteamento do cache automático da OpenAI).
+    """
+    request = dict(request, model=model)
+    extra_body = {k: v for k, v in (request.get("extra_body") or {}).items() if k != "prompt_cache_key"}
+    if extra_body:
+        request["extra_body"] = extra_body
+    else:
+        request.pop("extra_body", None)
+    messages = request.get("messages") or []
+    if len(messages) != 2 or not isinstance(messages[1]["content"], list):
+        return request
+
+    system_msg, user_msg = messages
+    prefix, suffix = (dict(part) for part in user_msg["content"])
+    prefix.pop("cache_control", None)
+    if _is_anthropic_model(model):
+        prefix["cache_control"] = {"type": "ephemeral"}
+    else:
+        digest = hashlib.sha256(f"{system_msg['content']}\n{prefix['text']}".encode("utf-8"))
+        request = _with_extra_body(request, prompt_cache_key=f"asdlc-{digest.hexdigest()[:24]}")
+    request["messages"] = [system_msg, dict(user_msg, content=[prefix, suffix])]
+    return request
+
+
+def _lookup_cache(
+    use_cache: bool, model: str, system: str, prompt: str, max_tokens: int, temperature: float
+) -> Tuple[Optional[LLMResponseCache], Optional[str], Optional[str]]:
+    """Consulta o cache de respostas. Retorna (cache, chave, resposta cacheada)."""
+    cache = get_response_cache() if use_cache else None
+    if not cache:
+        return None, None, None
+    cache_key = cache.make_key(model, system, prompt, max_tokens, temperature)
+    return cache, cache_key, cache.get(cache_key)
+
+
+def _cache_answer(
+    cache: Optional[LLMResponseCache], cache_key: Optional[str], model: str, answered_by: str, content: str
+) -> None:
+    """
+    Salva a resposta no cache. Respostas de um modelo de reserva não são salvas:
+    a chave é a do modelo primário, que voltaria a receber a resposta degradada
+    depois que o circuito fechasse.
+    """
+    if not cache or not cache_key:
+        return
+    if answered_by != model:
+        logger.debug(f"Resposta de [{answered_by}] (reserva de [{model}]) não vai para o cache.")
+        return
+    cache.put(cache_key, answered_by, content)
+
+
+def _extract_content(response) -> Tuple[bool, str]:
+    """Extrai o texto da resposta. Retorna (sucesso, conteúdo ou mensagem de erro)."""
+    if not response or not hasattr(response, "choices") or len(response.choices) == 0:
+        return False, "ERRO: Resposta inválida ou vazia da API (sem choices)."
+
+    content = response.choices[0].message.content
+    if not content:
+        return False, "ERRO: Resposta vazia da LLM (content is None)."
+    return True, content.strip()
+
+
+def _failover_provider(primary_client) -> Optional[Dict[str, Any]]:
+    """Provedor OpenAI nativo usado quando o circuito do OpenRouter abre (se houver OPENAI_API_KEY)."""
+    oa_key = os.getenv("OPENAI_API_KEY")
+    if not oa_key or _provider_label(primary_client) != "openrouter":
+        return None
+    return {"name": "openai", "base_url": os.getenv("OPENAI_BASE_URL", OPENAI_BASE_URL), "api_key": oa_key, "kwargs": {}}
+
+
+def _failover_model() -> str:
+    return os.getenv("OPENAI_FAILOVER_MODEL", DEFAULT_FAILOVER_MODEL)
+
+
+def _complete_with_breaker(client, request: Dict[str, Any], agent_type: str, estimated_tokens: int) -> Tuple[Any, str]:
+    """
+    Executa a requisição sob o circuit breaker do modelo. Com o circuito aberto,
+    faz failover para a chave OpenAI (se configurada) ou falha rápido.
+
+    Returns:
+        Tuple[Any, str]: (resposta, modelo que respondeu)
+    """
+    routes = [(client, request["model"])]
+    failover = _failover_provider(client)
+    if failover:
+        failover_client = _get_or_create_client(failover["name"], failover["base_url"], failover["api_key"])
+        routes.append((failover_client, _failover_model()))
+
+    error: Optional[Exception] = None
+    for route_client, model in routes:
+        breaker = get_circuit_breaker(_provider_label(route_client), model)
+        try:
+            response = _create_with_backoff(
+                route_client.chat.completions.create,
+                _with_model(request, model),
+                get_rate_limiter(model, agent_type),
+                estimated_tokens,
+                breaker,
+            )
+            return response, model
+        except CircuitOpenError as e:
+            logger.warning(f"{e} Tentando rota alternativa...")
+            error = e
+    raise error
+
+
+async def _acomplete_with_breaker(
+    client, request: Dict[str, Any], agent_type: str, estimated_tokens: int, semaphore: asyncio.Semaphore
+) -> Tuple[Any, str]:
+    """Versão assíncrona de _complete_with_breaker."""
+    routes = [(client, request["model"], semaphore)]
+    failover = _failover_provider(client)
+    if failover:
+        routes.append((_get_async_client(failover), _failover_model(), _get_provider_semaphore(failover["name"])))
+
+    error: Optional[Exception] = None
+    for route_client, model, route_semaphore in routes:
+        breaker = get_circuit_breaker(_provider_label(route_client), model)
+        try:
+            response = await _acreate_with_backoff(
+                route_client.chat.completions.create,
+                _with_model(request, model),
+                get_rate_limiter(model, agent_type),
+                estimated_tokens,
+                route_semaphore,
+                breaker,
+            )
+            return response, model
+        except CircuitOpenError as e:
+            logger.warning(f"{e} Tentando rota alternativa...")
+            error = e
+    raise error
+
+
+def get_llm_metrics() -> Dict[str, Any]:
+    """Métricas consolidadas da camada LLM: circuit breakers, rate limit, latência e cache."""
+    return {
+        "circuit_breakers": get_circuit_breaker_stats(),
+        "rate_limits": get_rate_limit_stats(),
+        "latency": get_latency_stats(),
+        "cache": get_cache_stats(),
+    }
+
+
+def _hedging_enabled(hedge: Optional[bool]) -> bool:
+    if hedge is not None:
+        return hedge
+    return os.getenv("ASDLC_LLM_HEDGE", "false").lower() == "true"
+
+
+def _fallback_models(agent_type: str, primary: str) -> List[str]:
+    """Modelos de reserva do agente (MODEL_<AGENTE>_FALLBACK, separados por vírgula)."""
+    env_name = AGENT_MODEL_ENV.get(agent_type, "OPENAI_MODEL")
+    raw = os.getenv(f"{env_name}_FALLBACK", "")
+    return [m.strip() for m in raw.split(",") if m.strip() and m.strip() != primary]
+
+
+async def _astream_attempt(
+    client: AsyncOpenAI,
+    request: Dict[str, Any],
+    agent_type: str,
+    estimated_tokens: int,
+    semaphore: asyncio.Semaphore,
+    first_token: asyncio.Event,
+) -> str:
+    """Executa uma tentativa em streaming, sinalizando `first_token` ao receber o primeiro trecho."""
+    model = request["model"]
+    limiter = get_rate_limiter(model, agent_type)
+    request = _with_extra_body(dict(request, stream=True), stream_options={"include_usage": True})
+
+    started = time.monotonic()
+    breaker = get_circuit_breaker(_provider_label(client), model)
+    # O semáforo fica ocupado até o stream ser consumido ou cancelado (o corpo chega depois dos headers)
+    stream = await _acreate_with_backoff(
+        client.chat.completions.create, request, limiter, estimated_tokens, semaphore, breaker, hold_semaphore=True
+    )
+    parts = []
+    usage_tokens = None
+    try:
+        async for chunk in stream:
+            usage_tokens = _usage_tokens(chunk) or usage_tokens
+            if not getattr(chunk, "choices", None):
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if not parts:
+                    record_latency(model, "ttft", time.monotonic() - started)
+                    first_token.set()
+                parts.append(delta)
+    finally:
+        try:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                await close()
+        finally:
+            semaphore.release()
+
+    record_latency(model, "total", time.monotonic() - started)
+    limiter.reconcile(estimated_tokens, usage_tokens)
+    content = "".join(parts).strip()
+    if not content:
+        raise ValueError(f"Resposta vazia do modelo {model}.")
+    return content
+
+
+def _first_success(tasks) -> Optional[asyncio.Task]:
+    for task in tasks:
+        if not task.cancelled() and task.exception() is None:
+            return task
+    return None
+
+
+async def _ahedged_completion(
+    client: AsyncOpenAI,
+    request: Dict[str, Any],
+    fallbacks: List[str],
+    agent_type: str,
+    estimated_tokens: int,
+    semaphore: asyncio.Semaphore,
+) -> Tuple[str, str]:
+    """
+    Dispara o modelo primário e, se nenhum primeiro token chegar dentro do
+    atraso de hedge (ou se o primário falhar), o próximo modelo de reserva.
+    A primeira resposta válida vence e as demais são canceladas.
+
+    Returns:
+        Tuple[str, str]: (modelo vencedor, conteúdo)
+    """
+    primary = request["model"]
+    first_token = asyncio.Event()
+    models: Dict[asyncio.Task, str] = {}
+    errors: List[BaseException] = []
+
+    def launch(model: str) -> None:
+        attempt = _astream_attempt(client, _with_model(request, model), agent_type, estimated_tokens, semaphore, first_token)
+        models[asyncio.ensure_future(attempt)] = model
+
+    launch(primary)
+    pending = set(models)
+    try:
+        for fallback in fallbacks:
+            waiter = asyncio.ensure_future(first_token.wait())
+            done, _ = await asyncio.wait(
+                pending | {waiter}, timeout=get_hedge_delay(primary), return_when=asyncio.FIRST_COMPLETED
+            )
+            waiter.cancel()
+            done.discard(waiter)
+
+            winner = _first_success(done)
+            if winner is not None:
+                return models[winner], winner.result()
+            errors.extend(t.exception() for t in done if not t.cancelled())
+            pending -= done
+            if first_token.is_set():
+                break
+
+            logger.warning(f"Hedge: [{primary}] sem primeiro token no prazo. Disparando reserva [{fallback}].")
+            launch(fallback)
+            pending = {t for t in models if not t.done()}
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = _first_success(done)
+            if winner is not None:
+                return models[winner], winner.result()
+            errors.extend(t.exception() for t in done if not t.cancelled())
+
+        raise errors[-1] if errors else ValueError("Hedge sem resposta válida.")
+    finally:
+        for task in models:
+            if not task.done():
+                task.cancel()
+
+
+def _run_in_background_loop(coro):
+    """Executa a corrotina no event loop de fundo (compartilhado) e aguarda o resultado."""
+    global _background_loop
+    with _registry_lock:
+        if _background_loop is None or _background_loop.is_closed():
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="asdlc-llm-loop", daemon=True).start()
+        loop = _background_loop
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def stream_llm(
+    prompt: str, agent_type: str = "general", max_tokens: int = None, use_cache: bool = True, cache_prefix: int = 0
+) -> Iterator[str]:
+    """
+    Gera os trechos da resposta da LLM à medida que chegam (stream=True).
+
+    Uma resposta cacheada é entregue como um único trecho. Erros de API são
+    propagados ao consumidor; retries só acontecem antes do primeiro trecho.
+    """
+    client = get_llm_client()
+    model, max_tokens, temperature = _resolve_request(agent_type, max_tokens)
+    system = SYSTEM_MESSAGE
+
+    cache, cache_key, cached = _lookup_cache(use_cache, model, system, prompt, max_tokens, temperature)
+    if cached is not None:
+        logger.info(f"Agente [{agent_type}] resposta servida do cache ({model}).")
+        yield cached
+        return
+
+    logger.info(f"Agente [{agent_type}] chamando modelo [{model}] (stream)...")
+
+    request = _build_request(model, system, prompt, max_tokens, temperature, cache_prefix)
+    request = _with_extra_body(dict(request, stream=True), stream_options={"include_usage": True})
+    limiter = get_rate_limiter(model, agent_type)
+    estimated_tokens = _estimate_request_tokens(system, prompt, max_tokens)
+    started = time.monotonic()
+    breaker = get_circuit_breaker(_provider_label(client), model)
+    stream = _create_with_backoff(client.chat.completions.create, request, limiter, estimated_tokens, breaker)
+
+    parts = []
+    usage_tokens = None
+    for chunk in stream:
+        usage_tokens = _usage_tokens(chunk) or usage_tokens
+        if not getattr(chunk, "choices", None):
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            if not parts:
+                record_latency(model, "ttft", time.monotonic() - started)
+            parts.append(delta)
+            yield delta
+
+    record_latency(model, "total", time.monotonic() - started)
+    limiter.reconcile(estimated_tokens, usage_tokens)
+    content = "".join(parts).strip()
+    if content and cache:
+        cache.put(cache_key, model, content)
+
+
+def call_llm(
+    prompt: str,
+    agent_type: str = "general",
+    max_tokens: int = None,
+    use_cache: bool = True,
+    stream: bool = False,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    hedge: Optional[bool] = None,
+    cache_prefix: int = 0,
+) -> str:
+    """
+    Envia um prompt para a LLM roteando o modelo pelo tipo de agente.
+
+    Args:
+        use_cache: Se False, ignora o cache de respostas (ex: retries de validação)
+        stream: Se True, consome a resposta em streaming (stream_llm)
+        on_chunk: Callback chamado a cada trecho recebido no modo stream
+        hedge: Corre o modelo primário contra os de reserva (ver acall_llm).
+            Não se aplica ao modo stream. None usa ASDLC_LLM_HEDGE.
+        cache_prefix: Tamanho do prefixo estável do prompt (ver AgentHarness.prepare_context),
+            usado nas dicas de prompt caching do provedor.
+
+    Returns:
+        str: Texto completo da resposta (também no modo stream)
+    """
+    try:
+        _reload_env_if_changed()
+        if stream:
+            parts = []
+            for chunk in stream_llm(
+                prompt, agent_type=agent_type, max_tokens=max_tokens, use_cache=use_cache, cache_prefix=cache_prefix
+            ):
+                parts.append(chunk)
+                if on_chunk:
+                    on_chunk(chunk)
+            content = "".join(parts).strip()
+            return content if content else "ERRO: Resposta vazia da LLM (stream sem conteúdo)."
+
+        if _hedging_enabled(hedge) and _fallback_models(agent_type, _resolve_request(agent_type, max_tokens)[0]):
+            # A corrida entre modelos é assíncrona; roda no loop de fundo para reaproveitar os clientes
+            return _run_in_background_loop(
+                acall_llm(
+                    prompt,
+                    agent_type=agent_type,
+                    max_tokens=max_tokens,
+                    use_cache=use_cache,
+                    hedge=True,
+                    cache_prefix=cache_prefix,
+                )
+            )
+
+        client = get_llm_client()
+        model, max_tokens, temperature = _resolve_request(agent_type, max_tokens)
+        system = SYSTEM_MESSAGE
+
+        cache, cache_key, cached = _lookup_cache(use_cache, model, system, prompt, max_tokens, temperature)
+        if cached is not None:
+            logger.info(f"Agente [{agent_type}] resposta servida do cache ({model}).")
+            return cached
 
         logger.info(f"Agente [{agent_type}] chamando modelo [{model}]...")
 
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": f"Você é um {agent_type} agent especialista no framework A-SDLC."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=max_tokens,
-            temperature=temperature,
+        request = _build_request(model, system, prompt, max_tokens, temperature, cache_prefix)
+        started = time.monotonic()
+        response, answered_by = _complete_with_breaker(
+            client, request, agent_type, _estimate_request_tokens(system, prompt, max_tokens)
         )
+        record_response_latency(answered_by, time.monotonic() - started)
+
+        ok, content = _extract_content(response)
+        if ok:
+            _cache_answer(cache, cache_key, model, answered_by, content)
+        return content
+
+    except RuntimeError as e:
+        return f"MODO ANTIGRAVITY: {str(e)}"
+    except Exception as e:
+        logger.error(f"Erro na chamada LLM: {e}")
+        return f"ERRO: {str(e)}"
+
+
+async def acall_llm(
+    prompt: str,
+    agent_type: str = "general",
+    max_tokens: int = None,
+    use_cache: bool = True,
+    hedge: Optional[bool] = None,
+    cache_prefix: int = 0,
+) -> str:
+    """
+    Versão assíncrona de call_llm (AsyncOpenAI).
+
+    As chamadas simultâneas a um mesmo provedor são limitadas por um semáforo
+    (ASDLC_LLM_MAX_CONCURRENCY), permitindo sobrepor agentes independentes sem
+    abrir conexões sem limite.
+
+    Args:
+        hedge: Dispara um modelo de reserva (MODEL_<AGENTE>_FALLBACK) se o
+            primário não emitir o primeiro token a tempo. None usa ASDLC_LLM_HEDGE.
+    """
+    try:
+        provider = _resolve_provider()
+        client = _get_async_client(provider)
+        model, max_tokens, temperature = _resolve_request(agent_type, max_tokens)
+        system = SYSTEM_MESSAGE
+
+        cache, cache_key, cached = _lookup_cache(use_cache, model, system, prompt, max_tokens, temperature)
+        if cached is not None:
+            logger.info(f"Agente [{agent_type}] resposta servida do cache ({model}).")
+            return cached
+
+        request = _build_request(model, system, prompt, max_tokens, temperature, cache_prefix)
+        estimated_tokens = _estimate_request_tokens(system, prompt, max_tokens)
+        semaphore = _get_provider_semaphore(provider["name"])
+
+        fallbacks = _fallback_models(agent_type, model) if _hedging_enabled(hedge) else []
+        if fallbacks:
+            logger.info(f"Agente [{agent_type}] chamando modelo [{model}] com hedge {fallbacks}...")
+            winner, content = await _ahedged_completion(client, request, fallbacks, agent_type, estimated_tokens, semaphore)
+            if winner != model:
+                logger.info(f"Hedge: resposta do modelo de reserva [{winner}] venceu.")
+            _cache_answer(cache, cache_key, model, winner, content)
+            return content
+
+        logger.info(f"Agente [{agent_type}] chamando modelo [{model}] (async)...")
 
-        if not response or not hasattr(response, "choices") or len(response.choices) == 0:
-            return "ERRO: Resposta inválida ou vazia da API (sem choices)."
+        started = time.monotonic()
+        response, answered_by = await _acomplete_with_breaker(client, request, agent_type, estimated_tokens, semaphore)
+        record_response_latency(answered_by, time.monotonic() - started)
 
-        content = response.choices[0].message.content
-        return content.strip() if content else "ERRO: Resposta vazia da LLM (content is None)."
+        ok, content = _extract_content(response)
+        if ok:
+            _cache_answer(cache, cache_key, model, answered_by, content)
+        return content
 
     except RuntimeError as e:
         return f"MODO ANTIGRAVITY: {str(e)}"
@@ -8,7 +8,7 @@ FERRAMENTAS DE GESTÃO (funcionam sempre):
   - asdlc_get_project_metrics, asdlc_list_stories, asdlc_grill_story, asdlc_apply_grill_decisions
 
 FERRAMENTAS DE EXECUÇÃO (requerem ASDLC_ENGINE=external no .env):
-  - asdlc_implement_story, asdlc_spawn_specialist
+  - asdlc_implement_story, asdlc_implement_stories, asdlc_spawn_specialist
 """
 
 from fastmcp import FastMCP
@@ -19,6 +19,7 @@ from typing import Optional
 
 # Importar lógica interna do A-SDLC
 from asdlc import project_manager, story_manager, utils
+from asdlc.story_index import get_story_index
 from asdlc.validation_checker import ASDLCValidator
 
 # Configurar logging para o servidor
@@ -132,10 +133,9 @@ def asdlc_get_project_metrics() -> str:
             return "Sem métricas: Nenhuma story encontrada."
 
         all_metrics = []
-        for f in stories_dir.glob("*.md"):
-            m = story_manager._calcular_metricas_story(f)
-            story_id = f.stem.split("_")[0]
-            all_metrics.append(f"Story {story_id}: {m.get('progress_percentage', 0)}% concluída")
+        for entry in get_story_index(project_root).entries():
+            story_id = entry.stem.split("_")[0]
+            all_metrics.append(f"Story {story_id}: {entry.progress_percentage}% concluída")
 
         return "Métricas do Projeto:\n" + "\n".join(all_metrics)
     except Exception as e:
@@ -157,8 +157,8 @@ def asdlc_list_stories() -> str:
             return "Nenhuma story encontrada (pasta /stories vazia)."
 
         stories = []
-        for f in stories_dir.glob("*.md"):
-            stories.append(f"- {f.name}")
+        for entry in get_story_index(project_root).entries():
+            stories.append(f"- {entry.name}")
 
         return "Stories encontradas:\n" + "\n".join(stories)
     except Exception as e:
@@ -303,6 +303,46 @@ def asdlc_implement_story(story_id: str, project_path: Optional[str] = None) ->
         return f"Erro durante a implementação: {str(e)}"
 
 
+@mcp.tool()
+def asdlc_implement_stories(
+    story_ids: Optional[str] = None, max_workers: Optional[int] = None, project_path: Optional[str] = None
+) -> str:
+    """
+    [REQUER ASDLC_ENGINE=external] Implementa várias stories em lote respeitando
+    o depends_on do frontmatter: independentes em paralelo, dependentes em ordem,
+    e uma dependência que falhou bloqueia as stories filhas.
+
+    Args:
+        story_ids: IDs separados por vírgula. Vazio implementa todas as pendentes.
+        max_workers: Quantidade de stories simultâneas (padrão: ASDLC_IMPLEMENT_WORKERS)
+        project_path: Caminho opcional para a pasta do projeto
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    engine = os.getenv("ASDLC_ENGINE", "antigravity").lower()
+
+    if engine != "external":
+        return (
+            "MODO ANTIGRAVITY ATIVO: Esta ferramenta requer ASDLC_ENGINE=external no .env.\n"
+            "Implemente as stories uma a uma com a Skill @asdlc_implementation, "
+            "seguindo a ordem do depends_on."
+        )
+
+    try:
+        if project_path:
+            os.chdir(project_path)
+        ids = [i.strip() for i in story_ids.split(",") if i.strip()] if story_ids else None
+        results = story_manager.implement_stories(story_ids=ids, max_workers=max_workers)
+        if not results:
+            return "Nenhuma story pendente para implementar."
+        lines = ["Resultado do lote de stories:"]
+        lines.extend(f"  [{status.upper()}] {story_id}" for story_id, status in results.items())
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Erro durante a implementação em lote: {str(e)}"
+
+
 @mcp.tool()
 def asdlc_spawn_specialist(agent_type: str, task: str, files: Optional[str] = None, project_path: Optional[str] = None) -> str:
     """
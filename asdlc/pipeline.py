@@ -0,0 +1,275 @@
+"""
+A-SDLC Framework - Pipeline de Implementação
+Descreve as etapas da implementação de uma story como um DAG declarativo
+(entradas/saídas explícitas por etapa) e as executa com um escalonador que
+roda etapas independentes em paralelo e mede o tempo de parede de cada uma.
+
+O DAG padrão pode ser substituído por projeto em .asdlc/pipeline.yaml.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .checkpoint import is_failure_output
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_CONFIG_FILE = "pipeline.yaml"
+DEFAULT_MAX_PARALLEL_STAGES = 2
+
+RUNNER_SPAWN = "spawn"  # spawn_agent
+RUNNER_VALIDATE = "validate"  # validate_and_fix (gera, valida e corrige)
+
+
+@dataclass
+class Stage:
+    name: str
+    agent: str
+    task: str
+    needs: List[str] = field(default_factory=list)
+    runner: str = RUNNER_SPAWN
+    use_relevant_files: bool = True
+    skip_if: Optional[str] = None
+    label: str = ""
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str  # done | resumed | skipped | failed | blocked
+    output: str = ""
+    elapsed_s: float = 0.0
+    error: Optional[str] = None
+
+
+# DAG padrão: Architecture e Test Red dependem só da story; Code precisa dos dois;
+# Validação final e Review dependem só do código.
+DEFAULT_STAGES = [
+    Stage(
+        name="architecture",
+        agent="architecture",
+        task="Analise a story '{title}' e defina a melhor abordagem arquitetural.",
+        use_relevant_files=False,
+        label="Design da Arquitetura",
+    ),
+    Stage(
+        name="test_red",
+        agent="test",
+        task=(
+            "Crie testes para a story '{title}' que descrevam o comportamento esperado. "
+            "Os testes DEVEM falhar neste ponto pois o código ainda não foi implementado. "
+            "Foque nos Critérios de Aceitação da story."
+        ),
+        skip_if="tests_exist",
+        label="TDD Red Phase - Criando testes que falham",
+    ),
+    Stage(
+        name="code",
+        agent="code",
+        task=(
+            "Implemente a story '{title}'. "
+            "O código DEVE fazer os testes existentes passarem. "
+            "Execute os testes após cada mudança significativa."
+        ),
+        needs=["architecture", "test_red"],
+        runner=RUNNER_VALIDATE,
+        label="TDD Green Phase - Implementando código",
+    ),
+    Stage(
+        name="test_validation",
+        agent="test",
+        task=(
+            "Execute TODOS os testes do projeto e valide que os Critérios de Aceitação "
+            "da story '{title}' estão cobertos. Reporte cobertura."
+        ),
+        needs=["code"],
+        label="Validação Final de Testes",
+    ),
+    Stage(
+        name="review",
+        agent="review",
+        task="Revise a implementação.",
+        needs=["code"],
+        label="Code Review",
+    ),
+]
+
+
+class _TemplateValues(dict):
+    """Mantém placeholders desconhecidos intactos ao formatar a tarefa."""
+
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def render_task(stage: Stage, values: Dict[str, Any]) -> str:
+    """Formata a tarefa da etapa com {title}, {story_id} e as saídas das etapas de entrada."""
+    return stage.task.format_map(_TemplateValues(values))
+
+
+def validate_pipeline(stages: List[Stage]) -> List[Stage]:
+    """
+    Valida o DAG (nomes únicos, dependências existentes, sem ciclos).
+
+    Returns:
+        List[Stage]: Etapas em ordem topológica (estável em relação à declaração)
+
+    Raises:
+        ValueError: Se o DAG for inválido
+    """
+    by_name: Dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Etapa duplicada no pipeline: {stage.name}")
+        if stage.runner not in (RUNNER_SPAWN, RUNNER_VALIDATE):
+            raise ValueError(f"Runner desconhecido na etapa {stage.name}: {stage.runner}")
+        by_name[stage.name] = stage
+    for stage in stages:
+        missing = [dep for dep in stage.needs if dep not in by_name]
+        if missing:
+            raise ValueError(f"Etapa {stage.name} depende de etapas inexistentes: {', '.join(missing)}")
+
+    ordered: List[Stage] = []
+    done = set()
+    pending = list(stages)
+    while pending:
+        ready = [s for s in pending if all(dep in done for dep in s.needs)]
+        if not ready:
+            raise ValueError(f"Ciclo no pipeline entre as etapas: {', '.join(s.name for s in pending)}")
+        for stage in ready:
+            ordered.append(stage)
+            done.add(stage.name)
+            pending.remove(stage)
+    return ordered
+
+
+def load_pipeline(project_root: Optional[Path]) -> List[Stage]:
+    """
+    Carrega o DAG de .asdlc/pipeline.yaml (chave 'stages') ou o padrão.
+
+    Exemplo:
+        stages:
+          - name: security
+            agent: review
+            task: "Audite a segurança da story '{title}'."
+            needs: [code]
+    """
+    config_path = project_root / ".asdlc" / PIPELINE_CONFIG_FILE if project_root else None
+    if not config_path or not config_path.exists():
+        return validate_pipeline(DEFAULT_STAGES)
+
+    try:
+        import yaml
+
+        data = yaml.safe_load(config_path.read_text(encoding="utf-8")) or {}
+    except ImportError:
+        logger.warning("PyYAML não instalado: usando o pipeline padrão.")
+        return validate_pipeline(DEFAULT_STAGES)
+
+    stages = []
+    for raw in data.get("stages", []):
+        stages.append(
+            Stage(
+                name=raw["name"],
+                agent=raw.get("agent", "general"),
+                task=raw["task"],
+                needs=list(raw.get("needs", [])),
+                runner=raw.get("runner", RUNNER_SPAWN),
+                use_relevant_files=raw.get("use_relevant_files", True),
+                skip_if=raw.get("skip_if"),
+                label=raw.get("label", ""),
+            )
+        )
+    logger.info(f"Pipeline customizado carregado de {config_path} ({len(stages)} etapas).")
+    return validate_pipeline(stages)
+
+
+def run_pipeline(
+    stages: List[Stage],
+    run_stage: Callable[[Stage, Dict[str, str]], str],
+    conditions: Optional[Dict[str, Callable[[], bool]]] = None,
+    max_workers: Optional[int] = None,
+    on_event: Optional[Callable[[str, Stage, Optional[StageResult]], None]] = None,
+    checkpoint=None,
+) -> Dict[str, StageResult]:
+    """
+    Executa o DAG: uma etapa começa assim que todas as suas entradas terminam.
+
+    Args:
+        run_stage: Executa a etapa recebendo as saídas das etapas de entrada
+        conditions: Condições nomeadas para skip_if (ex: "tests_exist")
+        max_workers: Etapas simultâneas (ASDLC_PIPELINE_MAX_PARALLEL)
+        on_event: Callback ("start" | "end", etapa, resultado) para exibir progresso
+        checkpoint: CheckpointManifest; etapas com entradas inalteradas são
+            reaproveitadas (status "resumed") e as concluídas são salvas
+
+    Returns:
+        Dict[str, StageResult]: Resultado por etapa, na ordem topológica. Uma etapa
+        que falha (exceção ou saída de falha, ver checkpoint.is_failure_output)
+        bloqueia suas dependentes; as independentes seguem.
+    """
+    stages = validate_pipeline(stages)
+    conditions = conditions or {}
+    if max_workers is None:
+        max_workers = int(os.getenv("ASDLC_PIPELINE_MAX_PARALLEL", str(DEFAULT_MAX_PARALLEL_STAGES)))
+    notify = on_event or (lambda *args: None)
+
+    results: Dict[str, StageResult] = {}
+    digests: Dict[str, str] = {}
+    pending = list(stages)
+    running: Dict[Any, tuple] = {}
+
+    def finish(stage: Stage, result: StageResult) -> None:
+        results[stage.name] = result
+        notify("end", stage, result)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while pending or running:
+            for stage in list(pending):
+                if any(dep not in results for dep in stage.needs):
+                    continue
+                pending.remove(stage)
+                if any(results[dep].status in ("failed", "blocked") for dep in stage.needs):
+                    finish(stage, StageResult(stage.name, "blocked"))
+                    continue
+                if checkpoint is not None:
+                    digests[stage.name] = checkpoint.digest(
+                        stage, {dep: digests[dep] for dep in stage.needs}, {dep: results[dep].output for dep in stage.needs}
+                    )
+                if stage.skip_if and conditions.get(stage.skip_if, lambda: False)():
+                    finish(stage, StageResult(stage.name, "skipped"))
+                    continue
+                cached = checkpoint.lookup(stage.name, digests[stage.name]) if checkpoint is not None else None
+                if cached is not None:
+                    finish(stage, StageResult(stage.name, "resumed", cached))
+                    continue
+                inputs = {dep: results[dep].output for dep in stage.needs}
+                notify("start", stage, None)
+                running[executor.submit(run_stage, stage, inputs)] = (stage, time.monotonic())
+
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, started = running.pop(future)
+                elapsed = round(time.monotonic() - started, 3)
+                try:
+                    output = future.result()
+                    if is_failure_output(output):
+                        # Agentes reportam falha na própria saída (ERRO..., "Falha ao atingir conformidade")
+                        logger.error(f"Etapa {stage.name} falhou: {output[:200]}")
+                        finish(stage, StageResult(stage.name, "failed", output, elapsed, error=output[:200]))
+                        continue
+                    if checkpoint is not None:
+                        checkpoint.record(stage.name, digests[stage.name], output, elapsed)
+                    finish(stage, StageResult(stage.name, "done", output, elapsed))
+                except Exception as e:
+                    logger.error(f"Etapa {stage.name} falhou: {e}")
+                    finish(stage, StageResult(stage.name, "failed", elapsed_s=elapsed, error=str(e)))
+
+    return {stage.name: results[stage.name] for stage in stages}
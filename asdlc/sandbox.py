@@ -0,0 +1,103 @@
+"""
+A-SDLC Framework - Sandbox de Validação
+Cópias isoladas do projeto para validar candidatos de implementação em
+paralelo sem tocar na árvore real, e extração dos arquivos gerados pela LLM
+(blocos de código anotados com o caminho) para aplicá-los numa sandbox.
+"""
+
+import logging
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# Entradas da raiz do projeto não copiadas para a sandbox (src/build/ etc. são copiados)
+SANDBOX_IGNORE = (".git", ".asdlc", "dist", "build")
+# Caches ignorados em qualquer nível
+SANDBOX_IGNORE_CACHES = ("__pycache__", ".pytest_cache", ".mypy_cache")
+# Pesados e só leitura durante os testes: entram na sandbox como symlink (nunca recebem arquivos gerados)
+SANDBOX_SYMLINK_DIRS = ("node_modules", "venv", ".venv", "target", ".pio")
+
+# ```python caminho/arquivo.py
+_FENCE_WITH_PATH = re.compile(r"```[\w+-]*[ \t]+([\w./-]+\.\w+)[ \t]*\n(.*?)```", re.DOTALL)
+# --- ARQUIVO: caminho --- (formato usado no contexto do harness) seguido de bloco
+_HEADER_THEN_FENCE = re.compile(r"(?:ARQUIVO|FILE):\s*`?([\w./-]+\.\w+)`?[^\n]*\n+```[^\n]*\n(.*?)```", re.DOTALL)
+# ```python\n# arquivo: caminho/arquivo.py
+_FENCE_WITH_COMMENT = re.compile(
+    r"```[^\n]*\n[ \t]*(?:#|//)[ \t]*(?:arquivo|file|path)[ \t]*:[ \t]*([\w./-]+\.\w+)[ \t]*\n(.*?)```",
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+def create_sandbox(project_root: Path) -> Path:
+    """Cria uma cópia isolada do projeto em um diretório temporário."""
+    sandbox = Path(tempfile.mkdtemp(prefix="asdlc-sandbox-")) / project_root.name
+    top_level = set(SANDBOX_IGNORE + SANDBOX_SYMLINK_DIRS)
+    ignore_caches = shutil.ignore_patterns(*SANDBOX_IGNORE_CACHES)
+
+    def ignore(directory: str, names):
+        ignored = set(ignore_caches(directory, names))
+        if Path(directory) == project_root:
+            ignored |= top_level.intersection(names)
+        return ignored
+
+    shutil.copytree(project_root, sandbox, ignore=ignore)
+    for name in SANDBOX_SYMLINK_DIRS:
+        if (project_root / name).is_dir():
+            os.symlink(project_root / name, sandbox / name, target_is_directory=True)
+    return sandbox
+
+
+def remove_sandbox(sandbox: Path) -> None:
+    shutil.rmtree(sandbox.parent, ignore_errors=True)
+
+
+def _safe_relative(path: str) -> bool:
+    parts = Path(path).parts
+    return not Path(path).is_absolute() and ".." not in parts and bool(parts) and parts[0] not in SANDBOX_SYMLINK_DIRS
+
+
+def _inside(target: Path, root: Path) -> bool:
+    """target (com symlinks resolvidos) continua dentro de root."""
+    try:
+        target.resolve().relative_to(root.resolve())
+        return True
+    except ValueError:
+        return False
+
+
+def extract_file_blocks(result: str) -> Dict[str, str]:
+    """
+    Extrai os arquivos da resposta da LLM: blocos de código cujo caminho vem
+    no info string (```python src/app.py), num comentário na primeira linha
+    (# arquivo: src/app.py) ou num cabeçalho "ARQUIVO: src/app.py" logo antes.
+
+    Returns:
+        Dict[str, str]: {caminho relativo: conteúdo}
+    """
+    files: Dict[str, str] = {}
+    for pattern in (_HEADER_THEN_FENCE, _FENCE_WITH_COMMENT, _FENCE_WITH_PATH):
+        for path, content in pattern.findall(result):
+            if _safe_relative(path) and path not in files:
+                files[path] = content
+    return files
+
+
+def apply_file_blocks(files: Dict[str, str], root: Path) -> None:
+    """
+    Escreve os arquivos extraídos sob root (substitui o arquivo, nunca edita no lugar).
+    Caminhos que saem de root (ex: via diretório linkado na sandbox) são ignorados.
+    """
+    for rel_path, content in files.items():
+        target = root / rel_path
+        if not _safe_relative(rel_path) or not _inside(target.parent, root):
+            logger.warning(f"Arquivo fora da sandbox ignorado: {rel_path}")
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.is_symlink() or target.exists():
+            target.unlink()
+        target.write_text(content, encoding="utf-8")
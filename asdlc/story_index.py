@@ -0,0 +1,405 @@
+"""
+A-SDLC Framework - Índice de Stories
+Catálogo SQLite (.asdlc/index.db) das stories e épicos do projeto: campos do
+frontmatter, contagem de checkboxes, dependências, épico, tamanho e mtime de
+cada arquivo em stories/. O índice é atualizado incrementalmente (só arquivos
+com mtime/tamanho diferentes são relidos), então listagens, buscas e métricas
+viram consultas em vez de varrer e reparsear todos os arquivos.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .frontmatter import _scalar, parse_list_value, split_frontmatter
+
+logger = logging.getLogger(__name__)
+
+INDEX_DB_FILE = "index.db"
+# Incrementar ao mudar o schema ou o que é extraído de cada arquivo (força reindexação)
+INDEX_VERSION = 3
+
+STORIES_FOLDER = "stories"
+EPICS_FOLDER = "stories/epics"
+# Status considerados concluídos (formato CLI e formato Agentic), em minúsculas
+DONE_STATUSES = {"done", "concluído", "concluido", "completed"}
+
+# Seções exigidas pelo ASDLCValidator (presença registrada no índice)
+REQUIRED_STORY_SECTIONS = (
+    "---",  # Front matter
+    "title:",
+    "ticket:",
+    "# Plano de Execução",
+    "## 📝 Especificações da Story",
+    "## Manifesto de Arquivos",
+    "## ✅ Critérios de Aceitação",
+)
+
+_CRITERIA = re.compile(r"(critérios de aceitação|criteria|aceitação)", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    stem TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    has_frontmatter INTEGER NOT NULL,
+    frontmatter TEXT NOT NULL,
+    ticket TEXT NOT NULL,
+    story_id TEXT NOT NULL,
+    epic_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    created TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    depends_on TEXT NOT NULL,
+    tasks_open INTEGER NOT NULL,
+    tasks_done INTEGER NOT NULL,
+    total_lines INTEGER NOT NULL,
+    total_words INTEGER NOT NULL,
+    total_chars INTEGER NOT NULL,
+    sections INTEGER NOT NULL,
+    has_criteria INTEGER NOT NULL,
+    has_agents_reference INTEGER NOT NULL,
+    sections_found TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_folder ON files (folder);
+CREATE INDEX IF NOT EXISTS idx_files_ticket ON files (ticket);
+CREATE INDEX IF NOT EXISTS idx_files_epic ON files (epic_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+"""
+
+
+@dataclass
+class StoryEntry:
+    path: str  # relativo à raiz do projeto (formato posix)
+    folder: str
+    name: str
+    stem: str
+    mtime_ns: int
+    size: int
+    has_frontmatter: bool
+    frontmatter: Dict[str, Any] = field(default_factory=dict)
+    ticket: str = ""
+    story_id: str = ""
+    epic_id: str = ""
+    title: str = ""
+    status: str = ""
+    priority: str = ""
+    created: str = ""
+    labels: List[str] = field(default_factory=list)
+    depends_on: List[str] = field(default_factory=list)
+    tasks_open: int = 0
+    tasks_done: int = 0
+    total_lines: int = 0
+    total_words: int = 0
+    total_chars: int = 0
+    sections: int = 0
+    has_criteria: bool = False
+    has_agents_reference: bool = False
+    sections_found: List[str] = field(default_factory=list)
+
+    @property
+    def tasks_total(self) -> int:
+        return self.tasks_open + self.tasks_done
+
+    @property
+    def progress_percentage(self) -> float:
+        return round(self.tasks_done / self.tasks_total * 100, 1) if self.tasks_total else 0
+
+    def to_info(self, project_root: Path) -> Dict[str, Any]:
+        """Dicionário no formato de _extrair_info_story (frontmatter + dados do arquivo)."""
+        info: Dict[str, Any] = dict(self.frontmatter)
+        info["file_path"] = str(project_root / self.path)
+        info["file_size"] = self.size
+        info["modified"] = datetime.fromtimestamp(self.mtime_ns / 1e9)
+        if "_" in self.stem:
+            info["story_id"] = self.stem.split("_")[0]
+        return info
+
+
+def _text_field(frontmatter: Dict[str, Any], key: str) -> str:
+    """Campo escalar do frontmatter como texto (o YAML e o parser tolerante podem devolver listas)."""
+    return _scalar(frontmatter.get(key))
+
+
+def _list_field(frontmatter: Dict[str, Any], key: str) -> List[str]:
+    value = frontmatter.get(key)
+    if isinstance(value, list):
+        return [_scalar(item) for item in value]
+    return parse_list_value(_scalar(value))
+
+
+def _scan_file(project_root: Path, path: Path) -> StoryEntry:
+    stat = path.stat()
+    data = path.read_bytes()
+    header = split_frontmatter(data)
+    content = data.decode("utf-8", errors="ignore")
+    rel_path = path.relative_to(project_root).as_posix()
+    frontmatter = header.fields if header else {}
+    return StoryEntry(
+        path=rel_path,
+        folder=path.parent.relative_to(project_root).as_posix(),
+        name=path.name,
+        stem=path.stem,
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        has_frontmatter=header is not None,
+        frontmatter=frontmatter,
+        ticket=_text_field(frontmatter, "ticket"),
+        story_id=path.stem.split("_")[0] if "_" in path.stem else "",
+        epic_id=_text_field(frontmatter, "epic_id").strip(),
+        title=_text_field(frontmatter, "title"),
+        status=_text_field(frontmatter, "status"),
+        priority=_text_field(frontmatter, "priority"),
+        created=_text_field(frontmatter, "created"),
+        labels=_list_field(frontmatter, "labels"),
+        depends_on=_list_field(frontmatter, "depends_on"),
+        tasks_open=len(re.findall(r"- \[ \]", content)),
+        tasks_done=len(re.findall(r"- \[x\]", content, re.IGNORECASE)),
+        total_lines=len(content.split("\n")),
+        total_words=len(content.split()),
+        total_chars=len(content),
+        sections=len(re.findall(r"^##\s+", content, re.MULTILINE)),
+        has_criteria=bool(_CRITERIA.search(content)),
+        has_agents_reference=".asdlc/agents/" in content or "agente" in content.lower(),
+        sections_found=[section for section in REQUIRED_STORY_SECTIONS if section in content],
+    )
+
+
+_JSON_COLUMNS = ("frontmatter", "labels", "depends_on", "sections_found")
+_BOOL_COLUMNS = ("has_frontmatter", "has_criteria", "has_agents_reference")
+_COLUMNS = [name for name in StoryEntry.__dataclass_fields__]
+
+
+def _to_row(entry: StoryEntry) -> Tuple:
+    values = []
+    for name in _COLUMNS:
+        value = getattr(entry, name)
+        if name in _JSON_COLUMNS:
+            value = json.dumps(value, ensure_ascii=False)
+        elif name in _BOOL_COLUMNS:
+            value = int(value)
+        values.append(value)
+    return tuple(values)
+
+
+def _from_row(row: sqlite3.Row) -> StoryEntry:
+    values = {}
+    for name in _COLUMNS:
+        value = row[name]
+        if name in _JSON_COLUMNS:
+            value = json.loads(value)
+        elif name in _BOOL_COLUMNS:
+            value = bool(value)
+        values[name] = value
+    return StoryEntry(**values)
+
+
+class AmbiguousStoryId(ValueError):
+    """O ID informado corresponde a mais de uma story."""
+
+    def __init__(self, story_id: str, matches: List[Path]):
+        self.story_id = story_id
+        self.matches = matches
+        names = ", ".join(path.name for path in matches)
+        super().__init__(f"ID de story ambíguo '{story_id}': {len(matches)} correspondências ({names})")
+
+
+def _db_generation(conn: sqlite3.Connection) -> int:
+    """Contador de escritas gravado no próprio índice (visível para todos os processos)."""
+    return conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+
+def _prepare_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Cria (ou recria, se a versão mudou) o schema. Fecha a conexão se falhar."""
+    try:
+        conn.row_factory = sqlite3.Row
+        if conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            conn.execute("DROP TABLE IF EXISTS files")
+            conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        conn.executescript(_SCHEMA)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+class StoryIndex:
+    """Índice SQLite das stories de um projeto (uma conexão por operação; seguro entre threads)."""
+
+    def __init__(self, project_root: Path):
+        self.project_root = project_root
+        self.db_path = project_root / ".asdlc" / INDEX_DB_FILE
+        self._lock = threading.Lock()
+        self._tickets: Dict[str, List[str]] = {}
+        self._ticket_keys: List[str] = []
+        # Geração do índice (_db_generation) em que os agregados em memória foram calculados
+        self._tickets_generation: Optional[int] = None
+        self._epic_counts: Optional[Tuple[int, Dict[str, Tuple[int, int]]]] = None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = _prepare_connection(sqlite3.connect(self.db_path, timeout=30))
+        except (OSError, sqlite3.Error) as e:
+            # Projeto somente leitura ou índice corrompido: índice em memória (reconstruído a cada uso)
+            logger.warning(f"Índice de stories indisponível em {self.db_path}, usando memória: {e}")
+            conn = _prepare_connection(sqlite3.connect(":memory:"))
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _refresh(self, conn: sqlite3.Connection) -> bool:
+        """Reindexa os arquivos alterados. Retorna True se algo mudou."""
+        stories_dir = self.project_root / STORIES_FOLDER
+        current: Dict[str, Path] = {}
+        if stories_dir.exists():
+            for path in stories_dir.rglob("*.md"):
+                current[path.relative_to(self.project_root).as_posix()] = path
+
+        known = {row["path"]: (row["mtime_ns"], row["size"]) for row in conn.execute("SELECT path, mtime_ns, size FROM files")}
+        removed = [rel_path for rel_path in known if rel_path not in current]
+        changed = []
+        for rel_path, path in current.items():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if known.get(rel_path) != (stat.st_mtime_ns, stat.st_size):
+                try:
+                    changed.append(_to_row(_scan_file(self.project_root, path)))
+                except (OSError, ValueError, TypeError) as e:
+                    # Uma story malformada não pode derrubar as consultas das demais
+                    logger.warning(f"Erro ao indexar story {path}, ignorando: {e}")
+
+        if removed:
+            conn.executemany("DELETE FROM files WHERE path = ?", [(rel_path,) for rel_path in removed])
+        if changed:
+            placeholders = ", ".join("?" for _ in _COLUMNS)
+            conn.executemany(
+                f"INSERT OR REPLACE INTO files ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                changed,
+            )
+        if removed or changed:
+            logger.debug(f"Índice de stories atualizado: {len(changed)} alteradas, {len(removed)} removidas.")
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+            return True
+        return False
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[StoryEntry]:
+        with self._lock, self._connect() as conn:
+            self._refresh(conn)
+            return [_from_row(row) for row in conn.execute(sql, params)]
+
+    def entries(self, folder: Optional[str] = STORIES_FOLDER) -> List[StoryEntry]:
+        """Arquivos .md de uma pasta (sem subpastas), ou de toda stories/ com folder=None."""
+        if folder is None:
+            return self._query("SELECT * FROM files ORDER BY path")
+        return self._query("SELECT * FROM files WHERE folder = ? ORDER BY path", (folder,))
+
+    def _ticket_map(self) -> Tuple[Dict[str, List[str]], List[str]]:
+        """
+        Mapa chave → caminhos (ticket do frontmatter e nome do arquivo sem extensão)
+        das stories de stories/, com as chaves ordenadas para buscas por prefixo.
+        Reconstruído só quando alguma story muda (mtime/tamanho), inclusive edições de ticket
+        e reindexações feitas por outro processo (CLI e servidor MCP compartilham o índice).
+        """
+        with self._lock, self._connect() as conn:
+            changed = self._refresh(conn)
+            generation = _db_generation(conn)
+            if not changed and self._tickets_generation == generation:
+                return self._tickets, self._ticket_keys
+            tickets: Dict[str, List[str]] = {}
+            for row in conn.execute("SELECT path, ticket, stem FROM files WHERE folder = ?", (STORIES_FOLDER,)):
+                for key in {row["ticket"], row["stem"]} - {""}:
+                    tickets.setdefault(key, []).append(row["path"])
+            self._tickets = tickets
+            self._ticket_keys = sorted(tickets)
+            self._tickets_generation = generation
+            return tickets, self._ticket_keys
+
+    def find_by_prefix(self, prefix: str) -> List[Path]:
+        """Stories de stories/ cujo ticket ou nome de arquivo começa com o prefixo."""
+        tickets, keys = self._ticket_map()
+        paths = set()
+        for i in range(bisect_left(keys, prefix), len(keys)):
+            if not keys[i].startswith(prefix):
+                break
+            paths.update(tickets[keys[i]])
+        return [self.project_root / rel_path for rel_path in sorted(paths)]
+
+    def find_by_id(self, story_id: str) -> Optional[Path]:
+        """
+        Story de stories/ pelo ticket ou nome de arquivo exato; sem correspondência
+        exata, pelo prefixo (ex: "20260425_2239").
+
+        Raises:
+            AmbiguousStoryId: Se o ID corresponder a mais de uma story
+        """
+        tickets, _ = self._ticket_map()
+        exact = tickets.get(story_id)
+        if exact is not None:
+            matches = [self.project_root / rel_path for rel_path in sorted(set(exact))]
+        else:
+            matches = self.find_by_prefix(story_id)
+        if len(matches) > 1:
+            raise AmbiguousStoryId(story_id, matches)
+        return matches[0] if matches else None
+
+    def epic_counts(self) -> Dict[str, Tuple[int, int]]:
+        """
+        epic_id → (total, concluídas) das stories de stories/, numa única passada
+        pelo índice. O resultado fica em memória até alguma story mudar (mtime/tamanho),
+        mesmo que a reindexação tenha sido feita por outro processo.
+        """
+        with self._lock, self._connect() as conn:
+            changed = self._refresh(conn)
+            generation = _db_generation(conn)
+            if not changed and self._epic_counts is not None and self._epic_counts[0] == generation:
+                return self._epic_counts[1]
+            counts: Dict[str, Tuple[int, int]] = {}
+            rows = conn.execute("SELECT epic_id, status FROM files WHERE folder = ? AND epic_id != ''", (STORIES_FOLDER,))
+            for row in rows:
+                total, done = counts.get(row["epic_id"], (0, 0))
+                counts[row["epic_id"]] = (total + 1, done + (row["status"].strip().lower() in DONE_STATUSES))
+            self._epic_counts = (generation, counts)
+            return counts
+
+    def epic_progress(self, epic_id: str) -> Tuple[int, int]:
+        """(total, concluídas) das stories cujo epic_id é exatamente o informado."""
+        return self.epic_counts().get(epic_id, (0, 0))
+
+
+_indexes: Dict[str, StoryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_story_index(project_root: Path) -> StoryIndex:
+    """Índice do projeto (uma instância por raiz resolvida)."""
+    project_root = Path(project_root).resolve()
+    key = str(project_root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = StoryIndex(project_root)
+            _indexes[key] = index
+        return index
@@ -4,6 +4,8 @@ Módulo responsável por criar, listar e gerenciar stories do projeto
 """
 
 import logging
+import os
+import threading
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from datetime import datetime
@@ -17,11 +19,21 @@ from rich import print as rprint
 from .plan_generator import gerar_plano_de_execucao
 from .utils import find_project_root, safe_write_file, console, get_project_structure
 from .agent_executor import spawn_agent, validate_and_fix
+from .checkpoint import CheckpointManifest, checkpoint_key
+from .frontmatter import read_frontmatter
+from .story_index import DONE_STATUSES, EPICS_FOLDER, AmbiguousStoryId, get_story_index
+from .pipeline import RUNNER_VALIDATE, Stage, StageResult, load_pipeline, render_task, run_pipeline
 from .llm_client import call_llm
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
+# Stories implementadas simultaneamente por implement_stories (ASDLC_IMPLEMENT_WORKERS)
+DEFAULT_IMPLEMENT_WORKERS = 2
+
+# Stories implementadas em paralelo escrevem nos mesmos arquivos globais (MEMORY.md, BACKLOG.md)
+_memory_lock = threading.Lock()
+
 
 def create_story(
     story_title: str,
@@ -195,7 +207,7 @@ created: "{today}"
 def list_epics() -> List[Dict[str, Any]]:
     """
     Lista todos os épicos do projeto com progresso calculado.
-    Lê apenas o frontmatter YAML dos arquivos de épico (token-efficient).
+    Consulta o índice de stories (.asdlc/index.db) em vez de reler os arquivos.
 
     Returns:
         List[Dict[str, Any]]: Lista de épicos com id, title, status, progresso
@@ -210,47 +222,27 @@ def list_epics() -> List[Dict[str, Any]]:
             logger.info("Nenhum épico encontrado (pasta stories/epics não existe).")
             return []
 
+        index = get_story_index(project_root)
+        # Progresso: stories filhas por epic_id, agregadas numa única passada
+        counts = index.epic_counts()
         epics = []
-        for epic_file in epics_dir.glob("*.md"):
-            try:
-                content = epic_file.read_text(encoding="utf-8")
-                # Extrair frontmatter apenas (até segundo ---)
-                fm_match = re.search(r"^---\n(.*?)\n---", content, re.DOTALL)
-                if not fm_match:
-                    continue
-
-                fm_text = fm_match.group(1)
-                epic_id = re.search(r'epic_id:\s*"?([^"\n]+)"?', fm_text)
-                title = re.search(r'title:\s*"?([^"\n]+)"?', fm_text)
-                status = re.search(r'status:\s*"?([^"\n]+)"?', fm_text)
-
-                if not epic_id:
-                    continue
-
-                eid = epic_id.group(1).strip()
-
-                # Calcular progresso: stories filhas com este epic_id
-                stories_dir = project_root / "stories"
-                total, done = 0, 0
-                for sf in stories_dir.glob("*.md"):
-                    sc = sf.read_text(encoding="utf-8")[:500]  # só frontmatter
-                    if eid in sc:
-                        total += 1
-                        if "CONCLUÍDO" in sc or "Done" in sc:
-                            done += 1
-
-                epics.append(
-                    {
-                        "epic_id": eid,
-                        "title": title.group(1).strip() if title else eid,
-                        "status": status.group(1).strip() if status else "DESCONHECIDO",
-                        "stories_total": total,
-                        "stories_done": done,
-                        "file": str(epic_file),
-                    }
-                )
-            except Exception as e:
-                logger.warning(f"Erro ao processar épico {epic_file}: {e}")
+        for entry in index.entries(EPICS_FOLDER):
+            eid = entry.epic_id
+            if not eid:
+                continue
+
+            total, done = counts.get(eid, (0, 0))
+
+            epics.append(
+                {
+                    "epic_id": eid,
+                    "title": entry.title.strip() or eid,
+                    "status": entry.status.strip() or "DESCONHECIDO",
+                    "stories_total": total,
+                    "stories_done": done,
+                    "file": str(project_root / entry.path),
+                }
+            )
 
         logger.info(f"Total de épicos encontrados: {len(epics)}")
         return epics
@@ -280,14 +272,13 @@ def update_epic_progress(epic_id: str) -> bool:
         if not project_root:
             return False
 
-        epics = list_epics()
-        epic = next((e for e in epics if e["epic_id"] == epic_id), None)
+        index = get_story_index(project_root)
+        epic = next((entry for entry in index.entries(EPICS_FOLDER) if entry.epic_id == epic_id), None)
         if not epic:
             logger.warning(f"Épico {epic_id} não encontrado para atualização de progresso.")
             return False
 
-        done = epic["stories_done"]
-        total = epic["stories_total"]
+        total, done = index.epic_progress(epic_id)
 
         # Atualizar MEMORY.md — apenas a contagem na linha do épico
         memory_path = project_root / "stories" / "MEMORY.md"
@@ -299,7 +290,7 @@ def update_epic_progress(epic_id: str) -> bool:
                 rf"\1 {done}/{total} concluídas",
                 memory,
             )
-            if epic["status"] == "CONCLUÍDO" or (total > 0 and done == total):
+            if epic.status == "CONCLUÍDO" or (total > 0 and done == total):
                 updated = updated.replace(f"| {epic_id} ", f"| {epic_id} ").replace("EM ANDAMENTO", "CONCLUÍDO", 1)
 
             safe_write_file(memory_path, updated)
@@ -335,17 +326,8 @@ def list_stories() -> List[Dict[str, Any]]:
             logger.info("Diretório de stories não encontrado. Nenhuma story criada ainda.")
             return []
 
-        stories = []
-
-        # Procurar por arquivos .md no diretório stories
-        for story_file in stories_dir.glob("*.md"):
-            try:
-                story_info = _extrair_info_story(story_file)
-                if story_info:
-                    stories.append(story_info)
-                    logger.debug(f"Story processada: {story_info.get('title', 'N/A')}")
-            except Exception as e:
-                logger.warning(f"Erro ao processar story {story_file}: {e}")
+        # Stories com frontmatter, do índice (.asdlc/index.db)
+        stories = [entry.to_info(project_root) for entry in get_story_index(project_root).entries() if entry.has_frontmatter]
 
         logger.info(f"Total de stories encontradas: {len(stories)}")
 
@@ -524,25 +506,13 @@ def _extrair_info_story(story_file: Path) -> Optional[Dict[str, Any]]:
         Optional[Dict[str, Any]]: Informações da story
     """
     try:
-        with open(story_file, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # Extrair frontmatter
-        frontmatter_match = re.search(r"^---\s*\n(.*?)\n---\s*\n", content, re.DOTALL)
-        if not frontmatter_match:
+        # Só o cabeçalho é lido (o corpo da story não é necessário aqui)
+        frontmatter = read_frontmatter(story_file)
+        if not frontmatter:
             logger.warning(f"Frontmatter não encontrado em {story_file}")
             return None
 
-        frontmatter = frontmatter_match.group(1)
-
-        # Extrair campos do frontmatter
-        info = {}
-        for line in frontmatter.split("\n"):
-            if ":" in line:
-                key, value = line.split(":", 1)
-                key = key.strip()
-                value = value.strip().strip('"')
-                info[key] = value
+        info: Dict[str, Any] = dict(frontmatter.fields)
 
         # Adicionar informações do arquivo
         info["file_path"] = str(story_file)
@@ -596,25 +566,39 @@ def _mostrar_lista_stories(stories: List[Dict[str, Any]]) -> None:
     print("Listagem concluida")
 
 
-def implement_story(story_id: str) -> bool:
+def implement_story(story_id: str, resume: bool = True) -> bool:
     """
     Inicia o processo de implementação de uma story usando Agentes Especialistas.
+
+    Args:
+        resume: Reaproveita as etapas já concluídas cujas entradas não mudaram
+            (checkpoint em .asdlc/checkpoints/<ticket>/). False refaz tudo.
     """
-    story_path = _encontrar_story_por_id(story_id)
+    try:
+        story_path = _encontrar_story_por_id(story_id)
+    except AmbiguousStoryId as e:
+        logger.error(f"{e}. Informe o ticket completo.")
+        return False
     if not story_path:
         logger.error(f"Story com ID {story_id} não encontrada.")
         return False
 
+    return _implementar_story_arquivo(story_path, resume)
+
+
+def _implementar_story_arquivo(story_path: Path, resume: bool = True) -> bool:
+    """Implementa a story do arquivo informado, atualizando status e memória global."""
     story_info = _extrair_info_story(story_path)
     if not story_info:
-        logger.error(f"Não foi possível ler os dados da story {story_id}.")
+        logger.error(f"Não foi possível ler os dados da story {story_path.name}.")
         return False
+    story_id = _story_key(story_info)
 
     # Atualizar status para In Progress
     _atualizar_status_story(story_path, "In Progress")
 
     # Executar implementação
-    success = _executar_etapas_implementacao(story_info)
+    success = _executar_etapas_implementacao(story_info, resume=resume)
 
     if success:
         _atualizar_status_story(story_path, "Done")
@@ -632,20 +616,191 @@ def implement_story(story_id: str) -> bool:
     return success
 
 
-def _executar_etapas_implementacao(story_info: Dict[str, Any]) -> bool:
+def implement_stories(
+    story_ids: Optional[List[str]] = None, max_workers: Optional[int] = None, resume: bool = True
+) -> Dict[str, str]:
+    """
+    Implementa várias stories respeitando o grafo de depends_on do frontmatter.
+
+    Stories independentes rodam em paralelo (até max_workers); uma story cuja
+    dependência falhou (ou não está concluída) fica bloqueada.
+
+    Args:
+        story_ids: IDs/tickets a implementar. None implementa todas as pendentes.
+        max_workers: Stories simultâneas (padrão: ASDLC_IMPLEMENT_WORKERS ou 2)
+
+    Returns:
+        Dict[str, str]: Status por story: done, failed, blocked, missing ou ambiguous
+    """
+    project_root = find_project_root()
+    if not project_root:
+        logger.error("❌ Operação cancelada. Execute este comando de dentro de um projeto A-SDLC.")
+        return {}
+
+    catalog = _carregar_catalogo_stories(project_root)
+    results: Dict[str, str] = {}
+
+    if story_ids is None:
+        selected = [key for key, info in catalog.items() if not _story_concluida(info)]
+    else:
+        selected = []
+        for story_id in story_ids:
+            try:
+                key = _resolver_story_key(story_id, catalog, project_root)
+            except AmbiguousStoryId as e:
+                logger.error(f"{e}. Informe o ticket completo.")
+                results[story_id] = "ambiguous"
+                continue
+            if key is None:
+                logger.error(f"Story com ID {story_id} não encontrada.")
+                results[story_id] = "missing"
+            elif key not in selected:
+                selected.append(key)
+
+    if not selected:
+        console.print("[yellow]Nenhuma story pendente para implementar.[/yellow]")
+        return results
+
+    # depends_on pode citar o ticket ou o nome do arquivo; não resolvidas ficam como estão (nunca concluídas)
+    depends: Dict[str, List[str]] = {}
+    for key in selected:
+        depends[key] = []
+        for dep in catalog[key]["depends_on"]:
+            try:
+                depends[key].append(_resolver_story_key(dep, catalog, project_root) or dep)
+            except AmbiguousStoryId as e:
+                logger.warning(f"Dependência de {key}: {e}")
+                depends[key].append(dep)
+
+    # Dependências fora do lote precisam já estar concluídas; o bloqueio se propaga no lote
+    selected_set = set(selected)
+    blocked: Dict[str, List[str]] = {}
+    changed = True
+    while changed:
+        changed = False
+        for key in selected:
+            if key in blocked:
+                continue
+            unmet = [
+                dep
+                for dep in depends[key]
+                if dep in blocked or (dep not in selected_set and not _story_concluida(catalog.get(dep)))
+            ]
+            if unmet:
+                blocked[key] = unmet
+                changed = True
+
+    for key, unmet in blocked.items():
+        console.print(f"[bold red]BLOQUEADA[/bold red] {key}: dependências não concluídas ({', '.join(unmet)})")
+        results[key] = "blocked"
+
+    # O escalonador de etapas do pipeline também serve para o lote: cada story é um nó do DAG
+    stages = [
+        Stage(
+            name=key,
+            agent="story",
+            task=catalog[key].get("title", key),
+            needs=[dep for dep in depends[key] if dep in selected_set],
+        )
+        for key in selected
+        if key not in blocked
+    ]
+
+    def run_story(stage: Stage, inputs: Dict[str, str]) -> str:
+        info = catalog[stage.name]
+        if not _implementar_story_arquivo(Path(info["file_path"]), resume):
+            raise RuntimeError(f"implementação da story {stage.name} falhou")
+        return "done"
+
+    def on_event(event: str, stage: Stage, result: Optional[StageResult]) -> None:
+        if event == "start":
+            console.print(f"[bold cyan]▶ Story {stage.name}[/bold cyan] iniciada: {stage.task}")
+        elif result.status == "done":
+            console.print(f"[bold green]✔ Story {stage.name}[/bold green] concluída [dim]({result.elapsed_s:.1f}s)[/dim]")
+        elif result.status == "blocked":
+            console.print(f"[bold red]BLOQUEADA[/bold red] {stage.name}: uma dependência falhou")
+        else:
+            console.print(f"[bold red]✘ Story {stage.name}[/bold red] {result.status}")
+
+    if max_workers is None:
+        max_workers = int(os.getenv("ASDLC_IMPLEMENT_WORKERS", str(DEFAULT_IMPLEMENT_WORKERS)))
+
+    try:
+        stage_results = run_pipeline(stages, run_story, max_workers=max_workers, on_event=on_event)
+    except ValueError as e:
+        logger.error(f"Grafo de dependências inválido: {e}")
+        return {**results, **{stage.name: "blocked" for stage in stages}}
+
+    results.update({name: r.status for name, r in stage_results.items()})
+    summary = ", ".join(f"{status}={list(results.values()).count(status)}" for status in sorted(set(results.values())))
+    console.print(Panel(f"[bold]Lote de stories finalizado[/bold]: {summary}", border_style="blue"))
+    return results
+
+
+def _story_concluida(info: Optional[Dict[str, Any]]) -> bool:
+    return bool(info) and str(info.get("status", "")).lower() in DONE_STATUSES
+
+
+def _carregar_catalogo_stories(project_root: Path) -> Dict[str, Dict[str, Any]]:
+    """Stories do projeto indexadas pelo ticket (ou nome completo do arquivo), com depends_on já parseado."""
+    catalog: Dict[str, Dict[str, Any]] = {}
+    stories_dir = project_root / "stories"
+    if not stories_dir.exists():
+        return catalog
+
+    for entry in get_story_index(project_root).entries():
+        if entry.name == "MEMORY.md" or not entry.has_frontmatter:
+            continue
+        info = entry.to_info(project_root)
+        info["depends_on"] = entry.depends_on
+        catalog[_story_key(info)] = info
+    return catalog
+
+
+def _story_key(story_info: Dict[str, Any]) -> str:
+    """
+    Identificador único da story: ticket do frontmatter ou nome completo do arquivo.
+    Nunca o story_id, que é só o prefixo de data e se repete entre stories do mesmo dia.
+    """
+    return story_info.get("ticket") or Path(story_info["file_path"]).stem
+
+
+def _resolver_story_key(story_id: str, catalog: Dict[str, Dict[str, Any]], project_root: Path) -> Optional[str]:
+    """
+    Resolve um ID (ticket ou nome do arquivo, exato ou prefixo) para a chave do catálogo.
+
+    Raises:
+        AmbiguousStoryId: Se o ID corresponder a mais de uma story
+    """
+    if story_id in catalog:
+        return story_id
+    story_path = get_story_index(project_root).find_by_id(story_id)
+    if story_path is None:
+        return None
+    for key, info in catalog.items():
+        if Path(info["file_path"]).resolve() == story_path.resolve():
+            return key
+    return None
+
+
+def _executar_etapas_implementacao(story_info: Dict[str, Any], resume: bool = True) -> bool:
     """
     Executa etapas de implementação da story com TDD obrigatório.
 
-    Fluxo TDD: Architecture → Test (Red) → Code (Green) → Review
+    Fluxo TDD (DAG padrão, ver pipeline.DEFAULT_STAGES):
+    Architecture + Test (Red) → Code (Green) → Validação + Review
+
+    Etapas independentes rodam em paralelo. Se testes já existirem para o cenário
+    (ex: bug com teste de regressão), pula a fase Red e vai direto para Code.
+    O DAG pode ser customizado em .asdlc/pipeline.yaml.
 
-    Se testes já existirem para o cenário (ex: bug com teste de regressão),
-    pula a fase Red e vai direto para Code.
+    A saída de cada etapa é salva em checkpoint: numa nova execução, a retomada
+    começa na primeira etapa cujas entradas mudaram.
     """
     try:
         title = story_info.get("title", "Story")
-        story_id = story_info.get("story_id")
-
-        from .utils import is_headless
+        # Chave única (harness, grafo de delegação, slots e memória são por story)
+        story_id = _story_key(story_info)
 
         console.print(
             Panel(
@@ -660,57 +815,62 @@ def _executar_etapas_implementacao(story_info: Dict[str, Any]) -> bool:
             if f.strip()
         ]
 
-        # 1. Design
-        console.print(f"[bold cyan]Etapa 1/5:[/bold cyan] Design da Arquitetura...")
-        design_task = f"Analise a story '{title}' e defina a melhor abordagem arquitetural."
-        spawn_agent("architecture", story_id, design_task, [])
-        console.print(f"[bold green]OK[/bold green] Etapa 1 Concluída!")
-
-        # 2. Verificar se testes já existem (ex: bug com teste de regressão)
-        tests_already_exist = _verificar_testes_existentes(story_info)
-
-        if not tests_already_exist:
-            # 2.1 TDD Red Phase - Criar testes que FALHAM
-            console.print(f"[bold magenta]Etapa 2/5:[/bold magenta] TDD Red Phase - Criando testes que falham...")
-            tdd_red_task = (
-                f"Crie testes para a story '{title}' que descrevam o comportamento esperado. "
-                f"Os testes DEVEM falhar neste ponto pois o código ainda não foi implementado. "
-                f"Foque nos Critérios de Aceitação da story."
+        project_root = find_project_root()
+        stages = load_pipeline(project_root)
+        checkpoint = None
+        if project_root and story_info.get("file_path"):
+            story_path = Path(story_info["file_path"])
+            checkpoint = CheckpointManifest(
+                project_root, checkpoint_key(story_path, story_info.get("ticket", "")), story_path, relevant_files
             )
-            spawn_agent("test", story_id, tdd_red_task, relevant_files)
-            console.print(f"[bold green]OK[/bold green] Etapa 2 Concluída (testes criados, devem falhar)")
-        else:
-            console.print(f"[bold yellow]Etapa 2/5:[/bold yellow] TDD Red Phase - Testes já existem, pulando...")
-
-        # 3. Code Green Phase - Implementar até testes passarem
-        console.print(f"[bold yellow]Etapa 3/5:[/bold yellow] TDD Green Phase - Implementando código...")
-        code_task = (
-            f"Implemente a story '{title}'. "
-            f"O código DEVE fazer os testes existentes passarem. "
-            f"Execute os testes após cada mudança significativa."
+            if not resume:
+                checkpoint.clear()
+        positions = {stage.name: i + 1 for i, stage in enumerate(stages)}
+
+        def run_stage(stage: Stage, inputs: Dict[str, str]) -> str:
+            task = render_task(stage, {"title": title, "story_id": story_id, **inputs})
+            files = relevant_files if stage.use_relevant_files else []
+            if stage.runner == RUNNER_VALIDATE:
+                return validate_and_fix(stage.agent, story_id, task, files)
+            return spawn_agent(stage.agent, story_id, task, files)
+
+        def on_event(event: str, stage: Stage, result: Optional[StageResult]) -> None:
+            step = f"Etapa {positions[stage.name]}/{len(stages)}"
+            label = stage.label or stage.name
+            if event == "start":
+                console.print(f"[bold cyan]{step}:[/bold cyan] {label}...")
+            elif result.status == "done":
+                console.print(f"[bold green]OK[/bold green] {step} Concluída! [dim]({result.elapsed_s:.1f}s)[/dim]")
+            elif result.status == "resumed":
+                console.print(f"[bold green]OK[/bold green] {step}: {label} - reaproveitada do checkpoint")
+            elif result.status == "skipped":
+                console.print(f"[bold yellow]{step}:[/bold yellow] {label} - Testes já existem, pulando...")
+            else:
+                console.print(f"[bold red]{step}:[/bold red] {label} - {result.status}")
+
+        results = run_pipeline(
+            stages,
+            run_stage,
+            conditions={"tests_exist": lambda: _verificar_testes_existentes(story_info)},
+            on_event=on_event,
+            checkpoint=checkpoint,
         )
-        code_result = validate_and_fix("code", story_id, code_task, relevant_files)
-        console.print(f"[bold green]OK[/bold green] Etapa 3 Concluída!")
-
-        # 4. Validação final de testes
-        console.print(f"[bold magenta]Etapa 4/5:[/bold magenta] Validação Final de Testes...")
-        validation_task = (
-            f"Execute TODOS os testes do projeto e valide que os Critérios de Aceitação "
-            f"da story '{title}' estão cobertos. Reporte cobertura."
-        )
-        spawn_agent("test", story_id, validation_task, relevant_files)
-        console.print(f"[bold green]OK[/bold green] Etapa 4 Concluída!")
 
-        # 5. Revisão
-        console.print(f"[bold blue]Etapa 5/5:[/bold blue] Code Review...")
-        review_result = spawn_agent("review", story_id, "Revise a implementação.", relevant_files)
-        console.print(f"[bold green]OK[/bold green] Etapa 5 Concluída!")
+        timings = ", ".join(f"{name}={r.elapsed_s:.1f}s" for name, r in results.items() if r.status == "done")
+        logger.info(f"Tempo por etapa ({story_id}): {timings}")
+
+        failed = [name for name, r in results.items() if r.status in ("failed", "blocked")]
+        if failed:
+            logger.error(f"Etapas não concluídas: {', '.join(failed)}")
+            return False
 
         console.print(
             Panel("[bold green]Finalizado: Pipeline A-SDLC (TDD) Concluido com Sucesso![/bold green]", border_style="green")
         )
 
-        # 6. Persistência
+        # Persistência
+        code_result = results["code"].output if "code" in results else ""
+        review_result = results["review"].output if "review" in results else ""
         _registrar_na_memoria_global(story_id, title, code_result)
         _atualizar_backlog_com_sugestoes(review_result)
         return True
@@ -791,27 +951,22 @@ def _atualizar_status_story(story_path: Path, status: str) -> None:
 
 def _encontrar_story_por_id(story_id: str) -> Optional[Path]:
     """
-    Encontra arquivo da story pelo ID
+    Encontra arquivo da story pelo ID (ticket ou nome do arquivo, exato ou prefixo)
 
     Args:
         story_id: ID da story
 
     Returns:
         Optional[Path]: Caminho do arquivo da story
+
+    Raises:
+        AmbiguousStoryId: Se o ID corresponder a mais de uma story
     """
     project_root = find_project_root()
     if not project_root:
         return None
 
-    stories_dir = project_root / "stories"
-    if not stories_dir.exists():
-        return None
-
-    for story_file in stories_dir.glob("*.md"):
-        if story_id in story_file.stem:
-            return story_file
-
-    return None
+    return get_story_index(project_root).find_by_id(story_id)
 
 
 def _calcular_metricas_story(story_file: Path) -> Dict[str, Any]:
@@ -926,7 +1081,6 @@ def _registrar_na_memoria_global(story_id: str, title: str, summary: str) -> Non
         if not memory_file.exists():
             memory_file.write_text("# 🧠 Memória do Projeto\n\n## 📋 Histórico de Implementações\n\n", encoding="utf-8")
 
-        content = memory_file.read_text(encoding="utf-8")
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
 
         # Resumo curto (primeiras 2 linhas ou 200 chars)
@@ -934,12 +1088,14 @@ def _registrar_na_memoria_global(story_id: str, title: str, summary: str) -> Non
 
         entry = f"### ✅ {story_id} - {title}\n- **Data:** {timestamp}\n- **Resumo:** {short_summary}\n\n"
 
-        if story_id not in content:
-            with open(memory_file, "a", encoding="utf-8") as f:
-                f.write(entry)
-            logger.info(f"Memória global atualizada com sucesso para {story_id}.")
-        else:
-            logger.info(f"Story {story_id} já consta na memória. Registro ignorado para evitar duplicidade.")
+        with _memory_lock:
+            content = memory_file.read_text(encoding="utf-8")
+            if f"### ✅ {story_id} - " not in content:
+                with open(memory_file, "a", encoding="utf-8") as f:
+                    f.write(entry)
+                logger.info(f"Memória global atualizada com sucesso para {story_id}.")
+            else:
+                logger.info(f"Story {story_id} já consta na memória. Registro ignorado para evitar duplicidade.")
 
     except Exception as e:
         logger.warning(f"Não foi possível atualizar a memória global: {e}")
@@ -968,7 +1124,7 @@ def _atualizar_backlog_com_sugestoes(review_result: str) -> None:
 
         if suggestions:
             timestamp = datetime.now().strftime("%Y-%m-%d")
-            with open(backlog_file, "a", encoding="utf-8") as f:
+            with _memory_lock, open(backlog_file, "a", encoding="utf-8") as f:
                 f.write(f"\n## 💡 Novas Sugestões ({timestamp})\n")
                 for s in suggestions:
                     f.write(f"- [ ] {s.strip()}\n")
@@ -0,0 +1,147 @@
+"""
+A-SDLC Framework - Detecção do Comando de Testes
+Resolve o comando de validação do projeto de forma determinística (heurísticas
+de utils.detect_test_framework sobre os manifestos) e persiste o resultado em
+.asdlc/test_command.json. O cache é invalidado quando o mtime de algum
+manifesto muda; a LLM só é consultada quando as heurísticas são inconclusivas,
+e só uma resposta de uma linha que pareça um comando é salva.
+"""
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional
+
+from .checkpoint import FAILURE_PREFIXES
+from .utils import detect_test_framework
+
+logger = logging.getLogger(__name__)
+
+TEST_COMMAND_CACHE_FILE = "test_command.json"
+
+# Arquivos cujo mtime invalida o cache (inclusive quando passam a existir ou deixam de existir)
+MANIFEST_FILES = (
+    "platformio.ini",
+    "Cargo.toml",
+    "go.mod",
+    "package.json",
+    "pyproject.toml",
+    "setup.cfg",
+    "tox.ini",
+    "pytest.ini",
+    "conftest.py",
+    "tests",
+)
+# Configs com várias extensões (jest.config.ts, vitest.config.mjs...): entram pelo nome de cada arquivo encontrado
+MANIFEST_GLOBS = ("jest.config.*", "vitest.config.*")
+
+TEST_COMMANDS = {
+    "platformio": "pio test",
+    "cargo": "cargo test",
+    "go": "go test ./...",
+    "vitest": "npx vitest run",
+    "jest": "npx jest",
+    "npm": "npm test",
+    "pytest": "pytest",
+    "unittest": "python -m unittest",
+}
+
+# Primeiro token de um comando: executável ou caminho (pytest, ./gradlew, make), sem ":" de frase explicativa
+_COMMAND_HEAD = re.compile(r"^[\w./~+-]+(\s|$)")
+
+
+def manifest_mtimes(project_root: Path) -> Dict[str, Optional[int]]:
+    mtimes: Dict[str, Optional[int]] = {}
+    for name in MANIFEST_FILES:
+        try:
+            mtimes[name] = (project_root / name).stat().st_mtime_ns
+        except OSError:
+            mtimes[name] = None
+    for pattern in MANIFEST_GLOBS:
+        for path in sorted(project_root.glob(pattern)):
+            try:
+                mtimes[path.name] = path.stat().st_mtime_ns
+            except OSError:
+                continue
+    return mtimes
+
+
+def _cache_path(project_root: Path) -> Path:
+    return project_root / ".asdlc" / TEST_COMMAND_CACHE_FILE
+
+
+def load_cached_test_command(project_root: Path) -> Optional[str]:
+    """Comando salvo, se nenhum manifesto mudou desde a detecção."""
+    path = _cache_path(project_root)
+    if not path.exists():
+        return None
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cache de comando de testes ilegível, ignorando: {e}")
+        return None
+    if data.get("manifests") != manifest_mtimes(project_root):
+        return None
+    return data.get("command") or None
+
+
+def save_test_command(project_root: Path, command: str, source: str) -> None:
+    """Persiste o comando (source: "heuristic" ou "llm") com os mtimes atuais dos manifestos."""
+    path = _cache_path(project_root)
+    data = {"command": command, "source": source, "manifests": manifest_mtimes(project_root)}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.error(f"Erro ao salvar cache do comando de testes: {e}")
+
+
+def detect_test_command(project_root: Path) -> Optional[str]:
+    """
+    Comando de testes do projeto: do cache ou das heurísticas (e então salvo).
+
+    Returns:
+        Optional[str]: O comando, ou None se as heurísticas forem inconclusivas
+    """
+    cached = load_cached_test_command(project_root)
+    if cached:
+        return cached
+
+    framework = detect_test_framework(project_root, default=None)
+    if framework is None:
+        return None
+    command = TEST_COMMANDS[framework]
+    save_test_command(project_root, command, "heuristic")
+    return command
+
+
+def parse_llm_test_command(answer: str) -> Optional[str]:
+    """
+    Comando contido na resposta do Architecture Agent, ou None se a resposta
+    for um erro (FAILURE_PREFIXES), tiver mais de uma linha ou não parecer um comando.
+    """
+    text = answer.strip()
+    if not text or text.startswith(FAILURE_PREFIXES) or "\n" in text:
+        return None
+    command = text.strip("`").strip().strip("'").strip('"').strip()
+    if not command or not _COMMAND_HEAD.match(command):
+        return None
+    return command
+
+
+def resolve_llm_test_command(project_root: Path, answer: str) -> str:
+    """
+    Usa o comando respondido pela LLM, salvando-o no cache. Respostas inválidas
+    não são salvas: cai no framework padrão de detect_test_framework.
+    """
+    command = parse_llm_test_command(answer)
+    if command:
+        save_test_command(project_root, command, "llm")
+        return command
+
+    logger.warning(f"Resposta do Architecture Agent não é um comando de testes, usando o padrão: {answer[:200]!r}")
+    return TEST_COMMANDS[detect_test_framework(project_root, default="unittest")]
@@ -0,0 +1,223 @@
+"""
+A-SDLC Framework - Seleção Incremental de Testes
+Grafo estático de imports (Python via ast, JS/TS via imports relativos)
+persistido em .asdlc/import_graph.json e atualizado incrementalmente pelo mtime
+de cada arquivo. A partir dos arquivos alterados, seleciona apenas os testes
+que os importam (direta ou transitivamente) para os retries do validate_and_fix.
+"""
+
+import ast
+import json
+import logging
+import os
+import re
+import shlex
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+IMPORT_GRAPH_FILE = "import_graph.json"
+
+IGNORE_DIRS = {".git", ".asdlc", "node_modules", "venv", ".venv", "build", "dist", "__pycache__", "target", ".pio"}
+PY_EXTENSIONS = (".py",)
+JS_EXTENSIONS = (".js", ".jsx", ".mjs", ".ts", ".tsx")
+
+_TEST_FILE_PATTERN = re.compile(r"^(?:test_.*\.py|.*_test\.py|.*\.(?:test|spec)\.(?:js|jsx|mjs|ts|tsx))$")
+_JS_IMPORT_PATTERN = re.compile(
+    r"""(?:\bfrom\s*|\bimport\s*\(?\s*|\brequire\s*\(\s*)['"](\.{1,2}/[^'"]+)['"]""",
+)
+
+# Comandos que aceitam caminhos de arquivos de teste (prefixo do comando → separador antes dos caminhos)
+NARROWABLE_COMMANDS = {
+    "pytest": "",
+    "python -m pytest": "",
+    "npx jest": "",
+    "npx vitest run": "",
+    "npm test": "-- ",
+}
+
+
+def is_test_file(rel_path: str) -> bool:
+    return bool(_TEST_FILE_PATTERN.match(Path(rel_path).name))
+
+
+def _defines_python_tests(tree: ast.Module) -> bool:
+    """Módulo com test_* ou Test* no topo (evita tratar um módulo como asdlc/test_detection.py como teste)."""
+    return any(
+        (isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"))
+        or (isinstance(node, ast.ClassDef) and node.name.startswith("Test"))
+        for node in tree.body
+    )
+
+
+def _resolve_python_module(module: str, known: Set[str]) -> List[str]:
+    base = module.replace(".", "/")
+    for root in ("", "src/"):
+        for candidate in (f"{root}{base}.py", f"{root}{base}/__init__.py"):
+            if candidate in known:
+                return [candidate]
+    return []
+
+
+def _parse_python(rel_path: str, source: str, known: Set[str]) -> Dict:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return {"imports": [], "is_test": False}
+    package = Path(rel_path).parent.parts
+    found: List[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                found += _resolve_python_module(alias.name, known)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                prefix = ".".join(package[: len(package) - node.level + 1])
+                module = ".".join(p for p in (prefix, node.module or "") if p)
+            else:
+                module = node.module or ""
+            resolved = _resolve_python_module(module, known) if module else []
+            for alias in node.names:
+                # "from pacote import modulo" importa o submódulo, se existir
+                submodule = _resolve_python_module(f"{module}.{alias.name}" if module else alias.name, known)
+                resolved += submodule
+            found += resolved
+    return {"imports": sorted(set(found)), "is_test": is_test_file(rel_path) and _defines_python_tests(tree)}
+
+
+def _parse_js(rel_path: str, source: str, known: Set[str]) -> Dict:
+    found = set()
+    base = Path(rel_path).parent
+    for spec in _JS_IMPORT_PATTERN.findall(source):
+        target = os.path.normpath(str(base / spec)).replace(os.sep, "/")
+        candidates = [target] + [target + ext for ext in JS_EXTENSIONS] + [f"{target}/index{ext}" for ext in JS_EXTENSIONS]
+        for candidate in candidates:
+            if candidate in known:
+                found.add(candidate)
+                break
+    return {"imports": sorted(found), "is_test": is_test_file(rel_path)}
+
+
+def _source_files(project_root: Path) -> Dict[str, int]:
+    files: Dict[str, int] = {}
+    for root, dirs, names in os.walk(project_root):
+        dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
+        for name in names:
+            if name.endswith(PY_EXTENSIONS + JS_EXTENSIONS):
+                path = Path(root) / name
+                files[path.relative_to(project_root).as_posix()] = path.stat().st_mtime_ns
+    return files
+
+
+def load_import_graph(project_root: Path) -> Dict[str, Dict]:
+    """
+    Grafo {arquivo: {"imports": arquivos do projeto que ele importa, "is_test"}}. Só os arquivos cujo
+    mtime mudou (ou que são novos) são reanalisados; o resultado é salvo em
+    .asdlc/import_graph.json.
+    """
+    cache_path = project_root / ".asdlc" / IMPORT_GRAPH_FILE
+    cached: Dict[str, Dict] = {}
+    if cache_path.exists():
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8")).get("files", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Grafo de imports ilegível, reconstruindo: {e}")
+
+    current = _source_files(project_root)
+    known = set(current)
+    # Um arquivo novo ou removido pode mudar a resolução dos imports dos demais
+    structure_changed = known != set(cached)
+    files: Dict[str, Dict] = {}
+    reparsed = 0
+    for rel_path, mtime in current.items():
+        entry = cached.get(rel_path)
+        if entry and entry.get("mtime_ns") == mtime and not structure_changed:
+            files[rel_path] = entry
+            continue
+        source = (project_root / rel_path).read_text(encoding="utf-8", errors="replace")
+        parse = _parse_python if rel_path.endswith(PY_EXTENSIONS) else _parse_js
+        files[rel_path] = {"mtime_ns": mtime, **parse(rel_path, source, known)}
+        reparsed += 1
+
+    if reparsed or len(files) != len(cached):
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(json.dumps({"files": files}), encoding="utf-8")
+        except OSError as e:
+            logger.error(f"Erro ao salvar grafo de imports: {e}")
+        logger.info(f"Grafo de imports atualizado ({reparsed} de {len(files)} arquivos analisados).")
+
+    return files
+
+
+def affected_tests(project_root: Path, changed_files: List[str]) -> Optional[List[str]]:
+    """
+    Testes que importam (direta ou transitivamente) algum dos arquivos alterados.
+
+    Returns:
+        Optional[List[str]]: Testes afetados, ou None quando a seleção não é
+        segura (ex: conftest.py alterado) e a suíte completa deve rodar
+    """
+    if any(Path(f).name == "conftest.py" for f in changed_files):
+        return None
+    graph = load_import_graph(project_root)
+    importers: Dict[str, List[str]] = {}
+    for rel_path, entry in graph.items():
+        for target in entry["imports"]:
+            importers.setdefault(target, []).append(rel_path)
+
+    seen: Set[str] = set()
+    stack = [Path(f).as_posix() for f in changed_files if Path(f).as_posix() in graph]
+    while stack:
+        rel_path = stack.pop()
+        if rel_path not in seen:
+            seen.add(rel_path)
+            stack.extend(importers.get(rel_path, []))
+    return sorted(f for f in seen if graph[f]["is_test"])
+
+
+def _has_positional_args(args: str) -> bool:
+    """
+    Algum argumento além de opções (ex: "tests/unit", "src/"). Na dúvida (valor de
+    opção como "-k foo", operadores do shell, aspas inválidas) conta como posicional.
+    """
+    try:
+        tokens = shlex.split(args)
+    except ValueError:
+        return True
+    return any(token != "--" and not token.startswith("-") for token in tokens)
+
+
+def narrow_test_command(command: str, tests: List[str]) -> Optional[str]:
+    """
+    Restringe o comando aos arquivos de teste, se o runner aceitar caminhos.
+    Comandos que já têm alvos próprios (ex: "pytest tests/unit") não são
+    restringidos: somar os afetados rodaria os alvos originais também.
+    """
+    if not tests:
+        return None
+    for prefix, separator in NARROWABLE_COMMANDS.items():
+        if command == prefix or command.startswith(prefix + " "):
+            if _has_positional_args(command[len(prefix) :]):
+                return None
+            return f"{command} {separator}{' '.join(shlex.quote(t) for t in tests)}"
+    return None
+
+
+def impact_test_command(project_root: Path, command: str, changed_files: List[str]) -> Optional[str]:
+    """
+    Comando que roda só os testes afetados pelos arquivos alterados.
+
+    Returns:
+        Optional[str]: O comando restrito, ou None se a suíte completa deve rodar
+    """
+    try:
+        tests = affected_tests(project_root, changed_files)
+    except Exception as e:
+        logger.warning(f"Seleção de testes indisponível, usando a suíte completa: {e}")
+        return None
+    narrowed = narrow_test_command(command, tests or [])
+    if narrowed:
+        logger.info(f"Seleção incremental: {len(tests)} testes afetados.")
+    return narrowed
@@ -0,0 +1,92 @@
+"""
+Contabilidade de tokens do A-SDLC.
+
+Mantém um encoder tiktoken em cache por família de modelo (carregar o BPE é
+caro) e conta os tokens do prompt real uma única vez, segmento a segmento,
+para reaproveitar a contagem em logs de densidade e orçamento de contexto.
+"""
+
+import logging
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .llm_client import AGENT_MODEL_ENV
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN_ESTIMATE = 4  # Aproximação: 1 token ≈ 4 caracteres
+DEFAULT_ENCODING = "cl100k_base"
+
+# Prefixos de modelo (sem o "provedor/" do OpenRouter) que usam o o200k_base
+O200K_MODEL_PREFIXES = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4", "chatgpt-4o")
+
+
+def encoding_for_model(model: Optional[str]) -> str:
+    """
+    Retorna o nome do encoding tiktoken da família do modelo.
+
+    Modelos que não são da OpenAI (Claude, Kimi, Gemini...) usam cl100k_base
+    como aproximação.
+    """
+    if not model:
+        return DEFAULT_ENCODING
+    name = model.split("/")[-1].lower()
+    if name.startswith(O200K_MODEL_PREFIXES):
+        return "o200k_base"
+    return DEFAULT_ENCODING
+
+
+@lru_cache(maxsize=None)
+def _get_encoder(encoding_name: str):
+    """Carrega o encoder uma única vez por família. Retorna None se tiktoken não estiver disponível."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.debug(f"tiktoken indisponível ({e}); usando estimativa por caracteres.")
+        return None
+
+
+def model_for_agent(agent_type: str) -> Optional[str]:
+    """Modelo configurado no .env para o tipo de agente (mesmo roteamento do call_llm)."""
+    env_name = AGENT_MODEL_ENV.get(agent_type, AGENT_MODEL_ENV["general"])
+    return os.getenv(env_name) or os.getenv(AGENT_MODEL_ENV["general"])
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Conta os tokens do texto com o encoder da família do modelo (ou estima por caracteres)."""
+    if not text:
+        return 0
+    encoder = _get_encoder(encoding_for_model(model))
+    if encoder is None:
+        return len(text) // CHARS_PER_TOKEN_ESTIMATE
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def count_segments(
+    segments: List[Tuple[str, str]], model: Optional[str] = None, known: Optional[Dict[str, int]] = None
+) -> Dict[str, int]:
+    """
+    Conta os tokens de cada segmento do prompt (ver AgentHarness.prepare_segments).
+
+    Args:
+        known: Contagens já feitas por segmento (ex: trechos tokenizados pelo
+            context_packer); esses segmentos não são tokenizados de novo.
+
+    Returns:
+        Dict[str, int]: Tokens por nome de segmento, mais a chave "total"
+    """
+    known = known or {}
+    counts: Dict[str, int] = {}
+    for name, text in segments:
+        tokens = known[name] if name in known else count_tokens(text, model)
+        counts[name] = counts.get(name, 0) + tokens
+    counts["total"] = sum(counts.values())
+    return counts
+
+
+def format_segment_counts(counts: Dict[str, int]) -> str:
+    """Resumo compacto para logs: 'persona=120 protocol=210 ... total=2048'."""
+    return " ".join(f"{name}={tokens}" for name, tokens in counts.items())
@@ -1,8 +1,9 @@
+import json
 import logging
 import os
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 from rich.console import Console
 from rich.panel import Panel
 import shutil
@@ -20,6 +21,11 @@ def is_headless() -> bool:
     return not sys.stdout.isatty() or os.getenv("TERM") == "dumb"
 
 
+def live_print(message: str) -> None:
+    """Imprime uma mensagem com markup rich no console central."""
+    console.print(message)
+
+
 def find_project_root() -> Optional[Path]:
     """Encontra a raiz do projeto A-SDLC."""
     current = Path.cwd()
@@ -53,13 +59,71 @@ def safe_write_file(path: Path, content: str):
     print(f"--- [ARQUIVO CRIADO]: {path.absolute()} ---")
 
 
-def detect_test_framework(project_root: Path) -> str:
-    """Detecta qual framework de teste está sendo usado."""
-    if (project_root / "pytest.ini").exists() or (project_root / "tests").exists():
-        return "pytest"
-    if (project_root / "jest.config.js").exists() or (project_root / "package.json").exists():
+# Script "test" criado pelo npm init: não é um framework configurado
+NPM_DEFAULT_TEST_SCRIPT = "no test specified"
+
+
+def _read_text(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+
+def _dict_field(data: Dict[str, Any], key: str) -> Dict[str, Any]:
+    value = data.get(key)
+    return value if isinstance(value, dict) else {}
+
+
+def _detect_js_framework(project_root: Path) -> Optional[str]:
+    package_json = project_root / "package.json"
+    if not package_json.exists():
+        return None
+    try:
+        package = json.loads(_read_text(package_json) or "{}")
+    except ValueError:
+        package = {}
+    if not isinstance(package, dict):
+        package = {}
+    deps = {**_dict_field(package, "dependencies"), **_dict_field(package, "devDependencies")}
+    if "vitest" in deps or any(project_root.glob("vitest.config.*")):
+        return "vitest"
+    if "jest" in deps or any(project_root.glob("jest.config.*")):
         return "jest"
-    return "unittest"
+    test_script = _dict_field(package, "scripts").get("test", "")
+    if isinstance(test_script, str) and test_script and NPM_DEFAULT_TEST_SCRIPT not in test_script:
+        return "npm"
+    return None
+
+
+def _detect_python_framework(project_root: Path) -> Optional[str]:
+    if (project_root / "pytest.ini").exists() or (project_root / "conftest.py").exists():
+        return "pytest"
+    if "pytest" in _read_text(project_root / "pyproject.toml"):
+        return "pytest"
+    for config in ("setup.cfg", "tox.ini"):
+        if "pytest" in _read_text(project_root / config):
+            return "pytest"
+    if (project_root / "tests").exists():
+        return "pytest"
+    return None
+
+
+def detect_test_framework(project_root: Path, default: Optional[str] = "unittest") -> Optional[str]:
+    """
+    Detecta qual framework de teste está sendo usado a partir dos manifestos
+    (platformio.ini, Cargo.toml, go.mod, package.json, pyproject.toml/pytest.ini).
+
+    Args:
+        default: Retorno quando nenhuma heurística é conclusiva (None = inconclusivo)
+    """
+    if (project_root / "platformio.ini").exists():
+        return "platformio"
+    if (project_root / "Cargo.toml").exists():
+        return "cargo"
+    if (project_root / "go.mod").exists():
+        return "go"
+    return _detect_js_framework(project_root) or _detect_python_framework(project_root) or default
 
 
 def cleanup_old_harnesses(harness_parent_dir: Path, max_folders: int = 20):
@@ -10,6 +10,8 @@ import yaml
 from datetime import datetime
 import re
 
+from .story_index import REQUIRED_STORY_SECTIONS, get_story_index
+
 # Configurar logging
 logger = logging.getLogger(__name__)
 
@@ -210,56 +212,32 @@ class ASDLCValidator:
             }
             return 0
 
-        story_files = list(stories_dir.glob("*.md"))
+        story_files = get_story_index(self.project_path).entries()
         valid_stories = 0
         story_validations = {}
+        required_story_sections = REQUIRED_STORY_SECTIONS
 
-        required_story_sections = [
-            "---",  # Front matter
-            "title:",
-            "ticket:",
-            "# Plano de Execução",
-            "## 📝 Especificações da Story",
-            "## Manifesto de Arquivos",
-            "## ✅ Critérios de Aceitação",
-        ]
-
-        for story_file in story_files:
-            story_validation = {"sections_found": [], "has_frontmatter": False, "has_agents_reference": False, "score": 0}
-
-            try:
-                content = story_file.read_text(encoding="utf-8", errors="ignore")
-
-                # Verificar seções obrigatórias
-                for section in required_story_sections:
-                    if section in content:
-                        story_validation["sections_found"].append(section)
-
-                # Verificar front matter
-                if content.startswith("---") and content.count("---") >= 2:
-                    story_validation["has_frontmatter"] = True
-
-                # Verificar referência aos agentes
-                if ".asdlc/agents/" in content or "agente" in content.lower():
-                    story_validation["has_agents_reference"] = True
-
-                # Calcular score da story
-                story_score = (
-                    (len(story_validation["sections_found"]) / len(required_story_sections)) * 0.7
-                    + (1 if story_validation["has_frontmatter"] else 0) * 0.2
-                    + (1 if story_validation["has_agents_reference"] else 0) * 0.1
-                ) * 100
+        for entry in story_files:
+            story_validation = {
+                "sections_found": list(entry.sections_found),
+                "has_frontmatter": entry.has_frontmatter,
+                "has_agents_reference": entry.has_agents_reference,
+                "score": 0,
+            }
 
-                story_validation["score"] = story_score
+            # Calcular score da story
+            story_score = (
+                (len(story_validation["sections_found"]) / len(required_story_sections)) * 0.7
+                + (1 if story_validation["has_frontmatter"] else 0) * 0.2
+                + (1 if story_validation["has_agents_reference"] else 0) * 0.1
+            ) * 100
 
-                if story_score >= 70:  # 70% como limiar de "válida"
-                    valid_stories += 1
+            story_validation["score"] = story_score
 
-            except Exception as e:
-                logger.warning(f"Erro ao validar story {story_file}: {e}")
-                story_validation["error"] = str(e)
+            if story_score >= 70:  # 70% como limiar de "válida"
+                valid_stories += 1
 
-            story_validations[story_file.name] = story_validation
+            story_validations[entry.name] = story_validation
 
         stories_score = (valid_stories / len(story_files) * 100) if story_files else 0
 
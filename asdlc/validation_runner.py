@@ -0,0 +1,231 @@
+"""
+A-SDLC Framework - Runner de Validação
+Executa o comando de validação com a saída lida em streaming (ring buffer
+limitado por stream), tempo de parede e memória limitados, e o grupo de
+processos inteiro encerrado em caso de timeout ou cancelamento. Para o
+feedback dos retries só o trecho final relevante (traceback) é extraído.
+"""
+
+import logging
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VALIDATION_TIMEOUT = 600  # segundos
+DEFAULT_OUTPUT_LINES = 2000  # linhas guardadas por stream
+DEFAULT_OUTPUT_BYTES = 1024 * 1024  # bytes guardados por stream
+# Linhas maiores (ex: saída sem quebra de linha) são lidas em pedaços deste tamanho
+MAX_LINE_CHARS = 64 * 1024
+DEFAULT_FEEDBACK_LINES = 80
+KILL_GRACE_SECONDS = 3.0
+
+# Início do trecho relevante de uma falha (o último encontrado vence)
+_FAILURE_START = re.compile(
+    r"^(?:Traceback \(most recent call last\)|=+ (?:FAILURES|ERRORS) =+|--- FAIL|FAIL |failures:|panicked at|\s*●)"
+)
+
+
+@dataclass
+class ValidationRun:
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    elapsed_s: float
+    timed_out: bool = False
+    cancelled: bool = False
+    dropped_lines: int = 0
+
+    @property
+    def passed(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+
+def extract_failure_tail(output: str, max_lines: int = DEFAULT_FEEDBACK_LINES) -> str:
+    """
+    Trecho final relevante da saída: a partir do último início de falha
+    (traceback, seção FAILURES do pytest, FAIL do jest/go, panic do cargo),
+    limitado às últimas max_lines linhas.
+    """
+    lines = output.splitlines()
+    start = 0
+    for i, line in enumerate(lines):
+        if _FAILURE_START.match(line):
+            start = i
+    tail = lines[start:][-max_lines:]
+    if len(lines) - start > max_lines:
+        tail.insert(0, f"[... {len(lines) - start - max_lines} linhas omitidas ...]")
+    return "\n".join(tail)
+
+
+def _with_memory_limit(cmd: str, max_memory_mb: int) -> str:
+    """
+    Aplica o limite de memória virtual pelo próprio shell (ulimit -v, em KB).
+    preexec_fn não é seguro com outras threads rodando (candidatos especulativos).
+    """
+    return f"ulimit -v {max_memory_mb * 1024} && {cmd}"
+
+
+def _kill_group(process: subprocess.Popen) -> None:
+    """
+    Encerra o grupo de processos para não deixar filhos órfãos: SIGTERM e, após a
+    carência, SIGKILL no grupo, mesmo que o shell já tenha saído (um filho que
+    ignora SIGTERM manteria o pipe aberto).
+    """
+    if os.name != "posix":
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    deadline = time.monotonic() + KILL_GRACE_SECONDS
+    while time.monotonic() < deadline:
+        process.poll()  # Colhe o shell: um zumbi ainda conta como membro do grupo
+        try:
+            os.killpg(process.pid, 0)
+        except ProcessLookupError:
+            return
+        time.sleep(0.05)
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _pump(
+    stream,
+    buffer: Deque[Tuple[str, int]],
+    dropped: List[int],
+    index: int,
+    on_line: Optional[Callable[[str], None]],
+    max_lines: int,
+    max_bytes: int,
+    lock: threading.Lock,
+) -> None:
+    """
+    Lê o stream guardando só as últimas linhas, limitadas em quantidade e em bytes.
+    O buffer só é alterado sob o lock: um neto que escapou do kill pode manter o pipe
+    aberto e este thread continuar lendo depois que run_validation já montou o resultado.
+    """
+    size = 0
+    for line in iter(lambda: stream.readline(MAX_LINE_CHARS), ""):
+        line_size = len(line.encode("utf-8", errors="replace"))
+        with lock:
+            buffer.append((line, line_size))
+            size += line_size
+            while len(buffer) > max_lines or (size > max_bytes and len(buffer) > 1):
+                size -= buffer.popleft()[1]
+                dropped[index] += 1
+        if on_line:
+            on_line(line.rstrip("\n"))
+    stream.close()
+
+
+def run_validation(
+    cmd: str,
+    cwd: Path,
+    timeout: Optional[float] = None,
+    max_memory_mb: Optional[int] = None,
+    max_output_lines: Optional[int] = None,
+    stop: Optional[threading.Event] = None,
+    on_line: Optional[Callable[[str], None]] = None,
+) -> ValidationRun:
+    """
+    Roda o comando de validação.
+
+    Args:
+        timeout: Tempo de parede em segundos (ASDLC_VALIDATION_TIMEOUT; 0 = sem limite)
+        max_memory_mb: Limite de memória virtual (ASDLC_VALIDATION_MAX_MEMORY_MB; só POSIX)
+        max_output_lines: Linhas guardadas por stream (ASDLC_VALIDATION_OUTPUT_LINES);
+            o total também é limitado em bytes (ASDLC_VALIDATION_OUTPUT_BYTES)
+        stop: Evento de cancelamento (ex: outro candidato especulativo já passou)
+        on_line: Recebe cada linha assim que é lida (streaming)
+    """
+    if timeout is None:
+        timeout = float(os.getenv("ASDLC_VALIDATION_TIMEOUT", str(DEFAULT_VALIDATION_TIMEOUT)))
+    if max_memory_mb is None:
+        max_memory_mb = int(os.getenv("ASDLC_VALIDATION_MAX_MEMORY_MB", "0"))
+    if max_output_lines is None:
+        max_output_lines = int(os.getenv("ASDLC_VALIDATION_OUTPUT_LINES", str(DEFAULT_OUTPUT_LINES)))
+    max_output_bytes = int(os.getenv("ASDLC_VALIDATION_OUTPUT_BYTES", str(DEFAULT_OUTPUT_BYTES)))
+
+    posix = os.name == "posix"
+    process = subprocess.Popen(
+        _with_memory_limit(cmd, max_memory_mb) if posix and max_memory_mb > 0 else cmd,
+        shell=True,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        start_new_session=posix,
+    )
+    buffers: Dict[str, Deque[Tuple[str, int]]] = {"stdout": deque(), "stderr": deque()}
+    dropped = [0, 0]
+    buffers_lock = threading.Lock()
+    readers = [
+        threading.Thread(
+            target=_pump,
+            args=(process.stdout, buffers["stdout"], dropped, 0, on_line, max_output_lines, max_output_bytes, buffers_lock),
+            daemon=True,
+        ),
+        threading.Thread(
+            target=_pump,
+            args=(process.stderr, buffers["stderr"], dropped, 1, on_line, max_output_lines, max_output_bytes, buffers_lock),
+            daemon=True,
+        ),
+    ]
+    for reader in readers:
+        reader.start()
+
+    started = time.monotonic()
+    timed_out = cancelled = False
+    while True:
+        try:
+            process.wait(timeout=0.2)
+            break
+        except subprocess.TimeoutExpired:
+            if timeout and time.monotonic() - started > timeout:
+                logger.warning(f"Validação excedeu {timeout:.0f}s: encerrando o grupo de processos.")
+                timed_out = True
+            elif stop is not None and stop.is_set():
+                cancelled = True
+            else:
+                continue
+            _kill_group(process)
+            process.wait()
+            break
+
+    for reader in readers:
+        reader.join(timeout=KILL_GRACE_SECONDS)
+    if any(reader.is_alive() for reader in readers):
+        logger.warning("Algum processo fora do grupo mantém a saída da validação aberta; usando o que já foi lido.")
+
+    # Cópia sob o lock: leitores ainda vivos continuam alterando os buffers
+    with buffers_lock:
+        stdout = "".join(line for line, _ in buffers["stdout"])
+        stderr = "".join(line for line, _ in buffers["stderr"])
+        dropped_lines = sum(dropped)
+    if timed_out:
+        stderr += f"\nERRO: Validação interrompida após {timeout:.0f}s (timeout).\n"
+    if cancelled:
+        stderr += "\nCancelado: outro candidato passou na validação.\n"
+    return ValidationRun(
+        returncode=process.returncode,
+        stdout=stdout,
+        stderr=stderr,
+        elapsed_s=round(time.monotonic() - started, 3),
+        timed_out=timed_out,
+        cancelled=cancelled,
+        dropped_lines=dropped_lines,
+    )
@@ -47,7 +47,12 @@ def setup_cli_parser():
 
     # Comando: implement
     p_implement = subparsers.add_parser("implement", help="Executa a implementação de uma story (Multi-Agent).")
-    p_implement.add_argument("--id", required=True, help="ID da story a ser implementada.")
+    p_implement_target = p_implement.add_mutually_exclusive_group(required=True)
+    p_implement_target.add_argument("--id", help="ID da story a ser implementada.")
+    p_implement_target.add_argument("--ids", help="IDs separados por vírgula (respeita depends_on).")
+    p_implement_target.add_argument("--all", action="store_true", help="Implementa todas as stories pendentes.")
+    p_implement.add_argument("--workers", type=int, default=None, help="Stories em paralelo no modo --ids/--all.")
+    p_implement.add_argument("--fresh", action="store_true", help="Ignora o checkpoint e refaz todas as etapas da story.")
 
     # Comando: list-stories
     subparsers.add_parser("list-stories", help="Lista todas as stories do projeto atual.")
@@ -96,7 +101,11 @@ def execute_cli_command(args):
     elif args.command == "create-story":
         story_manager.create_story(story_title=args.title)
     elif args.command == "implement":
-        story_manager.implement_story(story_id=args.id)
+        if args.id:
+            story_manager.implement_story(story_id=args.id, resume=not args.fresh)
+        else:
+            story_ids = None if args.all else [i.strip() for i in args.ids.split(",") if i.strip()]
+            story_manager.implement_stories(story_ids=story_ids, max_workers=args.workers, resume=not args.fresh)
     elif args.command == "list-stories":
         story_manager.list_stories()
     elif args.command == "dashboard":
@@ -0,0 +1,90 @@
+"""
+Testes para o empacotador de contexto por orçamento de tokens
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from asdlc import context_packer
+from asdlc.context_packer import pack_context, split_into_chunks
+from asdlc.token_accounting import _get_encoder
+
+PY_SOURCE = """import os
+
+
+def parse_invoice(data):
+    total = sum(item["price"] for item in data)
+    return total
+
+
+@decorator
+class ShippingCalculator:
+    def shipping_cost(self, weight):
+        return weight * 2
+"""
+
+
+class TestContextPacker:
+    """Testes para context_packer"""
+
+    def setup_method(self):
+        _get_encoder.cache_clear()
+
+    def teardown_method(self):
+        _get_encoder.cache_clear()
+
+    def test_split_on_function_and_class_boundaries(self):
+        """Testa a quebra em trechos nas fronteiras de def/class (decorator junto da classe)"""
+        chunks = split_into_chunks("billing.py", PY_SOURCE)
+
+        assert [c.start_line for c in chunks] == [1, 4, 9]
+        assert chunks[2].text.startswith("@decorator\nclass ShippingCalculator")
+        assert "".join(c.text for c in chunks) == PY_SOURCE
+
+    def test_relevant_chunk_survives_tight_budget(self):
+        """Testa que o trecho relevante para a tarefa é mantido e os demais reportados"""
+        with patch.dict("sys.modules", {"tiktoken": None}):
+            budget = len(split_into_chunks("billing.py", PY_SOURCE)[2].text) // 4
+            result = pack_context({"billing.py": PY_SOURCE}, "corrigir shipping cost do calculator", budget)
+
+        assert [c.start_line for c in result.selected] == [9]
+        assert {c.start_line for c in result.dropped} == {1, 4}
+        rendered = result.render("billing.py")
+        assert rendered.startswith("[... linhas 1-8 omitidas ...]")
+        assert "class ShippingCalculator" in rendered
+        assert "billing.py:4" in result.report()
+
+    def test_everything_fits_renders_original(self):
+        """Testa que, com orçamento folgado, o arquivo é reproduzido integralmente"""
+        result = pack_context({"billing.py": PY_SOURCE}, "invoice", 10000)
+
+        assert result.dropped == []
+        assert result.render("billing.py") == PY_SOURCE
+
+    def test_budget_env_override(self):
+        """Testa a sobrescrita do orçamento por agente via .env"""
+        with patch.dict(os.environ, {"ASDLC_CONTEXT_BUDGET_CODE": "500"}):
+            assert context_packer.get_context_budget("code") == 500
+        assert context_packer.get_context_budget("desconhecido") == context_packer.CONTEXT_BUDGETS["general"]
+
+    def test_segment_counts_reuse_chunk_counts(self):
+        """Testa que os trechos empacotados não são tokenizados de novo na contagem por segmento"""
+        from asdlc import token_accounting
+        from asdlc.agent_executor import AgentHarness
+
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            (temp_dir / "billing.py").write_text(PY_SOURCE, encoding="utf-8")
+            harness = AgentHarness("code", "STORY-1", temp_dir)
+            with patch.object(token_accounting, "count_tokens", wraps=token_accounting.count_tokens) as counter:
+                harness.prepare_context("corrigir shipping cost", ["billing.py"])
+            segments = dict(harness.prepare_segments("corrigir shipping cost", ["billing.py"]))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        assert not any("ShippingCalculator" in c.args[0] for c in counter.call_args_list)
+        recount = token_accounting.count_tokens(segments["files"], token_accounting.model_for_agent("code"))
+        assert abs(harness.token_counts["files"] - recount) <= 3
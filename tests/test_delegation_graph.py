@@ -0,0 +1,102 @@
+"""
+Testes para o grafo de delegação entre agentes
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from asdlc import agent_executor
+from asdlc.delegation_graph import (
+    CLAIM_COMPUTE,
+    CLAIM_SKIP,
+    CLAIM_WAIT,
+    DelegationGraph,
+    normalize_task,
+    reset_delegation_graphs,
+)
+
+
+class TestDelegationGraph:
+    """Testes para delegation_graph e sua integração com spawn_agent"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        reset_delegation_graphs()
+
+    def teardown_method(self):
+        reset_delegation_graphs()
+        agent_executor._story_slots.clear()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_identical_subtasks_are_deduplicated(self):
+        """Testa que (agente, tarefa normalizada, arquivos) idênticos viram o mesmo nó"""
+        graph = DelegationGraph("S-1", self.temp_dir, max_depth=3, max_fanout=4)
+        with graph.session():
+            root, action, _ = graph.claim("code", "implementar", [])
+            assert action == CLAIM_COMPUTE
+
+            _, first, _ = graph.claim("test", "Escrever testes.", [], parent=root)
+            key, second, future = graph.claim("test", "  escrever   TESTES ", [], parent=root)
+            assert (first, second) == (CLAIM_COMPUTE, CLAIM_WAIT)
+
+            graph.complete(key, "ok")
+            assert future.result() == "ok"
+            assert graph.nodes[key]["memo_hits"] == 1
+
+        assert normalize_task("Tarefa  X.") == "tarefa x"
+
+    def test_depth_limit(self):
+        """Testa que delegações além da profundidade máxima não são executadas"""
+        graph = DelegationGraph("S-1", self.temp_dir, max_depth=1, max_fanout=4)
+        with graph.session():
+            root, _, _ = graph.claim("code", "a", [])
+            child, _, _ = graph.claim("test", "b", [], parent=root)
+            _, action, note = graph.claim("review", "c", [], parent=child)
+
+        assert action == CLAIM_SKIP
+        assert "profundidade máxima" in note
+
+    def _spawn(self, responses, env=None):
+        calls = []
+
+        def fake_call_llm(prompt, agent_type="general", **kwargs):
+            calls.append(agent_type)
+            return responses.get(agent_type, f"feito por {agent_type}")
+
+        with patch.object(agent_executor, "find_project_root", return_value=self.temp_dir), patch.object(
+            agent_executor, "call_llm", side_effect=fake_call_llm
+        ), patch.dict(os.environ, env or {}):
+            result = agent_executor.spawn_agent("code", "S-1", "implementar login", [], stream=False)
+        return result, calls
+
+    def test_cycle_is_cut_and_graph_persisted(self):
+        """Testa que code -> review -> code (mesma tarefa) não entra em loop e o grafo é salvo"""
+        result, calls = self._spawn(
+            {
+                "code": "[DELEGATE: review | revisar login]",
+                "review": "[DELEGATE: code | implementar login]",
+            }
+        )
+
+        assert calls == ["code", "review"]
+        assert "ciclo detectado" in result
+
+        saved = json.loads((self.temp_dir / ".asdlc" / "checkpoints" / "S-1" / "delegation_graph.json").read_text())
+        assert [n["agent_type"] for n in saved["nodes"]] == ["code", "review"]
+        assert {e["kind"] for e in saved["edges"]} == {"delegate", "cycle"}
+        assert all(n["status"] == "done" and n["llm_calls"] == 1 for n in saved["nodes"])
+
+    def test_fanout_cap(self):
+        """Testa que delegações acima do fan-out recebem uma nota no lugar do resultado"""
+        result, calls = self._spawn(
+            {"code": "[DELEGATE: test | t1]\n[DELEGATE: review | t2]"},
+            env={"ASDLC_DELEGATION_MAX_FANOUT": "1"},
+        )
+
+        assert sorted(calls) == ["code", "test"]
+        assert "feito por test" in result
+        assert "limite de fan-out" in result
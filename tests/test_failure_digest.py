@@ -0,0 +1,167 @@
+"""
+Testes do digest de falhas (pytest, unittest, jest, go test e cargo test)
+"""
+
+from asdlc.failure_digest import MAX_FAILURES, build_failure_digest, digest_feedback
+
+PYTEST_OUTPUT = """\
+FF                                                                       [100%]
+=================================== FAILURES ===================================
+_________________________________ TestX.test_a _________________________________
+
+self = <test_core.TestX object at 0x7f5bc6f29890>
+
+    def test_a(self):
+>       assert 1 == 2, "valores diferentes"
+E       AssertionError: valores diferentes
+E       assert 1 == 2
+
+tests/test_core.py:4: AssertionError
+____________________________________ test_b ____________________________________
+
+    def test_b():
+>       soma(1, 2)
+
+tests/test_core.py:6:
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+
+    def soma(a, b):
+>       raise ValueError("boom interno")
+E       ValueError: boom interno
+
+app/core.py:2: ValueError
+=========================== short test summary info ============================
+FAILED tests/test_core.py::TestX::test_a - AssertionError: valores diferentes
+FAILED tests/test_core.py::test_b - ValueError: boom interno
+2 failed in 0.01s
+"""
+
+UNITTEST_OUTPUT = """\
+======================================================================
+ERROR: test_b (tests.test_u.TestU.test_b)
+----------------------------------------------------------------------
+Traceback (most recent call last):
+  File "/proj/tests/test_u.py", line 7, in test_b
+    soma(1, 2)
+  File "/usr/lib/python3.11/site-packages/lib.py", line 9, in helper
+    pass
+  File "/proj/app/core.py", line 2, in soma
+    raise ValueError("boom interno")
+ValueError: boom interno
+
+----------------------------------------------------------------------
+Ran 2 tests in 0.000s
+
+FAILED (errors=1)
+"""
+
+JEST_OUTPUT = """\
+FAIL src/sum.test.js
+  ● soma › adiciona dois números
+
+    expect(received).toBe(expected) // Object.is equality
+
+    Expected: 3
+    Received: 4
+
+      3 | test('adiciona dois números', () => {
+    > 4 |   expect(sum(1, 2)).toBe(3);
+        |                     ^
+
+      at Object.<anonymous> (src/sum.test.js:4:21)
+      at Promise.then.completed (node_modules/jest-circus/build/utils.js:298:28)
+
+Tests:       1 failed, 2 passed, 3 total
+"""
+
+GO_OUTPUT = """\
+--- FAIL: TestSoma (0.00s)
+    soma_test.go:12: esperado 3, obtido 4
+FAIL
+FAIL\texample.com/calc\t0.002s
+"""
+
+CARGO_OUTPUT = """\
+failures:
+
+---- tests::soma stdout ----
+thread 'tests::soma' panicked at src/lib.rs:10:5:
+assertion `left == right` failed
+  left: 4
+ right: 3
+note: run with `RUST_BACKTRACE=1` environment variable to display a backtrace
+
+failures:
+    tests::soma
+
+test result: FAILED. 1 passed; 1 failed; 0 ignored; 0 measured; 0 filtered out
+"""
+
+
+class TestFailureDigest:
+    """Testes para asdlc.failure_digest"""
+
+    def test_pytest(self):
+        """Testa ids completos, mensagens E e o frame mais interno do projeto"""
+        digest = build_failure_digest(PYTEST_OUTPUT, "", "pytest")
+
+        assert digest.framework == "pytest"
+        assert digest.summary == "2 failed"
+        assert [f.test_id for f in digest.failures] == ["tests/test_core.py::TestX::test_a", "tests/test_core.py::test_b"]
+        assert digest.failures[0].message == ["AssertionError: valores diferentes", "assert 1 == 2"]
+        assert digest.failures[1].frames[-1] == "app/core.py:2 (ValueError)"
+
+    def test_unittest_skips_external_frames(self):
+        """Testa o traceback do unittest sem frames de bibliotecas"""
+        digest = build_failure_digest("", UNITTEST_OUTPUT)
+
+        failure = digest.failures[0]
+        assert failure.test_id == "tests.test_u.TestU.test_b"
+        assert failure.message == ["ValueError: boom interno"]
+        assert failure.frames == ["/proj/tests/test_u.py:7 (test_b)", "/proj/app/core.py:2 (soma)"]
+
+    def test_jest(self):
+        """Testa o nome do teste, a mensagem sem o trecho de código e o frame local"""
+        digest = build_failure_digest(JEST_OUTPUT, "", "npx jest")
+
+        failure = digest.failures[0]
+        assert failure.test_id == "soma › adiciona dois números"
+        assert "Expected: 3" in failure.message and "Received: 4" in failure.message
+        assert failure.frames == ["src/sum.test.js:4:21"]
+        assert digest.summary == "1 failed, 2 passed, 3 total"
+
+    def test_go(self):
+        """Testa o teste falho do go test com a mensagem do t.Errorf"""
+        digest = build_failure_digest(GO_OUTPUT, "", "go test ./...")
+
+        assert digest.failures[0].test_id == "TestSoma"
+        assert digest.failures[0].message == ["esperado 3, obtido 4"]
+        assert digest.failures[0].frames == ["soma_test.go:12"]
+
+    def test_cargo(self):
+        """Testa o panic do cargo test com a asserção e o local"""
+        digest = build_failure_digest(CARGO_OUTPUT, "", "cargo test")
+
+        failure = digest.failures[0]
+        assert failure.test_id == "tests::soma"
+        assert failure.frames == ["src/lib.rs:10:5"]
+        assert "left: 4" in failure.message
+
+    def test_digest_is_bounded_and_smaller_than_raw_output(self):
+        """Testa o limite de falhas no digest e a redução em relação à saída bruta"""
+        sections = "".join(
+            f"_____ test_{i} _____\n"
+            + "    linha de contexto\n" * 50
+            + f"E   assert {i} == 0\ntests/test_x.py:{i}: AssertionError\n"
+            for i in range(30)
+        )
+        output = "===== FAILURES =====\n" + sections + "===== 30 failed in 1.00s =====\n"
+
+        rendered = digest_feedback(output, "", "pytest")
+
+        assert f"e mais {30 - MAX_FAILURES} falhas" in rendered
+        assert len(rendered) < len(output) / 10
+
+    def test_unrecognized_output_returns_none(self):
+        """Testa que saída desconhecida não gera digest (o chamador usa o trecho final)"""
+        assert build_failure_digest("make: *** [all] Error 2", "") is None
@@ -0,0 +1,97 @@
+"""
+Testes da leitura de frontmatter
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from asdlc import frontmatter
+from asdlc.frontmatter import benchmark, parse_frontmatter_fields, read_body, read_frontmatter, split_frontmatter
+
+
+class TestReadFrontmatter:
+    """Testes para asdlc.frontmatter"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_fields_and_body_offset(self):
+        """Testa os campos lidos e o offset em bytes do corpo (com acentos no cabeçalho)"""
+        story = self.temp_dir / "story.md"
+        story.write_text('---\ntitle: "Validação"\nstatus: "PENDENTE"\n---\n# Plano\n- [ ] tarefa\n', encoding="utf-8")
+
+        header = read_frontmatter(story)
+
+        assert header.fields == {"title": "Validação", "status": "PENDENTE"}
+        assert read_body(story, header.body_offset) == "# Plano\n- [ ] tarefa\n"
+        assert split_frontmatter(story.read_bytes()) == header
+
+    def test_stops_at_closing_delimiter(self):
+        """Testa que o corpo não é lido"""
+        story = self.temp_dir / "story.md"
+        story.write_text('---\nticket: "X"\n---\n' + "linha do corpo\n" * 10000, encoding="utf-8")
+
+        # Com max_lines=2 só o título e o '---' de fechamento cabem no limite
+        header = read_frontmatter(story, max_lines=2)
+
+        assert header.fields == {"ticket": "X"}
+
+    def test_missing_or_unclosed_frontmatter(self):
+        """Testa arquivos sem cabeçalho ou com cabeçalho sem fechamento"""
+        plain = self.temp_dir / "plain.md"
+        plain.write_text("# Sem frontmatter\n", encoding="utf-8")
+        unclosed = self.temp_dir / "unclosed.md"
+        unclosed.write_text('---\ntitle: "X"\n' + "x: y\n" * 300, encoding="utf-8")
+
+        assert read_frontmatter(plain) is None
+        assert read_frontmatter(unclosed) is None
+
+
+class TestParseFrontmatterFields:
+    """Testes do parser unificado"""
+
+    def test_flat_header_uses_fast_path(self):
+        """Testa o caminho rápido (sem YAML) e as listas tipadas"""
+        text = 'title: "Login"\nstatus: PENDENTE\nlabels: ["api", "db"]\ndepends_on: []\nepic_id: ""'
+
+        with patch.object(frontmatter, "_parse_yaml") as parse_yaml:
+            fields = parse_frontmatter_fields(text)
+            parse_yaml.assert_not_called()
+
+        assert fields == {"title": "Login", "status": "PENDENTE", "labels": ["api", "db"], "depends_on": [], "epic_id": ""}
+
+    def test_block_lists_fall_back_to_yaml(self):
+        """Testa listas em bloco e aspas simples pelo loader YAML (valores como string)"""
+        text = "title: 'Login'\ncreated: 2026-04-25\nlabels:\n  - api\n  - \"db\"\ndepends_on:\n  - 20260425_dep"
+
+        fields = parse_frontmatter_fields(text)
+
+        assert fields == {"title": "Login", "created": "2026-04-25", "labels": ["api", "db"], "depends_on": ["20260425_dep"]}
+
+    def test_invalid_yaml_uses_lenient_parser(self):
+        """Testa o último recurso para cabeçalhos que não são YAML válido"""
+        fields = parse_frontmatter_fields('title: Fix: bug {\nlabels: ["a", "b"]')
+
+        assert fields == {"title": "Fix: bug {", "labels": ["a", "b"]}
+
+    def test_yaml_loader_prefers_libyaml(self):
+        """Testa que o CSafeLoader é usado quando a libyaml está disponível"""
+        import yaml
+
+        assert frontmatter._SAFE_LOADER is getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+    def test_benchmark_reports_per_file_cost(self, tmp_path):
+        """Testa o microbenchmark"""
+        story = tmp_path / "story.md"
+        story.write_text('---\ntitle: "X"\nlabels: ["a"]\n---\ncorpo\n', encoding="utf-8")
+
+        result = benchmark([story], repeat=2)
+
+        assert result["files"] == 1
+        assert result["fast_path_hits"] == 1
+        assert result["parse_us"] > 0
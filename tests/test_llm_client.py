@@ -0,0 +1,582 @@
+"""
+Testes para o cliente LLM (registro de clientes, pool e recarga do .env)
+"""
+
+import pytest
+import json
+import os
+import time
+import asyncio
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+from asdlc import llm_client
+
+
+class TestClientRegistry:
+    """Testes para o registro de clientes por provedor"""
+
+    def setup_method(self):
+        llm_client.reset_llm_clients()
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.env_patch = patch.dict(
+            os.environ, {"ASDLC_ENGINE": "external", "OPENAI_API_KEY": "sk-test", "OPENROUTER_API_KEY": ""}
+        )
+        self.env_patch.start()
+
+    def teardown_method(self):
+        self.env_patch.stop()
+        llm_client.reset_llm_clients()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    @patch("asdlc.llm_client.find_dotenv", return_value="")
+    @patch("asdlc.llm_client.OpenAI")
+    def test_client_is_reused_between_calls(self, mock_openai, mock_find):
+        """Testa que o mesmo cliente é reaproveitado entre chamadas"""
+        first = llm_client.get_llm_client()
+        second = llm_client.get_llm_client()
+
+        assert first is second
+        mock_openai.assert_called_once()
+
+    @patch("asdlc.llm_client.find_dotenv", return_value="")
+    @patch("asdlc.llm_client.OpenAI")
+    def test_client_recreated_when_key_changes(self, mock_openai, mock_find):
+        """Testa que o cliente é recriado quando a chave de API muda"""
+        mock_openai.side_effect = [MagicMock(), MagicMock()]
+        first = llm_client.get_llm_client()
+        os.environ["OPENAI_API_KEY"] = "sk-outra"
+        second = llm_client.get_llm_client()
+
+        assert first is not second
+        # Outras threads podem estar usando o cliente antigo: só é fechado no reset
+        first.close.assert_not_called()
+        llm_client.reset_llm_clients()
+        first.close.assert_called_once()
+
+    def test_env_reloaded_only_when_mtime_changes(self):
+        """Testa que o .env só é relido quando o mtime muda"""
+        env_file = self.temp_dir / ".env"
+        env_file.write_text("ASDLC_HTTP_POOL_SIZE=3\n", encoding="utf-8")
+
+        with patch("asdlc.llm_client.find_dotenv", return_value=str(env_file)):
+            assert llm_client._reload_env_if_changed() is True
+            assert llm_client._reload_env_if_changed() is False
+            assert llm_client.get_client_settings()["pool_size"] == 3
+
+            env_file.write_text("ASDLC_HTTP_POOL_SIZE=7\n", encoding="utf-8")
+            future = time.time() + 5
+            os.utime(env_file, (future, future))
+
+            assert llm_client._reload_env_if_changed() is True
+            assert llm_client.get_client_settings()["pool_size"] == 7
+
+
+class TestResponseCache:
+    """Testes para o cache de respostas em disco"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.cache_dir = self.temp_dir / ".asdlc" / "cache" / "llm"
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_hit_and_miss_counters(self):
+        """Testa que get/put contabilizam hits e misses"""
+        cache = llm_client.LLMResponseCache(self.cache_dir, max_bytes=1024 * 1024, ttl_seconds=3600)
+        key = cache.make_key("gpt", "system", "prompt", 100, 0.3)
+
+        assert cache.get(key) is None
+        cache.put(key, "gpt", "resposta")
+        assert cache.get(key) == "resposta"
+        assert cache.stats["hits"] == 1
+        assert cache.stats["misses"] == 1
+
+    def test_key_depends_on_all_parameters(self):
+        """Testa que mudar qualquer parâmetro muda a chave"""
+        base = llm_client.LLMResponseCache.make_key("gpt", "system", "prompt", 100, 0.3)
+        assert base != llm_client.LLMResponseCache.make_key("gpt", "system", "prompt", 100, 0.5)
+        assert base != llm_client.LLMResponseCache.make_key("outro", "system", "prompt", 100, 0.3)
+
+    def test_evicts_least_recently_used_over_size_limit(self):
+        """Testa que as entradas menos usadas são removidas ao exceder o limite"""
+        cache = llm_client.LLMResponseCache(self.cache_dir, max_bytes=400, ttl_seconds=3600)
+        cache.put("antiga", "gpt", "a" * 150)
+        old = time.time() - 100
+        os.utime(self.cache_dir / "antiga.json", (old, old))
+        cache.put("nova", "gpt", "b" * 150)
+        cache.put("mais_nova", "gpt", "c" * 150)
+
+        assert cache.get("antiga") is None
+        assert cache.get("mais_nova") == "c" * 150
+        assert cache.stats["evictions"] >= 1
+
+    def test_eviction_and_get_share_the_created_ttl(self):
+        """Testa que o despejo expira pelo campo created, como get(), e não pelo mtime"""
+        cache = llm_client.LLMResponseCache(self.cache_dir, max_bytes=1024 * 1024, ttl_seconds=60)
+        cache.put("velha", "gpt", "a")
+        entry = json.loads((self.cache_dir / "velha.json").read_text(encoding="utf-8"))
+        entry["created"] -= 120
+        (self.cache_dir / "velha.json").write_text(json.dumps(entry), encoding="utf-8")
+        cache.put("recente", "gpt", "b")
+        old = time.time() - 120
+        os.utime(self.cache_dir / "recente.json", (old, old))
+
+        cache.put("outra", "gpt", "c")
+
+        assert not (self.cache_dir / "velha.json").exists()
+        assert cache.get("recente") == "b"
+
+    @patch("asdlc.llm_client.get_llm_client")
+    def test_call_llm_bypass_skips_cache(self, mock_client):
+        """Testa que use_cache=False sempre chama a API"""
+        cache = llm_client.LLMResponseCache(self.cache_dir, max_bytes=1024 * 1024, ttl_seconds=3600)
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = "ok"
+        mock_client.return_value.chat.completions.create.return_value = response
+
+        with patch("asdlc.llm_client.get_response_cache", return_value=cache):
+            assert llm_client.call_llm("prompt", agent_type="code") == "ok"
+            assert llm_client.call_llm("prompt", agent_type="code") == "ok"
+            assert mock_client.return_value.chat.completions.create.call_count == 1
+
+            llm_client.call_llm("prompt", agent_type="code", use_cache=False)
+            assert mock_client.return_value.chat.completions.create.call_count == 2
+
+
+class TestAsyncEngine:
+    """Testes para acall_llm e o limite de concorrência por provedor"""
+
+    def setup_method(self):
+        llm_client.reset_llm_clients()
+
+    def teardown_method(self):
+        llm_client.reset_llm_clients()
+
+    def test_acall_llm_respects_provider_concurrency(self):
+        """Testa que chamadas simultâneas ao mesmo provedor respeitam o semáforo"""
+        state = {"active": 0, "peak": 0}
+
+        async def fake_create(**kwargs):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.01)
+            state["active"] -= 1
+            response = MagicMock()
+            response.choices = [MagicMock()]
+            response.choices[0].message.content = "ok"
+            return response
+
+        client = MagicMock()
+        client.chat.completions.create = fake_create
+        provider = {"name": "openai", "base_url": "http://x", "api_key": "k", "kwargs": {}}
+
+        async def run_all():
+            return await asyncio.gather(*[llm_client.acall_llm(f"p{i}", use_cache=False) for i in range(6)])
+
+        with patch.dict(os.environ, {"ASDLC_LLM_MAX_CONCURRENCY": "2"}), patch(
+            "asdlc.llm_client._resolve_provider", return_value=provider
+        ), patch("asdlc.llm_client._get_async_client", return_value=client):
+            results = asyncio.run(run_all())
+
+        assert results == ["ok"] * 6
+        assert state["peak"] == 2
+
+    def test_acall_llm_antigravity_mode(self):
+        """Testa que o modo antigravity é reportado sem chamar a API"""
+        with patch.dict(os.environ, {"ASDLC_ENGINE": "antigravity"}), patch("asdlc.llm_client.find_dotenv", return_value=""):
+            result = asyncio.run(llm_client.acall_llm("prompt"))
+
+        assert result.startswith("MODO ANTIGRAVITY")
+
+
+class TestRateLimiter:
+    """Testes para o token bucket e o backoff ciente de 429"""
+
+    def _error(self, status_code, headers=None):
+        error = Exception(f"HTTP {status_code}")
+        error.status_code = status_code
+        error.response = MagicMock(headers=headers or {})
+        return error
+
+    def test_token_bucket_queues_instead_of_failing(self):
+        """Testa que o balde devolve espera crescente quando esgotado"""
+        bucket = llm_client.TokenBucket(per_minute=60)  # 1 por segundo
+        bucket.tokens = 1
+
+        assert bucket.reserve(1) == 0
+        assert 0.9 < bucket.reserve(1) <= 1.0
+        assert 1.9 < bucket.reserve(1) <= 2.0
+
+    def test_unlimited_bucket_never_waits(self):
+        """Testa que capacidade 0 desativa o limite"""
+        bucket = llm_client.TokenBucket(per_minute=0)
+        assert all(bucket.reserve(1000) == 0 for _ in range(10))
+
+    def test_agents_with_different_limits_keep_their_own_limiter(self):
+        """Testa que agentes do mesmo modelo com limites distintos não recriam o limitador um do outro"""
+        llm_client.reset_llm_clients()
+        with patch.dict(os.environ, {"MODEL_CODE_RPM": "2", "ASDLC_LLM_RPM": "60"}):
+            code = llm_client.get_rate_limiter("gpt", "code")
+            test = llm_client.get_rate_limiter("gpt", "test")
+
+            assert code is not test
+            assert llm_client.get_rate_limiter("gpt", "code") is code
+            assert llm_client.get_rate_limiter("gpt", "review") is test
+
+        code.stats["throttled"] = 1
+        test.stats["throttled"] = 2
+        assert llm_client.get_rate_limit_stats()["gpt"]["throttled"] == 3
+        llm_client.reset_llm_clients()
+
+    def test_retry_after_header_is_honored(self):
+        """Testa que o Retry-After do provedor define a espera"""
+        assert llm_client._retry_delay(self._error(429, {"retry-after": "7"}), 0) == 7.0
+        assert llm_client._retry_delay(self._error(429, {"retry-after-ms": "1500"}), 0) == 1.5
+
+    def test_non_retryable_errors_are_not_retried(self):
+        """Testa que erros 4xx comuns não são refeitos"""
+        assert llm_client._retry_delay(self._error(400), 0) is None
+        assert llm_client._retry_delay(ValueError("x"), 0) is None
+
+    @patch("asdlc.llm_client.time.sleep")
+    def test_create_with_backoff_retries_429(self, mock_sleep):
+        """Testa que um 429 é refeito e a resposta final é retornada"""
+        response = MagicMock()
+        response.usage.total_tokens = 10
+        create = MagicMock(side_effect=[self._error(429, {"retry-after": "2"}), response])
+        limiter = llm_client.ModelRateLimiter("gpt", rpm=0, tpm=0)
+
+        assert llm_client._create_with_backoff(create, {}, limiter, 10) is response
+        assert create.call_count == 2
+        mock_sleep.assert_called_with(2.0)
+        assert limiter.stats["retries"] == 1
+
+    @patch("asdlc.llm_client.time.sleep")
+    def test_create_with_backoff_gives_up_after_max_retries(self, mock_sleep):
+        """Testa que o erro é propagado após esgotar as tentativas"""
+        create = MagicMock(side_effect=self._error(503))
+        limiter = llm_client.ModelRateLimiter("gpt", rpm=0, tpm=0)
+
+        with patch.dict(os.environ, {"ASDLC_LLM_MAX_RETRIES": "2"}):
+            with pytest.raises(Exception, match="HTTP 503"):
+                llm_client._create_with_backoff(create, {}, limiter, 10)
+
+        assert create.call_count == 3
+
+
+class TestStreaming:
+    """Testes para o modo stream de call_llm"""
+
+    def _chunk(self, text):
+        chunk = MagicMock()
+        chunk.usage = None
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = text
+        return chunk
+
+    @patch("asdlc.llm_client.get_response_cache", return_value=None)
+    @patch("asdlc.llm_client.get_llm_client")
+    def test_stream_calls_on_chunk_and_returns_full_text(self, mock_client, mock_cache):
+        """Testa que cada trecho é entregue ao callback e o texto completo é retornado"""
+        mock_client.return_value.chat.completions.create.return_value = iter(
+            [self._chunk("Olá"), self._chunk(", "), self._chunk("mundo")]
+        )
+        received = []
+
+        result = llm_client.call_llm("prompt", agent_type="code", stream=True, on_chunk=received.append)
+
+        assert result == "Olá, mundo"
+        assert received == ["Olá", ", ", "mundo"]
+        request = mock_client.return_value.chat.completions.create.call_args.kwargs
+        assert request["stream"] is True
+        # Parâmetros recentes vão em extra_body (compatível com qualquer openai>=1.0)
+        assert "stream_options" not in request
+        assert request["extra_body"]["stream_options"] == {"include_usage": True}
+
+
+class TestHedging:
+    """Testes para o hedging entre modelo primário e de reserva"""
+
+    def setup_method(self):
+        llm_client.reset_llm_clients()
+
+    def teardown_method(self):
+        llm_client.reset_llm_clients()
+
+    def _fake_client(self, delays):
+        """Cliente assíncrono cujo stream de cada modelo demora delays[model] até o primeiro token."""
+        state = {"cancelled": []}
+
+        async def create(**request):
+            model = request["model"]
+
+            async def chunks():
+                try:
+                    await asyncio.sleep(delays[model])
+                except asyncio.CancelledError:
+                    state["cancelled"].append(model)
+                    raise
+                chunk = MagicMock()
+                chunk.usage = None
+                chunk.choices = [MagicMock()]
+                chunk.choices[0].delta.content = f"resposta de {model}"
+                yield chunk
+
+            return chunks()
+
+        client = MagicMock()
+        client.chat.completions.create = create
+        return client, state
+
+    def test_latency_histogram_percentile(self):
+        """Testa o cálculo de percentis pelo histograma"""
+        histogram = llm_client.LatencyHistogram()
+        for seconds in [0.1] * 9 + [20.0]:
+            histogram.record(seconds)
+
+        assert histogram.percentile(50) == 0.25
+        assert histogram.percentile(100) == 21.0
+
+    def test_slow_primary_loses_to_fallback(self):
+        """Testa que a reserva vence quando o primário não emite o primeiro token a tempo"""
+        client, state = self._fake_client({"primario": 5.0, "reserva": 0.0})
+        request = {"model": "primario", "messages": [], "max_tokens": 10, "temperature": 0}
+
+        async def run():
+            return await llm_client._ahedged_completion(client, request, ["reserva"], "code", 10, asyncio.Semaphore(4))
+
+        with patch.dict(os.environ, {"ASDLC_LLM_HEDGE_DELAY": "0.05"}):
+            winner, content = asyncio.run(run())
+
+        assert winner == "reserva"
+        assert content == "resposta de reserva"
+        assert state["cancelled"] == ["primario"]
+
+    def test_fast_primary_does_not_fire_fallback(self):
+        """Testa que a reserva não é disparada quando o primário responde a tempo"""
+        client, state = self._fake_client({"primario": 0.0, "reserva": 0.0})
+        request = {"model": "primario", "messages": [], "max_tokens": 10, "temperature": 0}
+
+        async def run():
+            return await llm_client._ahedged_completion(client, request, ["reserva"], "code", 10, asyncio.Semaphore(4))
+
+        with patch.dict(os.environ, {"ASDLC_LLM_HEDGE_DELAY": "1"}):
+            winner, _ = asyncio.run(run())
+
+        assert winner == "primario"
+        assert "primario" in llm_client.get_latency_stats()
+
+    @patch("asdlc.llm_client.get_llm_client")
+    def test_plain_call_feeds_hedge_delay(self, mock_client):
+        """Testa que chamadas sem stream nem hedge também alimentam o histograma de ttft"""
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = "ok"
+        mock_client.return_value.chat.completions.create.return_value = response
+
+        with patch.dict(os.environ, {"MODEL_CODE": "primario", "ASDLC_LLM_HEDGE_DELAY": "7"}):
+            for _ in range(llm_client.HEDGE_MIN_SAMPLES):
+                assert llm_client.call_llm("prompt", agent_type="code", use_cache=False) == "ok"
+            delay = llm_client.get_hedge_delay("primario")
+
+        stats = llm_client.get_latency_stats()["primario"]
+        assert stats["ttft"]["count"] == stats["total"]["count"] == llm_client.HEDGE_MIN_SAMPLES
+        assert delay == 0.25
+
+    def test_semaphore_held_until_stream_is_consumed(self):
+        """Testa que o slot do provedor só é liberado após consumir (ou cancelar) o stream"""
+        client, state = self._fake_client({"primario": 5.0, "reserva": 0.0})
+        request = {"model": "primario", "messages": [], "max_tokens": 10, "temperature": 0}
+        semaphore = asyncio.Semaphore(2)
+        observed = []
+
+        async def run():
+            task = asyncio.ensure_future(llm_client._astream_attempt(client, request, "code", 10, semaphore, asyncio.Event()))
+            await asyncio.sleep(0.05)
+            observed.append(semaphore._value)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            observed.append(semaphore._value)
+
+        asyncio.run(run())
+
+        assert observed == [1, 2]
+        assert state["cancelled"] == ["primario"]
+
+
+class TestCircuitBreaker:
+    """Testes para o circuit breaker por provedor/modelo"""
+
+    def setup_method(self):
+        llm_client.reset_llm_clients()
+
+    def teardown_method(self):
+        llm_client.reset_llm_clients()
+
+    def _failing(self, breaker, times):
+        for _ in range(times):
+            assert breaker.allow()
+            breaker.record_failure()
+
+    def test_opens_after_failure_threshold(self):
+        """Testa que o circuito abre ao atingir a taxa de falhas e rejeita chamadas"""
+        breaker = llm_client.CircuitBreaker("p:m", window=10, min_calls=3, failure_rate=0.7, reset_seconds=60)
+        breaker.record_success()
+        self._failing(breaker, 1)
+        assert breaker.state == llm_client.CircuitBreaker.CLOSED
+
+        self._failing(breaker, 2)
+        assert breaker.state == llm_client.CircuitBreaker.OPEN
+        assert breaker.allow() is False
+        assert breaker.snapshot()["rejected"] == 1
+
+    def test_half_open_probe_closes_circuit(self):
+        """Testa que, após o timer, uma única chamada de prova é liberada"""
+        breaker = llm_client.CircuitBreaker("p:m", window=10, min_calls=1, failure_rate=0.5, reset_seconds=0.01)
+        self._failing(breaker, 1)
+        time.sleep(0.02)
+
+        assert breaker.allow() is True
+        assert breaker.state == llm_client.CircuitBreaker.HALF_OPEN
+        assert breaker.allow() is False
+
+        breaker.record_success()
+        assert breaker.state == llm_client.CircuitBreaker.CLOSED
+
+    def test_cancelled_probe_releases_half_open(self):
+        """Testa que uma prova cancelada (ex: hedge perdedor) não trava o circuito em half-open"""
+        breaker = llm_client.CircuitBreaker("p:m", window=10, min_calls=1, failure_rate=0.5, reset_seconds=60)
+        self._failing(breaker, 1)
+        breaker.opened_at -= 60
+        limiter = llm_client.ModelRateLimiter("m", rpm=0, tpm=0)
+
+        async def slow_create(**request):
+            await asyncio.sleep(5)
+
+        async def run():
+            task = asyncio.ensure_future(
+                llm_client._acreate_with_backoff(slow_create, {}, limiter, 10, asyncio.Semaphore(1), breaker)
+            )
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+
+        assert breaker.state == llm_client.CircuitBreaker.HALF_OPEN
+        assert breaker.allow() is True
+
+    def test_stale_probe_expires(self):
+        """Testa que uma prova sem resultado há mais de reset_seconds é substituída"""
+        breaker = llm_client.CircuitBreaker("p:m", window=10, min_calls=1, failure_rate=0.5, reset_seconds=0.05)
+        self._failing(breaker, 1)
+        time.sleep(0.06)
+        assert breaker.allow() is True
+        assert breaker.allow() is False
+
+        time.sleep(0.06)
+        assert breaker.allow() is True
+
+    def test_open_circuit_fails_fast(self):
+        """Testa que call_llm não chama o provedor com o circuito aberto"""
+        client = MagicMock()
+        client.base_url = "https://api.openai.com/v1/"
+        env = {"OPENAI_API_KEY": "sk-test", "MODEL_CODE": "modelo-x", "ASDLC_CB_MIN_CALLS": "1"}
+        with patch.dict(os.environ, env), patch.object(llm_client, "get_llm_client", return_value=client):
+            llm_client.get_circuit_breaker("openai", "modelo-x").record_failure()
+            result = llm_client.call_llm("oi", agent_type="code", use_cache=False)
+
+        assert result.startswith("ERRO:")
+        client.chat.completions.create.assert_not_called()
+        stats = llm_client.get_llm_metrics()["circuit_breakers"]
+        assert stats["openai:modelo-x"]["state"] == "open"
+
+    def test_failover_to_openai_when_open(self):
+        """Testa o failover para a chave OpenAI quando o circuito do OpenRouter está aberto"""
+        primary = MagicMock()
+        primary.base_url = "https://openrouter.ai/api/v1/"
+        failover = MagicMock()
+        failover.base_url = "https://api.openai.com/v1/"
+        failover.chat.completions.create.return_value.choices[0].message.content = "ok"
+        failover.chat.completions.create.return_value.usage = None
+
+        env = {"OPENAI_API_KEY": "sk-test", "OPENAI_FAILOVER_MODEL": "gpt-reserva", "ASDLC_CB_MIN_CALLS": "1"}
+        with patch.dict(os.environ, env), patch.object(llm_client, "_get_or_create_client", return_value=failover):
+            llm_client.get_circuit_breaker("openrouter", "primario").record_failure()
+            response, model = llm_client._complete_with_breaker(primary, {"model": "primario", "messages": []}, "code", 10)
+
+        assert model == "gpt-reserva"
+        primary.chat.completions.create.assert_not_called()
+        assert failover.chat.completions.create.call_args.kwargs["model"] == "gpt-reserva"
+
+    def test_failover_answer_is_not_cached_under_primary_key(self):
+        """Testa que a resposta do modelo de failover não é servida depois ao modelo primário"""
+        temp_dir = Path(tempfile.mkdtemp())
+        cache = llm_client.LLMResponseCache(temp_dir, max_bytes=1024 * 1024, ttl_seconds=3600)
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = "degradada"
+        try:
+            with patch.dict(os.environ, {"OPENAI_API_KEY": "sk-test", "MODEL_CODE": "primario"}), patch.object(
+                llm_client, "get_llm_client"
+            ), patch.object(llm_client, "get_response_cache", return_value=cache), patch.object(
+                llm_client, "_complete_with_breaker", return_value=(response, "gpt-reserva")
+            ):
+                assert llm_client.call_llm("oi", agent_type="code") == "degradada"
+                assert llm_client.call_llm("oi", agent_type="code") == "degradada"
+                assert llm_client._complete_with_breaker.call_count == 2
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestPromptCacheHints:
+    """Testes para as dicas de prompt caching do provedor"""
+
+    def test_system_message_is_static(self):
+        """Testa que a mensagem de sistema não varia por agente"""
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = "ok"
+        with patch.object(llm_client, "get_llm_client"), patch.object(
+            llm_client, "_complete_with_breaker", return_value=(response, "gpt-4.1-mini")
+        ) as complete:
+            llm_client.call_llm("oi", agent_type="code", use_cache=False)
+            llm_client.call_llm("oi", agent_type="review", use_cache=False)
+
+        systems = [c.args[1]["messages"][0]["content"] for c in complete.call_args_list]
+        assert systems == [llm_client.SYSTEM_MESSAGE, llm_client.SYSTEM_MESSAGE]
+
+    def test_anthropic_prefix_gets_cache_control(self):
+        """Testa o cache_control no prefixo estável para modelos Anthropic"""
+        request = llm_client._build_request("anthropic/claude-3.5-sonnet", "sys", "PREFIXO|tarefa", 100, 0.3, 8)
+
+        prefix, suffix = request["messages"][1]["content"]
+        assert prefix == {"type": "text", "text": "PREFIXO|", "cache_control": {"type": "ephemeral"}}
+        assert suffix == {"type": "text", "text": "tarefa"}
+        assert "prompt_cache_key" not in request
+
+    def test_openai_prefix_gets_stable_cache_key(self):
+        """Testa que retries com o mesmo prefixo compartilham o prompt_cache_key"""
+        first = llm_client._build_request("gpt-4.1-mini", "sys", "PREFIXO|tarefa", 100, 0.3, 8)
+        retry = llm_client._build_request("gpt-4.1-mini", "sys", "PREFIXO|feedback", 100, 0.3, 8)
+
+        assert first["extra_body"]["prompt_cache_key"] == retry["extra_body"]["prompt_cache_key"]
+        assert "prompt_cache_key" not in first
+        assert "cache_control" not in first["messages"][1]["content"][0]
+
+        retargeted = llm_client._with_model(first, "anthropic/claude-3.5-haiku")
+        assert "extra_body" not in retargeted
+        assert retargeted["messages"][1]["content"][0]["cache_control"] == {"type": "ephemeral"}
+
+    def test_no_prefix_keeps_plain_prompt(self):
+        """Testa que sem prefixo estável o prompt segue como texto simples"""
+        request = llm_client._build_request("gpt-4.1-mini", "sys", "prompt", 100, 0.3)
+        assert request["messages"][1]["content"] == "prompt"
+        assert "prompt_cache_key" not in request
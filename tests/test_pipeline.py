@@ -0,0 +1,218 @@
+"""
+Testes para o DAG de etapas do pipeline de implementação
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from asdlc.pipeline import DEFAULT_STAGES, Stage, load_pipeline, render_task, run_pipeline, validate_pipeline
+
+
+class TestPipeline:
+    """Testes para pipeline"""
+
+    def test_independent_stages_run_concurrently(self):
+        """Testa que architecture e test_red rodam juntas e code só começa depois das duas"""
+        active = {"now": 0, "peak": 0}
+        order = []
+        lock = threading.Lock()
+
+        def run_stage(stage, inputs):
+            with lock:
+                order.append(stage.name)
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.1)
+            with lock:
+                active["now"] -= 1
+            return f"saida {stage.name} <- {sorted(inputs)}"
+
+        results = run_pipeline(DEFAULT_STAGES, run_stage, max_workers=2)
+
+        assert active["peak"] == 2
+        assert set(order[:2]) == {"architecture", "test_red"}
+        assert results["code"].output == "saida code <- ['architecture', 'test_red']"
+        assert all(r.status == "done" and r.elapsed_s >= 0.1 for r in results.values())
+
+    def test_skip_and_failure_propagation(self):
+        """Testa etapa pulada por condição e falha bloqueando apenas as dependentes"""
+        stages = [
+            Stage("a", "architecture", "a"),
+            Stage("b", "test", "b", skip_if="tests_exist"),
+            Stage("c", "code", "c", needs=["a", "b"]),
+            Stage("d", "review", "d", needs=["c"]),
+            Stage("e", "review", "e", needs=["b"]),
+        ]
+
+        def run_stage(stage, inputs):
+            if stage.name == "c":
+                raise RuntimeError("boom")
+            return stage.name
+
+        results = run_pipeline(stages, run_stage, conditions={"tests_exist": lambda: True}, max_workers=1)
+
+        assert results["b"].status == "skipped"
+        assert results["c"].status == "failed" and results["c"].error == "boom"
+        assert results["d"].status == "blocked"
+        assert results["e"].status == "done"
+
+    def test_failure_output_counts_as_failed(self):
+        """Testa que saídas de falha dos agentes (ERRO, sem conformidade) bloqueiam as dependentes"""
+        stages = [
+            Stage("a", "architecture", "a"),
+            Stage("c", "code", "c", needs=["a"], runner="validate"),
+            Stage("d", "review", "d", needs=["c"]),
+            Stage("e", "review", "e", needs=["a"]),
+        ]
+        outputs = {"a": "ERRO: Falha na chamada da API", "c": "Falha ao atingir conformidade após retries."}
+
+        results = run_pipeline(stages, lambda stage, inputs: outputs.get(stage.name, "ok"), max_workers=1)
+        assert results["a"].status == "failed" and results["a"].error.startswith("ERRO")
+        assert results["c"].status == "blocked"
+        assert results["e"].status == "blocked"
+
+        outputs["a"] = "ok"
+        results = run_pipeline(stages, lambda stage, inputs: outputs.get(stage.name, "ok"), max_workers=1)
+        assert results["c"].status == "failed"
+        assert results["d"].status == "blocked"
+        assert results["e"].status == "done"
+
+    def test_invalid_dag_raises(self):
+        """Testa ciclos e dependências inexistentes"""
+        with pytest.raises(ValueError, match="Ciclo"):
+            validate_pipeline([Stage("a", "x", "t", needs=["b"]), Stage("b", "x", "t", needs=["a"])])
+        with pytest.raises(ValueError, match="inexistentes"):
+            validate_pipeline([Stage("a", "x", "t", needs=["z"])])
+
+    def test_load_custom_pipeline_from_config(self):
+        """Testa o DAG customizado em .asdlc/pipeline.yaml"""
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            assert [s.name for s in load_pipeline(temp_dir)] == [s.name for s in DEFAULT_STAGES]
+
+            (temp_dir / ".asdlc").mkdir()
+            (temp_dir / ".asdlc" / "pipeline.yaml").write_text(
+                "stages:\n"
+                '  - {name: security, agent: review, task: "Audite {title}: {code}", needs: [code]}\n'
+                '  - {name: code, agent: code, task: "Implemente {title}", runner: validate}\n',
+                encoding="utf-8",
+            )
+            stages = load_pipeline(temp_dir)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        assert [s.name for s in stages] == ["code", "security"]
+        assert render_task(stages[1], {"title": "Login", "code": "ok"}) == "Audite Login: ok"
+        assert render_task(stages[1], {"title": "Login"}) == "Audite Login: {code}"
+
+
+class TestCheckpoint:
+    """Testes para o checkpoint/retomada do pipeline"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.story = self.temp_dir / "stories" / "S-1_login.md"
+        self.story.parent.mkdir()
+        self.story.write_text('---\ntitle: "Login"\nstatus: "Todo"\n---\n# Login\n', encoding="utf-8")
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _run(self, crash_on=None, outputs=None):
+        from asdlc.checkpoint import CheckpointManifest
+
+        executed = []
+        outputs = outputs or {}
+
+        def run_stage(stage, inputs):
+            executed.append(stage.name)
+            if stage.name == crash_on:
+                raise TimeoutError("429")
+            return outputs.get(stage.name, f"saida {stage.name}")
+
+        checkpoint = CheckpointManifest(self.temp_dir, "S-1", self.story, [])
+        results = run_pipeline(DEFAULT_STAGES, run_stage, max_workers=1, checkpoint=checkpoint)
+        return executed, results
+
+    def test_resume_skips_finished_stages(self):
+        """Testa que a retomada refaz apenas a etapa que falhou"""
+        executed, results = self._run(crash_on="code")
+        assert results["code"].status == "failed"
+        assert results["review"].status == "blocked"
+
+        executed, results = self._run()
+        assert executed == ["code", "test_validation", "review"]
+        assert results["architecture"].status == "resumed"
+
+        executed, results = self._run()
+        assert executed == []
+        assert results["code"].status == "resumed"
+        assert results["code"].output == "saida code"
+
+    def test_failed_upstream_recomputes_dependents(self):
+        """Testa que as dependentes de uma etapa que falhou não são retomadas sobre a saída de erro"""
+        executed, results = self._run(outputs={"architecture": "ERRO: Falha na chamada da API"})
+        assert results["architecture"].status == "failed"
+        assert results["code"].status == "blocked"
+
+        executed, results = self._run(outputs={"architecture": "arquitetura nova"})
+        assert executed == ["architecture", "code", "test_validation", "review"]
+        assert results["test_red"].status == "resumed"
+        assert results["code"].status == "done"
+
+    def test_digest_depends_on_upstream_output(self):
+        """Testa que a saída da etapa de entrada faz parte do digest"""
+        from asdlc.checkpoint import CheckpointManifest
+
+        checkpoint = CheckpointManifest(self.temp_dir, "S-1", self.story, [])
+        code = next(stage for stage in DEFAULT_STAGES if stage.name == "code")
+        upstream = {"architecture": "d1", "test_red": "d2"}
+
+        first = checkpoint.digest(code, upstream, {"architecture": "ERRO: x", "test_red": "t"})
+        second = checkpoint.digest(code, upstream, {"architecture": "arquitetura", "test_red": "t"})
+        assert first != second
+        assert second == checkpoint.digest(code, upstream, {"architecture": "arquitetura", "test_red": "t"})
+
+    def test_changed_story_invalidates_but_status_does_not(self):
+        """Testa a invalidação por mudança na story (a linha de status é ignorada)"""
+        self._run()
+
+        self.story.write_text(self.story.read_text(encoding="utf-8").replace('"Todo"', '"Done"'), encoding="utf-8")
+        executed, _ = self._run()
+        assert executed == []
+
+        self.story.write_text(self.story.read_text(encoding="utf-8") + "\nNovo critério\n", encoding="utf-8")
+        executed, _ = self._run()
+        assert len(executed) == len(DEFAULT_STAGES)
+
+    def test_same_day_stories_have_separate_checkpoints(self):
+        """Testa que stories criadas no mesmo dia não compartilham o checkpoint"""
+        from asdlc.checkpoint import CheckpointManifest, checkpoint_key
+        from asdlc.utils import cleanup_old_harnesses
+
+        story_a = self.temp_dir / "stories" / "20260425_232806_feedbacktest_FeedbackTest.md"
+        story_b = self.temp_dir / "stories" / "20260425_232911_feedbackflashtest_FeedbackFlashTest.md"
+        for story in (story_a, story_b):
+            story.write_text(f'---\ntitle: "{story.stem}"\n---\n', encoding="utf-8")
+
+        manifest_a = CheckpointManifest(self.temp_dir, checkpoint_key(story_a), story_a, [])
+        manifest_b = CheckpointManifest(self.temp_dir, checkpoint_key(story_b), story_b, [])
+        manifest_a.record("code", "digest-a", "saida A", 1.0)
+        manifest_b.record("code", "digest-b", "saida B", 1.0)
+
+        assert manifest_a.path != manifest_b.path
+        assert checkpoint_key(story_a, "20260425_x/y") == "20260425_x_y"
+
+        # A rotação das pastas de harness não apaga checkpoints
+        harness = self.temp_dir / ".asdlc" / "harness"
+        for i in range(5):
+            (harness / f"run_{i}").mkdir(parents=True)
+        cleanup_old_harnesses(harness, max_folders=1)
+
+        reloaded = CheckpointManifest(self.temp_dir, checkpoint_key(story_a), story_a, [])
+        assert reloaded.lookup("code", "digest-a") == "saida A"
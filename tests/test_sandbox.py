@@ -0,0 +1,227 @@
+"""
+Testes da sandbox de validação e do modo especulativo de validate_and_fix
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from asdlc.sandbox import apply_file_blocks, create_sandbox, extract_file_blocks, remove_sandbox
+
+
+class TestSandbox:
+    """Testes para asdlc.sandbox"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_extract_file_blocks_formats(self):
+        """Testa os três formatos de caminho aceitos nos blocos de código"""
+        result = (
+            "```python src/app.py\nprint('a')\n```\n"
+            "```js\n// file: web/index.js\nconsole.log(1)\n```\n"
+            "--- ARQUIVO: docs/notes.md ---\n```markdown\n# Notas\n```\n"
+            "```python\nsem caminho\n```\n"
+            "```python ../fora.py\nx = 1\n```\n"
+        )
+        files = extract_file_blocks(result)
+
+        assert files["src/app.py"] == "print('a')\n"
+        assert files["web/index.js"] == "console.log(1)\n"
+        assert files["docs/notes.md"] == "# Notas\n"
+        assert "../fora.py" not in files
+        assert len(files) == 3
+
+    def test_sandbox_is_isolated_copy(self):
+        """Testa que a sandbox é uma cópia (escritas não vazam) e diretórios pesados viram symlink"""
+        (self.temp_dir / "app.py").write_text("original", encoding="utf-8")
+        (self.temp_dir / ".git").mkdir()
+        (self.temp_dir / "node_modules").mkdir()
+
+        sandbox = create_sandbox(self.temp_dir)
+        try:
+            assert not (sandbox / ".git").exists()
+            assert (sandbox / "node_modules").is_symlink()
+            apply_file_blocks({"app.py": "alterado", "novo/mod.py": "x = 1"}, sandbox)
+            assert (sandbox / "novo" / "mod.py").exists()
+            assert (self.temp_dir / "app.py").read_text(encoding="utf-8") == "original"
+        finally:
+            remove_sandbox(sandbox)
+        assert not sandbox.exists()
+
+    def test_writes_through_symlinked_dirs_are_rejected(self):
+        """Testa que arquivos gerados não atravessam os diretórios linkados até o projeto real"""
+        (self.temp_dir / "node_modules" / "lib").mkdir(parents=True)
+        (self.temp_dir / "node_modules" / "lib" / "a.js").write_text("original", encoding="utf-8")
+        (self.temp_dir / "vendor_link").symlink_to(self.temp_dir / "node_modules", target_is_directory=True)
+
+        sandbox = create_sandbox(self.temp_dir)
+        try:
+            apply_file_blocks({"node_modules/lib/a.js": "alterado", "vendor_link/lib/a.js": "alterado"}, sandbox)
+        finally:
+            remove_sandbox(sandbox)
+
+        assert (self.temp_dir / "node_modules" / "lib" / "a.js").read_text(encoding="utf-8") == "original"
+        assert extract_file_blocks("```js node_modules/lib/a.js\nx\n```\n") == {}
+
+    def test_ignore_list_applies_to_top_level_only(self):
+        """Testa que diretórios build/dist aninhados (código-fonte) são copiados"""
+        for rel_path in ("build/out.o", "src/build/gen.py", "src/dist/x.py", "src/__pycache__/m.pyc"):
+            (self.temp_dir / rel_path).parent.mkdir(parents=True, exist_ok=True)
+            (self.temp_dir / rel_path).write_text("x", encoding="utf-8")
+
+        sandbox = create_sandbox(self.temp_dir)
+        try:
+            assert not (sandbox / "build").exists()
+            assert (sandbox / "src" / "build" / "gen.py").exists()
+            assert (sandbox / "src" / "dist" / "x.py").exists()
+            assert not (sandbox / "src" / "__pycache__").exists()
+        finally:
+            remove_sandbox(sandbox)
+
+
+class TestSpeculativeValidate:
+    """Testes para o modo especulativo de validate_and_fix"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / "PROJECT_CONTEXT.md").write_text("# Contexto", encoding="utf-8")
+        (self.temp_dir / "status.txt").write_text("red", encoding="utf-8")
+
+    def teardown_method(self):
+        from asdlc import agent_executor
+
+        agent_executor._story_slots.clear()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _run(self, responses, max_retries=3, candidates=3, apply_files=True):
+        from asdlc import agent_executor
+
+        prompts = []
+
+        def fake_call_llm(prompt, **kwargs):
+            prompts.append(prompt)
+            index = int(prompt.rsplit("[Candidato ", 1)[1].split("/", 1)[0]) - 1
+            return responses[len(prompts) > candidates][index]
+
+        with patch.object(agent_executor, "find_project_root", return_value=self.temp_dir), patch.object(
+            agent_executor, "call_llm", side_effect=fake_call_llm
+        ):
+            result = agent_executor.validate_and_fix(
+                "code",
+                "STORY-1",
+                "implementar",
+                [],
+                validation_cmd="grep -q green status.txt",
+                max_retries=max_retries,
+                candidates=candidates,
+                apply_files=apply_files,
+            )
+        return result, prompts
+
+    def test_first_passing_candidate_is_applied(self):
+        """Testa que o candidato que passa vence e só ele é aplicado ao projeto"""
+        round_one = [
+            "```text status.txt\nred\n```",
+            "```text status.txt\ngreen\n```",
+            "```text status.txt\nyellow\n```",
+        ]
+        result, prompts = self._run([round_one])
+
+        assert "green" in result
+        assert len(prompts) == 3
+        assert (self.temp_dir / "status.txt").read_text(encoding="utf-8") == "green\n"
+
+    def test_winner_does_not_wait_for_slow_candidates(self):
+        """Testa que o vencedor é aplicado sem esperar a chamada à LLM dos perdedores"""
+        from asdlc import agent_executor
+
+        release = threading.Event()
+
+        def fake_call_llm(prompt, **kwargs):
+            if "[Candidato 1/" in prompt:
+                release.wait(10)
+                return "```text status.txt\nred\n```"
+            return "```text status.txt\ngreen\n```"
+
+        started = time.monotonic()
+        try:
+            with patch.object(agent_executor, "find_project_root", return_value=self.temp_dir), patch.object(
+                agent_executor, "call_llm", side_effect=fake_call_llm
+            ):
+                result = agent_executor.validate_and_fix(
+                    "code",
+                    "STORY-1",
+                    "implementar",
+                    [],
+                    validation_cmd="grep -q green status.txt",
+                    candidates=2,
+                    apply_files=True,
+                )
+            elapsed = time.monotonic() - started
+        finally:
+            release.set()
+
+        assert "green" in result
+        assert elapsed < 5
+        assert (self.temp_dir / "status.txt").read_text(encoding="utf-8") == "green\n"
+
+    def test_failed_round_feeds_next_round(self):
+        """Testa que, sem vencedor, a próxima rodada recebe o feedback de erro"""
+        failing = ["```text status.txt\nred\n```"] * 2
+        passing = ["```text status.txt\ngreen\n```"] * 2
+        result, prompts = self._run([failing, passing], max_retries=4, candidates=2)
+
+        assert "green" in result
+        assert len(prompts) == 4
+        assert "FEEDBACK DE ERRO" not in prompts[0]
+        assert "FEEDBACK DE ERRO" in prompts[2]
+
+    def test_all_candidates_fail(self):
+        """Testa a falha após esgotar os candidatos, sem tocar no projeto"""
+        result, prompts = self._run([["```text status.txt\nred\n```"] * 3])
+
+        assert result == "Falha ao atingir conformidade após retries."
+        assert len(prompts) == 3
+        assert (self.temp_dir / "status.txt").read_text(encoding="utf-8") == "red"
+
+    def test_winner_not_applied_without_apply_files(self):
+        """Testa que, sem apply_files, o vencedor é retornado mas a árvore de trabalho não muda"""
+        round_one = ["```text status.txt\ngreen\n```"] * 3
+        result, _ = self._run([round_one], apply_files=False)
+
+        assert "green" in result
+        assert (self.temp_dir / "status.txt").read_text(encoding="utf-8") == "red"
+
+    def test_sequential_mode_applies_files_like_speculative(self):
+        """Testa que apply_files também grava o resultado no modo sequencial antes da validação"""
+        from asdlc import agent_executor
+
+        with patch.object(agent_executor, "find_project_root", return_value=self.temp_dir), patch.object(
+            agent_executor, "call_llm", return_value="```text status.txt\ngreen\n```"
+        ):
+            untouched = agent_executor.validate_and_fix(
+                "code", "STORY-1", "implementar", [], validation_cmd="grep -q green status.txt", max_retries=1, candidates=1
+            )
+            assert untouched == "Falha ao atingir conformidade após retries."
+            assert (self.temp_dir / "status.txt").read_text(encoding="utf-8") == "red"
+
+            result = agent_executor.validate_and_fix(
+                "code",
+                "STORY-1",
+                "implementar",
+                [],
+                validation_cmd="grep -q green status.txt",
+                max_retries=1,
+                candidates=1,
+                apply_files=True,
+            )
+
+        assert "green" in result
+        assert (self.temp_dir / "status.txt").read_text(encoding="utf-8") == "green\n"
@@ -0,0 +1,198 @@
+"""
+Testes do índice SQLite de stories
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from asdlc.story_index import AmbiguousStoryId, StoryIndex, get_story_index
+
+
+def _story(ticket: str, epic: str = "", status: str = "PENDENTE", tasks: str = "- [ ] a\n- [x] b\n") -> str:
+    return (
+        f'---\nticket: "{ticket}"\ntitle: "Story {ticket}"\nstatus: "{status}"\n'
+        f'epic_id: "{epic}"\nlabels: ["api", "db"]\ndepends_on: ["STORY-0"]\n---\n\n'
+        f"# Plano de Execução\n\n## ✅ Critérios de Aceitação\n{tasks}"
+    )
+
+
+class TestStoryIndex:
+    """Testes para asdlc.story_index"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.stories = self.temp_dir / "stories"
+        (self.stories / "epics").mkdir(parents=True)
+        (self.stories / "STORY-1_login.md").write_text(_story("STORY-1", "EPIC-1"), encoding="utf-8")
+        (self.stories / "STORY-2_logout.md").write_text(_story("STORY-2", "EPIC-1", "CONCLUÍDO"), encoding="utf-8")
+        (self.stories / "epics" / "EPIC-1_auth.md").write_text('---\nepic_id: "EPIC-1"\n---\n', encoding="utf-8")
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_entries_and_fields(self):
+        """Testa os campos extraídos e o filtro por pasta"""
+        index = StoryIndex(self.temp_dir)
+
+        entries = index.entries()
+        assert [entry.name for entry in entries] == ["STORY-1_login.md", "STORY-2_logout.md"]
+        story = entries[0]
+        assert story.ticket == "STORY-1"
+        assert story.story_id == "STORY-1"
+        assert story.labels == ["api", "db"]
+        assert story.depends_on == ["STORY-0"]
+        assert (story.tasks_open, story.tasks_done, story.progress_percentage) == (1, 1, 50.0)
+        assert story.has_criteria
+        assert len(index.entries(folder=None)) == 3
+        assert (self.temp_dir / ".asdlc" / "index.db").exists()
+
+    def test_corrupt_db_falls_back_to_memory(self):
+        """Testa que um index.db corrompido (falha ao criar o schema) não impede a consulta"""
+        (self.temp_dir / ".asdlc").mkdir()
+        (self.temp_dir / ".asdlc" / "index.db").write_bytes(b"isto nao e um banco sqlite" * 100)
+
+        entries = StoryIndex(self.temp_dir).entries()
+
+        assert [entry.name for entry in entries] == ["STORY-1_login.md", "STORY-2_logout.md"]
+
+    def test_malformed_story_does_not_break_queries(self):
+        """Testa campos não textuais no frontmatter e uma story que falha ao indexar"""
+        (self.stories / "STORY-3_lista.md").write_text(
+            "---\nticket: 3\nepic_id:\n  - EPIC-1\n  - EPIC-2\nlabels: api\n---\n", encoding="utf-8"
+        )
+        from asdlc import story_index
+
+        real_scan = story_index._scan_file
+
+        def scan(project_root, path):
+            if path.name == "STORY-2_logout.md":
+                raise TypeError("valor inesperado")
+            return real_scan(project_root, path)
+
+        with patch("asdlc.story_index._scan_file", side_effect=scan):
+            entries = {entry.name: entry for entry in StoryIndex(self.temp_dir).entries()}
+
+        assert sorted(entries) == ["STORY-1_login.md", "STORY-3_lista.md"]
+        assert entries["STORY-3_lista.md"].ticket == "3"
+        assert entries["STORY-3_lista.md"].epic_id == '["EPIC-1", "EPIC-2"]'
+        assert entries["STORY-3_lista.md"].labels == ["api"]
+
+    def test_refresh_is_incremental(self):
+        """Testa que só arquivos com mtime/tamanho alterados são relidos e removidos saem do índice"""
+        index = StoryIndex(self.temp_dir)
+        index.entries()
+
+        with patch("asdlc.story_index._scan_file") as scan:
+            index.entries()
+            scan.assert_not_called()
+
+        changed = self.stories / "STORY-1_login.md"
+        changed.write_text(_story("STORY-1", tasks="- [x] a\n- [x] b\n"), encoding="utf-8")
+        os.utime(changed, ns=(changed.stat().st_atime_ns, changed.stat().st_mtime_ns + 1_000_000))
+        (self.stories / "STORY-2_logout.md").unlink()
+
+        entries = index.entries()
+        assert [entry.name for entry in entries] == ["STORY-1_login.md"]
+        assert entries[0].tasks_done == 2
+
+    def test_find_by_id_and_epic_progress(self):
+        """Testa a busca por ID e o progresso do épico"""
+        index = get_story_index(self.temp_dir)
+
+        assert index.find_by_id("STORY-2") == self.temp_dir.resolve() / "stories" / "STORY-2_logout.md"
+        assert index.find_by_id("STORY-9") is None
+        assert index.epic_progress("EPIC-1") == (2, 1)
+
+    def test_epic_counts_match_epic_id_exactly_and_are_cached(self):
+        """Testa a agregação por epic_id exato e o cache invalidado pelo mtime das stories"""
+        (self.stories / "STORY-3_perfil.md").write_text(_story("STORY-3", "EPIC-10", "Done"), encoding="utf-8")
+        index = StoryIndex(self.temp_dir)
+
+        assert index.epic_counts() == {"EPIC-1": (2, 1), "EPIC-10": (1, 1)}
+        with patch("asdlc.story_index._scan_file") as scan:
+            assert index.epic_progress("EPIC-1") == (2, 1)
+            scan.assert_not_called()
+
+        story = self.stories / "STORY-1_login.md"
+        story.write_text(_story("STORY-1", "EPIC-1", "concluido"), encoding="utf-8")
+        os.utime(story, ns=(story.stat().st_atime_ns, story.stat().st_mtime_ns + 1_000_000))
+        assert index.epic_progress("EPIC-1") == (2, 2)
+
+        # Story concluída pelo CLI (outro processo) com o servidor MCP aberto
+        story.write_text(_story("STORY-1", "EPIC-1"), encoding="utf-8")
+        os.utime(story, ns=(story.stat().st_atime_ns, story.stat().st_mtime_ns + 2_000_000))
+        StoryIndex(self.temp_dir).entries()
+        assert index.epic_progress("EPIC-1") == (2, 1)
+
+    def test_update_epic_progress_does_not_list_epics(self):
+        """Testa que update_epic_progress usa a agregação em vez de list_epics"""
+        from asdlc import story_manager
+
+        memory = self.stories / "MEMORY.md"
+        memory.write_text("| EPIC-1 | Auth | EM ANDAMENTO | 0/0 concluídas |\n", encoding="utf-8")
+        with patch.object(story_manager, "find_project_root", return_value=self.temp_dir), patch.object(
+            story_manager, "list_epics"
+        ) as list_epics:
+            assert story_manager.update_epic_progress("EPIC-1") is True
+            list_epics.assert_not_called()
+
+        assert "1/2 concluídas" in memory.read_text(encoding="utf-8")
+
+    def test_find_by_id_exact_prefix_and_ambiguous(self):
+        """Testa a busca exata pelo ticket, por prefixo e o erro de ID ambíguo"""
+        (self.stories / "20260425_223920_a.md").write_text(_story("20260425_223920_a"), encoding="utf-8")
+        (self.stories / "20260425_223945_b.md").write_text(_story("20260425_223945_b"), encoding="utf-8")
+        index = StoryIndex(self.temp_dir)
+
+        assert index.find_by_id("20260425_223920_a") == self.stories / "20260425_223920_a.md"
+        assert index.find_by_id("20260425_22394") == self.stories / "20260425_223945_b.md"
+        with pytest.raises(AmbiguousStoryId) as error:
+            index.find_by_id("20260425_22")
+        assert [path.name for path in error.value.matches] == ["20260425_223920_a.md", "20260425_223945_b.md"]
+        assert index.find_by_prefix("STORY-") == [self.stories / "STORY-1_login.md", self.stories / "STORY-2_logout.md"]
+
+    def test_ticket_map_rebuilt_only_when_stories_change(self):
+        """Testa que o mapa de tickets só é reconstruído quando alguma story muda (inclusive o ticket)"""
+        index = StoryIndex(self.temp_dir)
+        assert index.find_by_id("STORY-1") is not None
+        tickets, _ = index._ticket_map()
+        assert index._ticket_map()[0] is tickets
+
+        (self.stories / "STORY-3_reset.md").write_text(_story("STORY-3"), encoding="utf-8")
+        assert index.find_by_id("STORY-3") == self.stories / "STORY-3_reset.md"
+
+        # Editar o ticket não muda o mtime do diretório
+        login = self.stories / "STORY-1_login.md"
+        login.write_text(_story("AUTH-9"), encoding="utf-8")
+        os.utime(login, ns=(login.stat().st_atime_ns, login.stat().st_mtime_ns + 1_000_000))
+        assert index.find_by_id("AUTH-9") == login
+        assert index.find_by_prefix("STORY-1") == [login]
+
+    def test_ticket_map_sees_changes_indexed_by_another_process(self):
+        """Testa a invalidação pelo contador gravado no banco (ex: CLI reindexa com o servidor MCP aberto)"""
+        server = StoryIndex(self.temp_dir)
+        assert server.find_by_id("STORY-3") is None
+
+        (self.stories / "STORY-3_reset.md").write_text(_story("STORY-3"), encoding="utf-8")
+        StoryIndex(self.temp_dir).entries()  # outro processo atualiza as linhas primeiro
+
+        assert server.find_by_id("STORY-3") == self.stories / "STORY-3_reset.md"
+
+    def test_dashboard_uses_index(self):
+        """Testa que o dashboard lê as stories do índice"""
+        from asdlc.dashboard_generator import DashboardParser
+
+        (self.stories / "MEMORY.md").write_text('---\nticket: "X"\n---\n', encoding="utf-8")
+        stories = DashboardParser(self.temp_dir).parse_stories()
+
+        assert [story.file_path for story in stories] == [
+            "stories/STORY-1_login.md",
+            "stories/STORY-2_logout.md",
+            "stories/epics/EPIC-1_auth.md",
+        ]
+        assert stories[1].status == "CONCLUÍDO"
@@ -0,0 +1,152 @@
+"""
+Testes da detecção determinística (e cacheada) do comando de testes
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from asdlc.test_detection import (
+    detect_test_command,
+    load_cached_test_command,
+    parse_llm_test_command,
+    save_test_command,
+)
+from asdlc.utils import detect_test_framework
+
+
+class TestDetectTestCommand:
+    """Testes para asdlc.test_detection"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / ".asdlc").mkdir()
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    @pytest.mark.parametrize(
+        "manifest, content, expected",
+        [
+            ("platformio.ini", "[env:uno]\n", "pio test"),
+            ("Cargo.toml", "[package]\n", "cargo test"),
+            ("go.mod", "module x\n", "go test ./..."),
+            ("package.json", json.dumps({"devDependencies": {"jest": "^29"}}), "npx jest"),
+            ("package.json", json.dumps({"devDependencies": {"vitest": "^1"}}), "npx vitest run"),
+            ("package.json", json.dumps({"scripts": {"test": "mocha"}}), "npm test"),
+            ("pyproject.toml", "[tool.pytest.ini_options]\n", "pytest"),
+        ],
+    )
+    def test_heuristics_per_manifest(self, manifest, content, expected):
+        """Testa o comando detectado para cada tipo de manifesto"""
+        (self.temp_dir / manifest).write_text(content, encoding="utf-8")
+
+        assert detect_test_command(self.temp_dir) == expected
+
+    def test_inconclusive_returns_none(self):
+        """Testa que o script padrão do npm init não conta como framework"""
+        package = {"scripts": {"test": 'echo "Error: no test specified" && exit 1'}}
+        (self.temp_dir / "package.json").write_text(json.dumps(package), encoding="utf-8")
+
+        assert detect_test_command(self.temp_dir) is None
+        assert detect_test_framework(self.temp_dir) == "unittest"
+
+    def test_result_is_cached_until_manifest_changes(self):
+        """Testa a persistência em .asdlc/ e a invalidação pelo mtime dos manifestos"""
+        (self.temp_dir / "go.mod").write_text("module x\n", encoding="utf-8")
+        assert detect_test_command(self.temp_dir) == "go test ./..."
+        assert (self.temp_dir / ".asdlc" / "test_command.json").exists()
+
+        with patch("asdlc.test_detection.detect_test_framework") as detect:
+            assert detect_test_command(self.temp_dir) == "go test ./..."
+            detect.assert_not_called()
+
+        (self.temp_dir / "Cargo.toml").write_text("[package]\n", encoding="utf-8")
+        assert load_cached_test_command(self.temp_dir) is None
+        assert detect_test_command(self.temp_dir) == "cargo test"
+
+    def test_js_config_file_invalidates_cache(self):
+        """Testa que criar jest.config.* / vitest.config.* invalida o comando cacheado"""
+        (self.temp_dir / "package.json").write_text(json.dumps({"scripts": {"test": "mocha"}}), encoding="utf-8")
+        assert detect_test_command(self.temp_dir) == "npm test"
+
+        (self.temp_dir / "jest.config.ts").write_text("export default {}\n", encoding="utf-8")
+        assert load_cached_test_command(self.temp_dir) is None
+        assert detect_test_command(self.temp_dir) == "npx jest"
+
+        (self.temp_dir / "vitest.config.mjs").write_text("export default {}\n", encoding="utf-8")
+        assert detect_test_command(self.temp_dir) == "npx vitest run"
+
+    @pytest.mark.parametrize("content", ["[]", '"jest"', "null", json.dumps({"devDependencies": ["jest"], "scripts": "x"})])
+    def test_non_object_package_json_uses_default(self, content):
+        """Testa que package.json válido mas com formato inesperado cai no framework padrão"""
+        (self.temp_dir / "package.json").write_text(content, encoding="utf-8")
+
+        assert detect_test_framework(self.temp_dir) == "unittest"
+
+    def test_llm_answer_is_cached(self):
+        """Testa que o comando vindo da LLM também é reaproveitado"""
+        save_test_command(self.temp_dir, "make check", "llm")
+
+        assert detect_test_command(self.temp_dir) == "make check"
+
+    def test_validate_and_fix_skips_llm_detection(self):
+        """Testa que validate_and_fix não chama o Architecture Agent quando a heurística resolve"""
+        from asdlc import agent_executor
+
+        (self.temp_dir / "pytest.ini").write_text("[pytest]\n", encoding="utf-8")
+        cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            with patch.object(agent_executor, "spawn_agent") as spawn, patch.object(
+                agent_executor, "call_llm", return_value="ok"
+            ), patch.object(agent_executor, "run_validation") as run:
+                run.return_value.passed = True
+                result = agent_executor.validate_and_fix("code", "STORY-1", "implementar", [])
+        finally:
+            os.chdir(cwd)
+
+        assert result == "ok"
+        spawn.assert_not_called()
+        assert run.call_args[0][0] == "pytest"
+
+    @pytest.mark.parametrize(
+        "answer, expected",
+        [
+            ("make check", "make check"),
+            ("  'npm run test:unit'\n", "npm run test:unit"),
+            ("`./gradlew test`", "./gradlew test"),
+            ("ERRO: Falha na chamada da API", None),
+            ("MODO ANTIGRAVITY: Resultado simulado", None),
+            ("O comando é:\npytest -q", None),
+            ("Comando: pytest", None),
+            ("", None),
+        ],
+    )
+    def test_parse_llm_test_command(self, answer, expected):
+        """Testa que só uma resposta de uma linha com cara de comando é aceita"""
+        assert parse_llm_test_command(answer) == expected
+
+    def test_invalid_llm_answer_is_not_cached(self):
+        """Testa que um erro do Architecture Agent não vai para o cache nem vira comando"""
+        from asdlc import agent_executor
+
+        cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            with patch.object(agent_executor, "spawn_agent", return_value="ERRO: Falha na chamada da API"), patch.object(
+                agent_executor, "call_llm", return_value="ok"
+            ), patch.object(agent_executor, "run_validation") as run:
+                run.return_value.passed = True
+                result = agent_executor.validate_and_fix("code", "STORY-1", "implementar", [])
+        finally:
+            os.chdir(cwd)
+
+        assert result == "ok"
+        assert run.call_args[0][0] == "python -m unittest"
+        assert not (self.temp_dir / ".asdlc" / "test_command.json").exists()
@@ -0,0 +1,161 @@
+"""
+Testes da seleção incremental de testes (grafo de imports)
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from asdlc.test_impact import affected_tests, impact_test_command, load_import_graph, narrow_test_command
+
+
+class TestImportGraph:
+    """Testes para asdlc.test_impact"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        files = {
+            "app/__init__.py": "",
+            "app/core.py": "def soma(a, b):\n    return a + b\n",
+            "app/api.py": "from .core import soma\n",
+            "app/test_helpers.py": "VALOR = 1\n",
+            "other.py": "X = 1\n",
+            "tests/test_core.py": "from app.core import soma\n\ndef test_soma():\n    assert soma(1, 1) == 2\n",
+            "tests/test_api.py": "from app import api\n\ndef test_api():\n    pass\n",
+            "tests/test_other.py": "import other\n\ndef test_other():\n    pass\n",
+            "web/util.js": "export const x = 1;\n",
+            "web/util.test.js": "import { x } from './util';\n",
+        }
+        for rel_path, content in files.items():
+            path = self.temp_dir / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_affected_tests_follow_transitive_imports(self):
+        """Testa que a mudança num módulo seleciona quem o importa direta ou transitivamente"""
+        assert affected_tests(self.temp_dir, ["app/core.py"]) == ["tests/test_api.py", "tests/test_core.py"]
+        assert affected_tests(self.temp_dir, ["other.py"]) == ["tests/test_other.py"]
+        assert affected_tests(self.temp_dir, ["web/util.js"]) == ["web/util.test.js"]
+
+    def test_module_named_like_a_test_is_not_selected(self):
+        """Testa que test_*.py sem funções/classes de teste não conta como teste"""
+        graph = load_import_graph(self.temp_dir)
+
+        assert graph["app/test_helpers.py"]["is_test"] is False
+        assert graph["tests/test_core.py"]["is_test"] is True
+
+    def test_graph_is_cached_and_refreshed_by_mtime(self):
+        """Testa que só arquivos com mtime alterado são reanalisados"""
+        load_import_graph(self.temp_dir)
+        assert (self.temp_dir / ".asdlc" / "import_graph.json").exists()
+
+        with patch("asdlc.test_impact._parse_python") as parse:
+            load_import_graph(self.temp_dir)
+            parse.assert_not_called()
+
+        other = self.temp_dir / "other.py"
+        other.write_text("from app.core import soma\n", encoding="utf-8")
+        os.utime(other, ns=(other.stat().st_atime_ns, other.stat().st_mtime_ns + 1_000_000))
+        with patch("asdlc.test_impact._parse_python", return_value={"imports": ["app/core.py"], "is_test": False}) as parse:
+            graph = load_import_graph(self.temp_dir)
+            parse.assert_called_once()
+        assert graph["other.py"]["imports"] == ["app/core.py"]
+
+    def test_narrow_test_command(self):
+        """Testa a restrição do comando aos arquivos de teste"""
+        assert narrow_test_command("pytest -q", ["tests/test_a.py"]) == "pytest -q tests/test_a.py"
+        assert narrow_test_command("npm test", ["a.test.js"]) == "npm test -- a.test.js"
+        assert narrow_test_command("go test ./...", ["x_test.go"]) is None
+        assert narrow_test_command("pytest", []) is None
+
+    def test_narrow_test_command_keeps_existing_targets(self):
+        """Testa que comandos com alvos próprios rodam completos em vez de somar os afetados"""
+        assert narrow_test_command("pytest tests/unit", ["tests/test_a.py"]) is None
+        assert narrow_test_command("python -m pytest -q tests/", ["tests/test_a.py"]) is None
+        assert narrow_test_command("npx jest src/", ["a.test.js"]) is None
+        assert narrow_test_command("npm test -- src/", ["a.test.js"]) is None
+        assert narrow_test_command("pytest -k slow", ["tests/test_a.py"]) is None
+        assert narrow_test_command("pytest -x --tb=short", ["tests/test_a.py"]) == "pytest -x --tb=short tests/test_a.py"
+
+    def test_conftest_change_runs_full_suite(self):
+        """Testa que alterar conftest.py desativa a seleção"""
+        assert impact_test_command(self.temp_dir, "pytest", ["conftest.py"]) is None
+
+    def test_validate_and_fix_retries_affected_then_full(self):
+        """Testa que retries rodam só os testes afetados e a suíte completa roda uma vez no fim"""
+        from asdlc import agent_executor
+
+        returncodes = iter([1, 0, 0])
+        commands = []
+
+        def fake_run(cmd, cwd, **kwargs):
+            commands.append(cmd)
+            return MagicMock(passed=next(returncodes) == 0, stdout="", stderr="falhou")
+
+        (self.temp_dir / "PROJECT_CONTEXT.md").write_text("# Contexto", encoding="utf-8")
+        with patch.object(agent_executor, "find_project_root", return_value=self.temp_dir), patch.object(
+            agent_executor, "call_llm", return_value="ok"
+        ), patch.object(agent_executor, "run_validation", side_effect=fake_run):
+            result = agent_executor.validate_and_fix(
+                "code", "STORY-1", "implementar", ["app/core.py"], validation_cmd="pytest"
+            )
+
+        assert result == "ok"
+        assert commands == ["pytest", "pytest tests/test_api.py tests/test_core.py", "pytest"]
+
+    def test_avalidate_and_fix_retries_affected_then_full(self):
+        """Testa que a versão assíncrona segue a mesma sequência de comandos"""
+        import asyncio
+
+        from asdlc import agent_executor
+
+        returncodes = iter([1, 0, 0])
+        commands = []
+
+        def fake_run(cmd, cwd, **kwargs):
+            commands.append(cmd)
+            return MagicMock(passed=next(returncodes) == 0, stdout="", stderr="falhou", timed_out=False)
+
+        async def fake_acall(*args, **kwargs):
+            return "ok"
+
+        (self.temp_dir / "PROJECT_CONTEXT.md").write_text("# Contexto", encoding="utf-8")
+        with patch.object(agent_executor, "find_project_root", return_value=self.temp_dir), patch.object(
+            agent_executor, "acall_llm", side_effect=fake_acall
+        ), patch.object(agent_executor, "run_validation", side_effect=fake_run):
+            result = asyncio.run(
+                agent_executor.avalidate_and_fix("code", "STORY-1", "implementar", ["app/core.py"], validation_cmd="pytest")
+            )
+
+        assert result == "ok"
+        assert commands == ["pytest", "pytest tests/test_api.py tests/test_core.py", "pytest"]
+
+    def test_full_suite_failure_reports_full_command(self):
+        """Testa que o feedback aponta a suíte completa quando só ela falha"""
+        from asdlc import agent_executor
+
+        returncodes = iter([1, 0, 1, 0])
+        commands = []
+
+        def fake_run(cmd, cwd, **kwargs):
+            commands.append(cmd)
+            return MagicMock(passed=next(returncodes) == 0, stdout="", stderr="falhou", timed_out=False)
+
+        (self.temp_dir / "PROJECT_CONTEXT.md").write_text("# Contexto", encoding="utf-8")
+        with patch.object(agent_executor, "find_project_root", return_value=self.temp_dir), patch.object(
+            agent_executor, "call_llm", return_value="ok"
+        ), patch.object(agent_executor, "run_validation", side_effect=fake_run), patch.object(
+            agent_executor, "_build_error_feedback", return_value="feedback"
+        ) as feedback:
+            result = agent_executor.validate_and_fix(
+                "code", "STORY-1", "implementar", ["app/core.py"], validation_cmd="pytest"
+            )
+
+        assert result == "ok"
+        assert commands == ["pytest", "pytest tests/test_api.py tests/test_core.py", "pytest", "pytest"]
+        assert [c.args[2] for c in feedback.call_args_list] == ["pytest", "pytest"]
@@ -0,0 +1,175 @@
+"""
+Testes do runner de validação (streaming, timeout e extração do traceback)
+"""
+
+import io
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from asdlc.validation_runner import extract_failure_tail, run_validation
+
+PYTHON = f'"{sys.executable}"'
+
+
+class TestValidationRunner:
+    """Testes para asdlc.validation_runner"""
+
+    def setup_method(self):
+        self.cwd = Path(tempfile.gettempdir())
+
+    def test_streams_and_captures_output(self):
+        """Testa a captura de stdout/stderr com callback por linha"""
+        lines = []
+        run = run_validation(
+            f"{PYTHON} -c \"import sys; print('a'); print('b', file=sys.stderr)\"", self.cwd, on_line=lines.append
+        )
+
+        assert run.passed
+        assert run.stdout == "a\n"
+        assert run.stderr == "b\n"
+        assert sorted(lines) == ["a", "b"]
+
+    def test_ring_buffer_keeps_only_the_tail(self):
+        """Testa que só as últimas linhas ficam em memória"""
+        run = run_validation(f'{PYTHON} -c "[print(i) for i in range(100)]"', self.cwd, max_output_lines=10)
+
+        assert run.stdout.splitlines() == [str(i) for i in range(90, 100)]
+        assert run.dropped_lines == 90
+
+    def test_output_is_capped_in_bytes(self):
+        """Testa o limite em bytes, inclusive para uma linha gigante sem quebra"""
+        run = run_validation(
+            f"{PYTHON} -c \"import sys; sys.stdout.write('x' * 500000); print(); print('fim')\"",
+            self.cwd,
+            max_output_lines=100,
+        )
+        assert run.passed
+        assert run.stdout.endswith("fim\n")
+        assert len(run.stdout) < 500000 + 10
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setenv("ASDLC_VALIDATION_OUTPUT_BYTES", "1000")
+            run = run_validation(f'{PYTHON} -c "[print(str(i) * 50) for i in range(100)]"', self.cwd)
+
+        assert len(run.stdout) <= 1000
+        assert run.stdout.splitlines()[-1] == "99" * 50
+        assert run.dropped_lines > 0
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="ulimit POSIX")
+    def test_memory_limit_applied_by_shell(self):
+        """Testa que o limite de memória vale para o comando sem preexec_fn"""
+        run = run_validation(
+            f'{PYTHON} -c "import resource; print(resource.getrlimit(resource.RLIMIT_AS)[0])"',
+            self.cwd,
+            max_memory_mb=4096,
+        )
+
+        assert run.passed
+        assert run.stdout.strip() == str(4096 * 1024 * 1024)
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="grupo de processos POSIX")
+    def test_timeout_kills_process_group(self):
+        """Testa que o timeout encerra o comando (e seus filhos) sem esperar o fim"""
+        started = time.monotonic()
+        run = run_validation(f'{PYTHON} -c "import time; time.sleep(30)" & wait', self.cwd, timeout=0.5)
+
+        assert time.monotonic() - started < 10
+        assert run.timed_out
+        assert not run.passed
+        assert "timeout" in run.stderr
+
+    def test_timeout_kills_child_that_ignores_sigterm(self):
+        """Testa que um filho que ignora SIGTERM recebe SIGKILL mesmo quando o shell já saiu"""
+        temp_dir = Path(tempfile.mkdtemp())
+        pid_file = temp_dir / "child.pid"
+        try:
+            with patch("asdlc.validation_runner.KILL_GRACE_SECONDS", 0.3):
+                started = time.monotonic()
+                run = run_validation(
+                    f"sh -c 'trap \"\" TERM; echo $$ > {pid_file}; exec sleep 30' & wait", temp_dir, timeout=0.5
+                )
+                elapsed = time.monotonic() - started
+            child = int(pid_file.read_text())
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        assert run.timed_out
+        assert elapsed < 5
+        for _ in range(20):
+            try:
+                os.kill(child, 0)
+                if "State:\tZ" in Path(f"/proc/{child}/status").read_text():
+                    break  # Morto, aguardando o init colher
+            except (ProcessLookupError, FileNotFoundError):
+                break
+            time.sleep(0.05)
+        else:
+            os.kill(child, signal.SIGKILL)
+            pytest.fail("filho que ignora SIGTERM sobreviveu ao timeout")
+
+    def test_stop_event_cancels(self):
+        """Testa o cancelamento por evento (candidato especulativo perdedor)"""
+        stop = threading.Event()
+        stop.set()
+        run = run_validation(f'{PYTHON} -c "import time; time.sleep(30)"', self.cwd, stop=stop)
+
+        assert run.cancelled
+        assert not run.passed
+
+    def test_escaped_grandchild_still_writing_does_not_break_result(self):
+        """Testa que um neto fora do grupo, ainda escrevendo no pipe, não quebra a montagem do resultado"""
+        temp_dir = Path(tempfile.mkdtemp())
+        pid_file = temp_dir / "yes.pid"
+        try:
+            with patch("asdlc.validation_runner.KILL_GRACE_SECONDS", 0.2):
+                run = run_validation(f"setsid sh -c 'echo $$ > {pid_file}; exec yes' & sleep 0.3", temp_dir)
+        finally:
+            for _ in range(50):
+                if pid_file.exists() and pid_file.read_text().strip():
+                    os.kill(int(pid_file.read_text()), signal.SIGKILL)
+                    break
+                time.sleep(0.05)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        assert run.returncode == 0
+        assert run.stdout.startswith("y")
+
+    def test_pump_updates_buffer_only_under_lock(self):
+        """Testa que o leitor só altera o buffer segurando o lock (run_validation copia sob o mesmo lock)"""
+        from collections import deque
+
+        from asdlc.validation_runner import _pump
+
+        buffer, lock = deque(), threading.Lock()
+        with lock:
+            reader = threading.Thread(target=_pump, args=(io.StringIO("a\nb\n"), buffer, [0], 0, None, 10, 1024, lock))
+            reader.start()
+            time.sleep(0.1)
+            assert len(buffer) == 0
+        reader.join(timeout=1)
+
+        assert [line for line, _ in buffer] == ["a\n", "b\n"]
+
+    def test_extract_failure_tail(self):
+        """Testa que só o trecho a partir do último traceback vai para o feedback"""
+        output = "\n".join(
+            ["coletando 500 testes"] * 200
+            + ["Traceback (most recent call last):", '  File "app.py", line 3', "ValueError: boom"]
+        )
+        tail = extract_failure_tail(output)
+
+        assert tail.startswith("Traceback")
+        assert tail.endswith("ValueError: boom")
+        assert "coletando" not in tail
+
+        long_output = "\n".join(f"linha {i}" for i in range(500))
+        assert extract_failure_tail(long_output, max_lines=5).splitlines()[0] == "[... 495 linhas omitidas ...]"